@@ -1,5 +1,3 @@
-import time
-
 import pygame
 
 from Content.src.viewControllers import FifthViewController
@@ -14,8 +12,11 @@ from PygUI.UI.accesories import UITabBarItem
 from PygUI.UI.viewControllers import UITabBarViewController
 from PygUI.UI.viewControllers import UIViewController
 from PygUI.additions import Notifications
+from PygUI.controller import DirtyRegions
 from PygUI.event import EventHandler
 from PygUI.time import Clock
+from PygUI.time import FrameOverlay
+from PygUI.time import FramePacing
 
 __author__ = "Andreas Ormevik Jansen"
 __copyright__ = None
@@ -32,7 +33,7 @@ class App:
     _clock: Clock
 
     _name: str = "App"
-    _LPS: int = 30  # Loops per second: "run()" loop
+    _LPS: int = 30  # Loops per second: "run()" loop, while active. The clock's pacing lowers it while nothing happens
     _active: bool
 
     _view_controller: UIViewController
@@ -48,15 +49,19 @@ class App:
         self._displayHandler = DisplayHandler()
         self._displayHandler.set_display(self._name)
 
-        # Set up a clock
+        # Set up a clock. Logic runs at a fixed rate, so movement doesn't depend on how fast frames render
         self._clock = Clock()
-
-        # Set up a font
-        Fonts.add("monospace", 40)
+        self._clock.fixed_rate = 60
+        self._clock.pacing = FramePacing()
+        self._clock.overlay = FrameOverlay(position=(self._displayHandler.width - 260, 100))
 
         # Set up UI
         self._initialize_user_interface()
 
+        # Fonts of the other tabs load over the first frames, one per frame, before they're navigated to. The fonts
+        # of the first frame were loaded by the UI asking for them
+        Fonts.preload(("monospace", 50), ("monospace", 60))
+
         # Run application
         print("App launched\n")
         self._active = True
@@ -83,9 +88,13 @@ class App:
             UITabBarItem("Scroll", ScrollViewController)
         ]
         
+        # Everything renders into subsurfaces of the display, instead of being copied through intermediate surfaces
+        display = self._displayHandler.display
+
         self._view_controller = UITabBarViewController(
-            pygame.Surface((self._displayHandler.width, self._displayHandler.height)),
+            display.subsurface(display.get_rect()),
             items,
+            subsurfaces=True,
             height=80,
             font=Fonts.get("monospace", 40),
             highlight_color=(180, 180, 180),
@@ -105,42 +114,73 @@ class App:
     # noinspection PyArgumentList
     def _run(self):
 
-        EventHandler.callbacks.add.any(self._handle_events)
+        EventHandler.callbacks.add.event(pygame.QUIT, self._handle_events)
+
+        presenting = False
 
-        while self._active and pygame.display.get_active():
+        while self._active:
 
             self._clock.synchronize_loop(self._LPS)
 
             # ----------------------------------------------------------------------------------------------------------
 
-            # Input
+            # Input. Also handled while suspended, so the window being restored or closed is noticed
 
+            self._clock.begin_phase("input")
             EventHandler.update()
+            self._clock.end_phase("input")
+
+            if not self._clock.presenting:
+                presenting = False
+                continue
+
+            if not presenting:
+                presenting = True
+
+                # The display may have lost what was drawn while suspended, so all of it renders again
+                self._view_controller.invalidate_subtree()
+                DirtyRegions.add_all()
 
             # ----------------------------------------------------------------------------------------------------------
 
             # Logic
-            self._view_controller.update(0, 0, self._clock.delta)
+            self._clock.begin_phase("logic")
+
+            for _ in range(self._clock.steps):
+                self._view_controller.update(0, 0, self._clock.delta)
+
+            self._clock.end_phase("logic")
 
             # ----------------------------------------------------------------------------------------------------------
 
-            # Rendering
-            self._view_controller.render()
-            self._displayHandler.display.blit(self._view_controller.surface, (0, 0))
-            self._clock.render_lps(self._displayHandler.display)
+            # Rendering. A view controller tree that didn't change keeps what it drew
+            self._clock.begin_phase("render")
+
+            # The overlay is drawn over the view controllers. Clean view controllers keep their pixels, so the
+            # overlay's blend is taken off before it's redone
+            overlay = self._clock.overlay.dirty or self._view_controller.dirty
+
+            if overlay:
+                self._clock.erase_overlay(self._displayHandler.display)
+
+            if self._view_controller.refresh():
+                if self._view_controller.surface.get_parent() is not self._displayHandler.display:
+                    self._displayHandler.display.blit(self._view_controller.surface, (0, 0))
+
+            if overlay:
+                self._clock.render_overlay(self._displayHandler.display)
+
+            self._clock.end_phase("render")
+
+            self._clock.begin_phase("present")
             self._displayHandler.update()
+            self._clock.end_phase("present")
 
             # ----------------------------------------------------------------------------------------------------------
 
-        EventHandler.callbacks.remove.any(self._handle_events)
-
-        if self._active:
-            while self._active and not pygame.display.get_active():
-                time.sleep(0.5)
-                self._active = not pygame.event.get(pygame.QUIT)
-            self._clock.restart()
-            self._run()
+        EventHandler.callbacks.remove.event(pygame.QUIT, self._handle_events)
 
+        print(self._clock.timings.summary())
         print("App ended run session\n")
 
 
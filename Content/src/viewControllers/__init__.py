@@ -38,6 +38,7 @@ class HomeViewController(UIViewController):
         self._test_button2.color = (40, 40, 40)
         self._test_button2.highlight_color = (250, 250, 250)
         self._test_button2.command = self.write
+        self.adopt(self._test_button, self._test_button2)
         PygUI.Notifications.beep(5)
 
     def __del__(self):
@@ -93,6 +94,7 @@ class SecondViewController(UIViewController):
         self._text_block.horizontal_alignment = Orientation.Center
         self._text_block.text_color = [0, 0, 0]
         self._text_block.text = "..."
+        self.adopt(self._text, self._test_button, self._text_block)
 
     def __del__(self):
         UIViewController.__del__(self)
@@ -151,6 +153,7 @@ class ThirdViewController(UIScrollViewController):
 
         self.image = UIImage(image=Content.get_path() + "/assets/image.png")
         self.image.size = (160, 160, 500, 300)
+        self.adopt(self.title, self.image)
 
     def __del__(self):
         UIScrollViewController.__del__(self)
@@ -192,6 +195,7 @@ class FourthViewController(UIViewController):
         self.menu = UIScrollMenuViewController(self.surface)
         self.menu.title.font = Fonts.get("monospace", 50)
         self.menu.on_navigated()
+        self.adopt(self.menu)
 
         PygUI.Notifications.notify("PygUI", "You just entered the fourth view controller", True)
 
@@ -230,6 +234,7 @@ class FifthViewController(UIScrollViewController):
         self.button = UIButton()
         self.button.size = [100, 200, 120, 80]
         self.button.color = [100, 200, 120]
+        self.adopt(self.button)
 
     def __del__(self):
         UIScrollViewController.__del__(self)
@@ -273,6 +278,7 @@ class ScrollViewController(UIScrollViewController):
         self.button = UIButton()
         self.button.size = [100, 200, 120, 80]
         self.button.color = [100, 200, 120]
+        self.adopt(self.button)
 
     def __del__(self):
         UIScrollViewController.__del__(self)
@@ -1,10 +1,16 @@
 from abc import ABC as _ABC
+from collections import OrderedDict as _OrderedDict
+from collections import deque as _deque
 from enum import Enum as _Enum
-import time as _time
-import traceback as _traceback
+from math import ceil as _ceil
+from math import floor as _floor
+import weakref as _weakref
 
 import pygame as _pygame
 
+from PygUI.controller import DirtyRegions as _DirtyRegions
+from PygUI.controller import RenderNode as _RenderNode
+from PygUI.controller import Surfaces as _Surfaces
 from PygUI.utilities import weak as _weak
 from PygUI.utilities import minimum as _minimum
 from PygUI.utilities import maximum as _maximum
@@ -60,23 +66,91 @@ class MouseButton(_Enum):
 
 
 class Fonts:
-    fonts: [_pygame.font] = []
+    """
+    Fonts shared by all widgets, keyed by (name, size). The name None is pygame's default font, and other names are
+    system fonts. Once more than capacity are loaded, the least recently requested ones are dropped from the registry,
+    except those declared with add() or preload(). Fonts are only loaded on the loop thread, as FreeType isn't
+    thread-safe.
+    """
+
+    capacity: int = 32
+    fonts: [(_pygame.font.Font, str, int)] = []  # (font, name, size) of the loaded fonts, in loading order
+
+    _loaded: _OrderedDict = _OrderedDict()  # (name, size) -> Font, least recently requested first
+    _declared: {(str, int)} = set()
+    _keys: _weakref.WeakKeyDictionary = _weakref.WeakKeyDictionary()  # Font -> (name, size), for fonts loaded here
 
     @staticmethod
-    def add(font_name: str, size: int) -> _pygame.font:
-        for font in Fonts.fonts:
-            if font[1] == font_name and font[2] == size:
-                return font[0]
-        font = _pygame.font.SysFont(font_name, size)
+    def add(font_name: str or None, size: int) -> _pygame.font.Font:
+        """Like get(), but the font is kept for good"""
+        Fonts._declared.add((font_name, size))
+        return Fonts.get(font_name, size)
+
+    @staticmethod
+    def get(font_name: str or None, size: int) -> _pygame.font.Font:
+        key = (font_name, size)
+        font = Fonts._loaded.get(key)
+
+        if font is not None:
+            Fonts._loaded.move_to_end(key)
+            return font
+
+        if font_name is None:
+            font = _pygame.font.Font(_pygame.font.get_default_font(), size)
+
+        else:
+            font = _pygame.font.SysFont(font_name, size)
+
+        Fonts._loaded[key] = font
+        Fonts._keys[font] = key
         Fonts.fonts.append((font, font_name, size))
+        Fonts._evict()
         return font
 
     @staticmethod
-    def get(font_name: str, size: int) -> _pygame.font:
-        for font in Fonts.fonts:
-            if font[1] == font_name and font[2] == size:
-                return font[0]
-        return Fonts.add(font_name, size)
+    def key(font: _pygame.font.Font) -> (str or None, int) or None:
+        """The (name, size) font was loaded with by get(), or None for fonts made elsewhere"""
+        return Fonts._keys.get(font)
+
+    @staticmethod
+    def default(size: int = 20) -> _pygame.font.Font:
+        return Fonts.get(None, size)
+
+    @staticmethod
+    def preload(*fonts: (str or None, int)):
+        """
+        Declares fonts, and loads one of them per EventHandler.update(), so startup doesn't wait for all of them.
+        Fonts asked for meanwhile are loaded then, and only once. Without EventHandler, they're loaded right away.
+        """
+        pending = [(font_name, size) for font_name, size in fonts]
+        Fonts._declared.update(pending)
+
+        if not hasattr(_EventHandler, "scheduler"):
+            for font_name, size in pending:
+                Fonts.get(font_name, size)
+
+        elif pending:
+            _EventHandler.scheduler.call_later(0, Fonts._load_next, _deque(pending))
+
+    @staticmethod
+    def _load_next(pending: _deque):
+        Fonts.get(*pending.popleft())
+
+        if pending:
+            _EventHandler.scheduler.call_later(0, Fonts._load_next, pending)
+
+    @staticmethod
+    def _evict():
+        excess = Fonts._loaded.__len__() - Fonts.capacity
+
+        for key in list(Fonts._loaded):
+            if excess <= 0:
+                break
+
+            if key not in Fonts._declared:
+                font = Fonts._loaded.pop(key)
+                Fonts.fonts.remove((font, key[0], key[1]))
+                excess -= 1
 
     @staticmethod
     def info(write: bool = True) -> _pygame.font:
@@ -85,8 +159,66 @@ class Fonts:
 # ----------------------------------------------------------------------------------------------------------------------
 
 
+class TextRasters:
+    """
+    Rendered text shared by all widgets, keyed by font, string, color and antialiasing. Fonts are keyed by their
+    (name, size) in Fonts, so rasters don't keep fonts Fonts dropped alive, and fonts not from Fonts aren't cached.
+    Fonts are shared too, so their bold, italic and underline styles are part of the key.
+    Once the rasters take more than byte_budget bytes, the least recently drawn ones are dropped. Returned surfaces
+    are shared: blit them, never draw on them.
+    """
+
+    byte_budget: int = 8 * 1024 * 1024  # Bytes of pixels
+    byte_count: int = 0
+    hits: int = 0
+    misses: int = 0
+
+    # ((name, size), (bold, italic, underline), text, color, antialias) -> Surface, least recently drawn first
+    _rasters: _OrderedDict = _OrderedDict()
+
+    @staticmethod
+    def render(font: _pygame.font.Font, text: str, color: [3], antialias: bool = True) -> _pygame.Surface:
+        font_key = Fonts.key(font)
+
+        if font_key is None:
+            TextRasters.misses += 1
+            return font.render(text, antialias, color)
+
+        key = (font_key, (font.get_bold(), font.get_italic(), font.get_underline()), text, tuple(color), antialias)
+        raster = TextRasters._rasters.get(key)
+
+        if raster is not None:
+            TextRasters._rasters.move_to_end(key)
+            TextRasters.hits += 1
+            return raster
+
+        TextRasters.misses += 1
+
+        raster = font.render(text, antialias, color)
+        TextRasters._rasters[key] = raster
+        TextRasters.byte_count += raster.get_pitch() * raster.get_height()
+
+        # The newest raster is kept, even alone over budget
+        while TextRasters.byte_count > TextRasters.byte_budget and TextRasters._rasters.__len__() > 1:
+            _, evicted = TextRasters._rasters.popitem(last=False)
+            TextRasters.byte_count -= evicted.get_pitch() * evicted.get_height()
+
+        return raster
+
+    @staticmethod
+    def clear():
+        TextRasters._rasters.clear()
+        TextRasters.byte_count = 0
+
+    @staticmethod
+    def info(write: bool = True):
+        return _info.get_info(TextRasters, write)
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
 # noinspection PyClassHasNoInit
-class UILabel(_ABC):
+class UILabel(_RenderNode, _ABC):
 
     @staticmethod
     def info(write: bool = True):
@@ -176,9 +308,8 @@ class UITabBar(UILabel, _info.InfoGetter):
         if kwargs.get("margin"):
             kwargs.pop("margin")
 
-        self.surface = _pygame.transform.scale(self.surface,
-                                               (self.surface.get_width(),
-                                                self.surface.get_height() + self.margin[2] + self.margin[3]))
+        self.surface = _Surfaces.resize(
+            self.surface, (self.surface.get_width(), self.surface.get_height() + self.margin[2] + self.margin[3]))
 
         items_size = items.__len__()
         item_length = (self.surface.get_width() - self.margin[1] - self.margin[0]) / items_size
@@ -189,13 +320,13 @@ class UITabBar(UILabel, _info.InfoGetter):
             button.text = items[i].name
             button.command = items[i].command
             button.command_parameters = items[i].command_parameters
-            button.size[1] = self.margin[3]
-            button.size[3] = self.surface.get_height() - self.margin[2] - self.margin[3]
-            button.size[0] = (item_length * i) + self.margin[0]
-            button.size[2] = item_length
+            button.size = ((item_length * i) + self.margin[0], self.margin[3],
+                           item_length, self.surface.get_height() - self.margin[2] - self.margin[3])
             button.color = None
             self._items.append(button)
 
+        self.adopt(*self._items)
+
     def __del__(self):
         print("Cleaning UITabBar: " + self.__str__())
         del self._items
@@ -215,14 +346,13 @@ class UITabBar(UILabel, _info.InfoGetter):
     def update_dimensions(self, dimensions: [2]):
         dimensions[0] = dimensions[0] if dimensions[0] is not None else self.surface.get_width()
         dimensions[1] = dimensions[1] if dimensions[1] is not None else self.surface.get_height()
-        self.surface = _pygame.transform.scale(self.surface, (dimensions[0], dimensions[1]))
+        self.surface = _Surfaces.resize(self.surface, (dimensions[0], dimensions[1]))
+        self.invalidate()
         items_size = self._items.__len__()
         item_length = (self.surface.get_width() - self.margin[1]) / items_size
         for i in range(0, items_size):
-            self._items[i].size[1] = self.margin[3]
-            self._items[i].size[3] = self.surface.get_height() - self.margin[2] - self.margin[3]
-            self._items[i].size[0] = (item_length * i) + self.margin[0]
-            self._items[i].size[2] = item_length
+            self._items[i].size = ((item_length * i) + self.margin[0], self.margin[3],
+                                   item_length, self.surface.get_height() - self.margin[2] - self.margin[3])
 
 
 # TODO: clear the variable lists, to make the code more readable. Fix an error.
@@ -231,7 +361,6 @@ class UIButton(UILabel, _info.InfoGetter):
     size: [4]  # (x, y, width, height)
     color: [3]
     highlight_color: [3]
-    _active_color: [3]
     _command: object
     command_parameters: list or dict
     click_type: Click
@@ -240,9 +369,99 @@ class UIButton(UILabel, _info.InfoGetter):
     text: str
     text_color: [3]
     text_highlight_color: [3]
-    _active_text_color: [3]
     font: _pygame.font
     _updated: int
+    _hovered: bool
+
+    @property
+    def size(self) -> [4]:
+        return self._size
+
+    @size.setter
+    def size(self, rectangle: [4]):
+        self._size = list(rectangle)
+        self._synchronize()
+
+    @property
+    def position(self) -> (int, int):
+        return self._size[0], self._size[1]
+
+    @position.setter
+    def position(self, p: (int, int)):
+        self._size[0], self._size[1] = p
+        self._synchronize()
+
+    @property
+    def color(self) -> [3] or None:
+        return self._color
+
+    @color.setter
+    def color(self, c: [3] or None):
+        if c == self._color:
+            return
+
+        self._color = c
+        self._changed()
+
+    @property
+    def highlight_color(self) -> [3] or None:
+        return self._highlight_color
+
+    @highlight_color.setter
+    def highlight_color(self, c: [3] or None):
+        if c == self._highlight_color:
+            return
+
+        self._highlight_color = c
+        self._changed()
+
+    @property
+    def text(self) -> str or None:
+        return self._text
+
+    @text.setter
+    def text(self, string: str or None):
+        if string == self._text:
+            return
+
+        self._text = string
+        self._changed()
+
+    @property
+    def text_color(self) -> [3]:
+        return self._text_color
+
+    @text_color.setter
+    def text_color(self, c: [3]):
+        if c == self._text_color:
+            return
+
+        self._text_color = c
+        self._changed()
+
+    @property
+    def text_highlight_color(self) -> [3] or None:
+        return self._text_highlight_color
+
+    @text_highlight_color.setter
+    def text_highlight_color(self, c: [3] or None):
+        if c == self._text_highlight_color:
+            return
+
+        self._text_highlight_color = c
+        self._changed()
+
+    @property
+    def font(self) -> _pygame.font.Font:
+        return self._font
+
+    @font.setter
+    def font(self, f: _pygame.font.Font):
+        if f is self._font:
+            return
+
+        self._font = f
+        self._changed()
 
     @property
     def command(self):
@@ -250,12 +469,7 @@ class UIButton(UILabel, _info.InfoGetter):
 
     @command.setter
     def command(self, cmd):
-        if cmd is None:
-            self._command = None
-            self._remove_callbacks()
-        else:
-            self._command = _weak(cmd)
-            self._add_callbacks()
+        self._command = _weak(cmd) if cmd is not None else None
 
     @property  # Perhaps rename to 'trigger', 'trigger_button', or 'trigger_type'.
     def click_type(self):
@@ -263,10 +477,7 @@ class UIButton(UILabel, _info.InfoGetter):
 
     @click_type.setter
     def click_type(self, click: Click):
-
-        self._remove_callbacks()
         self._click_type = click
-        self._add_callbacks()
 
     @property
     def operative(self):
@@ -276,34 +487,53 @@ class UIButton(UILabel, _info.InfoGetter):
     def operative(self, boolean: bool):
         try:
             if boolean and not self._operative:
-                _EventHandler.callbacks.add.mouse_motion(self._mouse_motion)
-                self._add_callbacks()
+                _EventHandler.hit_test.add(
+                    self,
+                    self._screen_rectangle(),
+                    mouse_enter=self._mouse_enter,
+                    mouse_leave=self._mouse_leave,
+                    mouse_button_down=self._mouse_button_down,
+                    mouse_button_up=self._mouse_button_up,
+                    mouse_press=self._mouse_press)
 
             if not boolean and self._operative:
-                _EventHandler.callbacks.remove.mouse_motion(self._mouse_motion)
-                self._remove_callbacks()
+                _EventHandler.hit_test.remove(self)
 
         except ValueError:
             pass
 
         self._operative = boolean
 
+    @property
+    def _active_color(self) -> [3]:
+        return self.highlight_color if self._hovered and self.highlight_color is not None else self.color
+
+    @property
+    def _active_text_color(self) -> [3]:
+        if self._hovered and self.text_highlight_color is not None:
+            return self.text_highlight_color
+
+        return self.text_color
+
     def __init__(self, **kwargs):
-        self.size = [0, 0, 90, 50]
-        self.color = [235, 235, 235]
-        self.highlight_color = [160, 160, 160]
-        self._active_color = self.color
+        self._size = [0, 0, 90, 50]
+        self._color = [235, 235, 235]
+        self._highlight_color = [160, 160, 160]
         self._command = None
         self.command_parameters: list = list()
         self.click_button: MouseButton = MouseButton.left
         self._click_type = Click.click
-        self.text: str or None = None
-        self.text_color = [25, 25, 25]
-        self.text_highlight_color = [100, 100, 100]
-        self._active_text_color = self.text_color
-        self.font = _pygame.font.Font(_pygame.font.get_default_font(), 20)
+        self._text: str or None = None
+        self._text_color = [25, 25, 25]
+        self._text_highlight_color = [100, 100, 100]
+        self._font = Fonts.default()
 
         self._operative = True
+        self._hovered = False
+
+        self._x_offset: int = 0
+        self._y_offset: int = 0
+        self._rectangle = None  # Last synchronized screen rectangle
 
         for key, value in kwargs.items():
             if key.startswith("_"):
@@ -315,20 +545,13 @@ class UIButton(UILabel, _info.InfoGetter):
             else:
                 raise AttributeError("Invalid keyword: {}".format(key))
 
-        self._x_offset: int = 0
-        self._y_offset: int = 0
+        self._rectangle = self._screen_rectangle()
 
+        # Registering with the hit-test index also evaluates hover for the current pointer position
         b = self._operative
         self._operative = False
         self.operative = b
 
-        # This doesn't solve the problem, because the button's parameters haven't been externally set yet.
-        # Might need a new callback, that runs on the first loop, and then removes itself.
-        self._mouse_motion(_pygame.event.Event(4, {
-            "pos": _pygame.mouse.get_pos(),
-            "rel": (0, 0),
-            "buttons": _pygame.mouse.get_pressed()}))
-
     def __del__(self):
         print("Cleaning UIButton: " + self.__str__())
 
@@ -337,45 +560,45 @@ class UIButton(UILabel, _info.InfoGetter):
     # ------------------------------------------------------------------------------------------------------------------
 
     def render(self, surface: _pygame.Surface):
+        self._dirty = False
+
         _pygame.draw.rect(surface, self._active_color, self.size) if self._active_color is not None else None
 
         if self.text is not None:
-            text = self.font.render(self.text, True, self._active_text_color)
-            x = self.size[0] + (self.size[2] / 2) - self.font.size(str(self.text))[0] / 2
-            y = self.size[1] + (self.size[3] / 2) - self.font.size(str(self.text))[1] / 2
-            surface.blit(text, (x, y))
+            raster = TextRasters.render(self.font, self.text, self._active_text_color)
 
-    # ------------------------------------------------------------------------------------------------------------------
-    # TODO: rename these, keeping them private.
+            x = self.size[0] + (self.size[2] / 2) - raster.get_width() / 2
+            y = self.size[1] + (self.size[3] / 2) - raster.get_height() / 2
+            surface.blit(raster, (x, y))
 
-    def _remove_callbacks(self):
-        try:
-            if self._click_type == Click.click:
-                _EventHandler.callbacks.remove.mouse_button_down(self._mouse_button_down)
+    # ------------------------------------------------------------------------------------------------------------------
 
-            elif self._click_type == Click.release:
-                _EventHandler.callbacks.remove.mouse_button_up(self._mouse_button_up)
+    def _screen_rectangle(self) -> (int, int, int, int):
+        return self.size[0] + self._x_offset, self.size[1] + self._y_offset, self.size[2], self.size[3]
 
-            elif self._click_type == Click.press:
-                _EventHandler.callbacks.remove.mouse_press(self._mouse_press)
+    def _changed(self):
+        """Property setters: the button looks different, where it is"""
+        self.invalidate()
+        _DirtyRegions.add(self._screen_rectangle())
 
-        except ValueError:
-            pass
+    def _synchronize(self):
+        """Moves the hit-test region along with the button, and reports both places as changed"""
+        rectangle = self._screen_rectangle()
 
-    def _add_callbacks(self):
-        if self._operative and self._command is not None and self.click_button != MouseButton.none:
-            try:
-                if self._click_type == Click.click:
-                    _EventHandler.callbacks.add.mouse_button_down(self._mouse_button_down)
+        if rectangle == self._rectangle:
+            return
 
-                elif self._click_type == Click.release:
-                    _EventHandler.callbacks.add.mouse_button_up(self._mouse_button_up)
+        self.invalidate()
+        _DirtyRegions.add(self._rectangle)
+        _DirtyRegions.add(rectangle)
+        self._rectangle = rectangle
 
-                elif self._click_type == Click.press:
-                    _EventHandler.callbacks.add.mouse_press(self._mouse_press)
+        if self._operative:
+            try:
+                _EventHandler.hit_test.move(self, rectangle)
 
             except ValueError:
-                pass
+                pass  # Not registered yet, while keywords are applied in __init__
 
     # ------------------------------------------------------------------------------------------------------------------
 
@@ -386,37 +609,32 @@ class UIButton(UILabel, _info.InfoGetter):
         """
 
     # ------------------------------------------------------------------------------------------------------------------
+    # Only called by the hit-test index, while the pointer is over the button
 
     def _mouse_press(self, event):
-        if within_rectangle(event.pos[0] - self._x_offset, event.pos[1] - self._y_offset, self.size):
+        if self._click_type == Click.press and self._command is not None:
             if self.click_button.value in event.buttons:
                 self._command()(*self.command_parameters)
 
     def _mouse_button_up(self, event):
-
-        if within_rectangle(event.pos[0] - self._x_offset, event.pos[1] - self._y_offset, self.size):
+        if self._click_type == Click.release and self._command is not None:
             if event.button == self.click_button.value:
                 self._command()(*self.command_parameters)
 
     def _mouse_button_down(self, event):
-
-        if within_rectangle(event.pos[0] - self._x_offset, event.pos[1] - self._y_offset, self.size):
+        if self._click_type == Click.click and self._command is not None:
             if event.button == self.click_button.value:
                 self._command()(*self.command_parameters)
 
-    def _mouse_motion(self, event):
-
-        if within_rectangle(event.pos[0] - self._x_offset, event.pos[1] - self._y_offset, self.size):
-
-            if self.highlight_color is not None:
-                self._active_color = self.highlight_color
+    def _mouse_enter(self, _):
+        self._hovered = True
+        self.invalidate()
+        _DirtyRegions.add(self._screen_rectangle())
 
-            if self.text_highlight_color is not None:
-                self._active_text_color = self.text_highlight_color
-
-        else:
-            self._active_color = self.color
-            self._active_text_color = self.text_color
+    def _mouse_leave(self, _):
+        self._hovered = False
+        self.invalidate()
+        _DirtyRegions.add(self._screen_rectangle())
 
     # ------------------------------------------------------------------------------------------------------------------
 
@@ -425,14 +643,23 @@ class UIButton(UILabel, _info.InfoGetter):
         self._x_offset = x
         self._y_offset = y
 
+        self._synchronize()
+
     # ------------------------------------------------------------------------------------------------------------------
 
     def move(self, x: int, y: int):
         self.size[0] += x
         self.size[1] += y
 
+        self._synchronize()
+
 
 class UIText(UILabel, _info.InfoGetter):
+    """
+    Properties only mark the text stale, and only when their value changes. It's measured and rasterized once, on the
+    next render(), however many properties changed in between. batch_update() sets several at once.
+    """
+
     _position: [2]
     _text: str
     _text_color: [3]
@@ -444,39 +671,43 @@ class UIText(UILabel, _info.InfoGetter):
     _x: int
     _y: int
 
-    _rendered_text: _pygame.font
+    _rendered_text: _pygame.Surface or None  # None while stale
+    _drawn: (int, int, int, int) or None  # Rectangle last drawn to, in the target surface's coordinates
 
     # ------------------------------------------------------------------------------------------------------------------
 
-    def _set_x(self):
+    def _stale(self):
+        self._rendered_text = None
+        self.invalidate()
+
+    def _layout(self):
+        self._rendered_text = TextRasters.render(self._font, str(self._text), self._text_color)
+        width, height = self._rendered_text.get_size()
+
         if self._horizontal_alignment == Orientation.Center:
-            self._x = self._position[0] - self._font.size(str(self._text))[0] / 2
+            self._x = self._position[0] - width / 2
 
         elif self._horizontal_alignment == Orientation.Right:
             self._x = self._position[0]
 
         elif self._horizontal_alignment == Orientation.Left:
-            self._x = self._position[0] - self._font.size(str(self._text))[0]
+            self._x = self._position[0] - width
 
         else:
             raise ValueError("Horizontal orientation out of bounds")
 
-    def _set_y(self):
         if self._vertical_alignment == Orientation.Center:
-            self._y = self._position[1] - self._font.size(str(self._text))[1] / 2
+            self._y = self._position[1] - height / 2
 
         elif self._vertical_alignment == Orientation.Below:
             self._y = self._position[1]
 
         elif self._vertical_alignment == Orientation.Over:
-            self._y = self._position[1] - self._font.size(str(self._text))[1]
+            self._y = self._position[1] - height
 
         else:
             raise ValueError("Vertical orientation out of bounds")
 
-    def _set_text(self):
-        self._rendered_text = self.font.render(self.text, True, self.text_color)
-
     # ------------------------------------------------------------------------------------------------------------------
 
     @property
@@ -485,8 +716,11 @@ class UIText(UILabel, _info.InfoGetter):
 
     @horizontal_alignment.setter
     def horizontal_alignment(self, orientation: Orientation):
+        if orientation == self._horizontal_alignment:
+            return
+
         self._horizontal_alignment = orientation
-        self._set_x()
+        self._stale()
 
     @property
     def vertical_alignment(self):
@@ -494,8 +728,11 @@ class UIText(UILabel, _info.InfoGetter):
 
     @vertical_alignment.setter
     def vertical_alignment(self, orientation: Orientation):
+        if orientation == self._vertical_alignment:
+            return
+
         self._vertical_alignment = orientation
-        self._set_x()
+        self._stale()
 
     @property
     def position(self):
@@ -503,9 +740,11 @@ class UIText(UILabel, _info.InfoGetter):
 
     @position.setter
     def position(self, p: (int, int)):
+        if tuple(p) == tuple(self._position):
+            return
+
         self._position = p
-        self._set_x()
-        self._set_y()
+        self._stale()
 
     @property
     def text(self):
@@ -513,10 +752,11 @@ class UIText(UILabel, _info.InfoGetter):
 
     @text.setter
     def text(self, string: str):
+        if string == self._text:
+            return
+
         self._text = string
-        self._set_x()
-        self._set_y()
-        self._set_text()
+        self._stale()
 
     @property
     def text_color(self):
@@ -524,8 +764,11 @@ class UIText(UILabel, _info.InfoGetter):
 
     @text_color.setter
     def text_color(self, color: [int, int, int]):
+        if tuple(color) == tuple(self._text_color):
+            return
+
         self._text_color = color
-        self._set_text()
+        self._stale()
 
     @property
     def font(self):
@@ -533,10 +776,11 @@ class UIText(UILabel, _info.InfoGetter):
 
     @font.setter
     def font(self, f: _pygame.font.Font):
+        if f is self._font:
+            return
+
         self._font = f
-        self._set_x()
-        self._set_y()
-        self._set_text()
+        self._stale()
 
     # ------------------------------------------------------------------------------------------------------------------
 
@@ -544,71 +788,651 @@ class UIText(UILabel, _info.InfoGetter):
         self._position = (0, 0)
         self._text = "UIText"
         self._text_color = [255, 255, 255]
-        self._font = _pygame.font.Font(_pygame.font.get_default_font(), 20)
+        self._font = Fonts.default()
 
         self._horizontal_alignment: Orientation = Orientation.Center
         self._vertical_alignment: Orientation = Orientation.Center
 
+        self._x = None
+        self._y = None
+
         self._rendered_text = None
+        self._drawn = None
 
-        for key, value in kwargs.items():
-            if hasattr(self, key):
-                setattr(self, key, value)
-            else:
-                raise AttributeError("Invalid keyword: {}".format(key))
+        self.batch_update(**kwargs)
 
-        self._set_x()
-        self._set_y()
+    def batch_update(self, **properties):
+        """Sets several properties, after checking all of them. The text is laid out once, on the next render()"""
+        for key, value in properties.items():
+            if key.startswith("_") or not hasattr(self, key):
+                raise AttributeError("Invalid keyword: {}".format(key))
 
-        self._set_text()
+        for key, value in properties.items():
+            setattr(self, key, value)
 
     def render(self, surface: _pygame.Surface):
+        self._dirty = False
+
+        if self._rendered_text is None:
+            self._layout()
+
+            # Where the text was, and where it is now, changed on screen
+            drawn = (int(self._x), int(self._y)) + self._rendered_text.get_size()
+
+            if drawn != self._drawn:
+                _DirtyRegions.add_on(surface, self._drawn)
+
+            _DirtyRegions.add_on(surface, drawn)
+            self._drawn = drawn
+
         surface.blit(self._rendered_text, (self._x, self._y))
 
 
-# Not usable. DON'T USE!
-class UIInteractiveText(UILabel, _info.InfoGetter):
+class _Paragraph:
+    """Line breaks and line rasters of one paragraph of a UITextBlock"""
+
+    __slots__ = ("text", "lines", "rasters", "low", "high", "widest")
+
+    text: str
+    lines: [str]
+    rasters: [_pygame.Surface or None]  # Per line, rasterized when first drawn
+    low: int  # The breaks hold for widths from low, up to but not including high
+    high: int or float
+    widest: int  # Width of the longest line. Above the block's width if a word overflows
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lines = []
+        self.rasters = []
+        self.low = 0
+        self.high = 0  # Holds for no width, until wrapped
+        self.widest = 0
+
+    def holds(self, width: int) -> bool:
+        return self.low <= width < self.high
+
+
+class UITextBlock(UILabel, _info.InfoGetter):
+    """
+    Text word-wrapped to width, below and to the right of position. Line feeds start paragraphs. Each paragraph keeps
+    its line breaks, the range of widths they hold for, and its line rasters, so editing the text only re-wraps the
+    paragraphs that changed, and changing width only those whose breaks move. Like UIText, properties only mark the
+    layout stale, and it's updated on the next render(). Words wider than width overflow their own line.
+    """
+
     _position: [2]
+    _width: int
     _text: str
     _text_color: [3]
     _font: _pygame.font
+    _alignment: Orientation  # Left, Center or Right, within width
+
+    _paragraphs: [_Paragraph]
+    _stale: bool  # The line breaks need updating
+    _repaint: bool  # Changed since the last render()
+    _drawn: (int, int, int, int) or None  # Rectangle last drawn to, in the target surface's coordinates
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def _changed(self):
+        self._repaint = True
+        self.invalidate()
+
+    def _bounds(self) -> (int, int, int, int):
+        """The rectangle the lines cover, words overflowing width included"""
+        widest = max((paragraph.widest for paragraph in self._paragraphs), default=0)
+        overflow = max(widest - self._width, 0)
+
+        if self._alignment == Orientation.Left:
+            left = self._position[0]
+
+        elif self._alignment == Orientation.Center:
+            left = self._position[0] - overflow / 2
+
+        else:
+            left = self._position[0] - overflow
+
+        right = left + self._width + overflow
+        top = self._position[1]
+        bottom = top + sum(paragraph.lines.__len__() for paragraph in self._paragraphs) * self._font.get_linesize()
+
+        return _floor(left), _floor(top), _ceil(right) - _floor(left), _ceil(bottom) - _floor(top)
+
+    def _layout(self):
+        previous = {}
+
+        for paragraph in reversed(self._paragraphs):
+            previous.setdefault(paragraph.text, []).append(paragraph)
+
+        self._paragraphs = []
+
+        for text in self._text.split("\n"):
+            reusable = previous.get(text)
+            paragraph = reusable.pop() if reusable else _Paragraph(text)
+
+            if not paragraph.holds(self._width):
+                self._wrap(paragraph)
+
+            self._paragraphs.append(paragraph)
+
+        self._stale = False
+
+    def _wrap(self, paragraph: _Paragraph):
+        """Breaks greedily, and notes the widths the breaks hold for: lines of several words fit from low, and the
+        word after each break doesn't fit below high"""
+        words = paragraph.text.split(" ")
+        lines = []
+        low = 0
+        high = float("inf")
+
+        line = words[0]
+        line_width = 0  # Of lines of several words
+        several = False
+        widest = 0
+
+        for word in words[1:]:
+            candidate = line + " " + word
+            width = self._font.size(candidate)[0]
+
+            if width <= self._width:
+                line = candidate
+                line_width = width
+                several = True
+                continue
+
+            high = min(high, width)
+            low = max(low, line_width) if several else low
+            widest = max(widest, line_width if several else self._font.size(line)[0])
+
+            lines.append(line)
+            line = word
+            several = False
+
+        low = max(low, line_width) if several else low
+        widest = max(widest, line_width if several else self._font.size(line)[0])
+        lines.append(line)
+
+        paragraph.lines = lines
+        paragraph.rasters = [None] * lines.__len__()
+        paragraph.low = low
+        paragraph.high = high
+        paragraph.widest = widest
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, p: (int, int)):
+        if tuple(p) == tuple(self._position):
+            return
+
+        self._position = p
+        self._changed()
+
+    @property
+    def width(self):
+        return self._width
+
+    @width.setter
+    def width(self, w: int):
+        if w == self._width:
+            return
+
+        self._width = w
+        self._stale = True
+        self._changed()
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, string: str):
+        if string == self._text:
+            return
+
+        self._text = string
+        self._stale = True
+        self._changed()
+
+    @property
+    def text_color(self):
+        return self._text_color
+
+    @text_color.setter
+    def text_color(self, color: [int, int, int]):
+        if tuple(color) == tuple(self._text_color):
+            return
+
+        self._text_color = color
+
+        for paragraph in self._paragraphs:
+            paragraph.rasters = [None] * paragraph.lines.__len__()
+
+        self._changed()
+
+    @property
+    def font(self):
+        return self._font
+
+    @font.setter
+    def font(self, f: _pygame.font.Font):
+        if f is self._font:
+            return
+
+        self._font = f
+        self._paragraphs = []
+        self._stale = True
+        self._changed()
+
+    @property
+    def alignment(self):
+        return self._alignment
+
+    @alignment.setter
+    def alignment(self, orientation: Orientation):
+        if orientation not in (Orientation.Left, Orientation.Center, Orientation.Right):
+            raise ValueError("Alignment out of bounds")
+
+        if orientation == self._alignment:
+            return
+
+        self._alignment = orientation
+        self._changed()
+
+    @property
+    def height(self) -> int:
+        if self._stale:
+            self._layout()
+
+        return sum(paragraph.lines.__len__() for paragraph in self._paragraphs) * self._font.get_linesize()
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def __init__(self, **kwargs):
+        self._position = (0, 0)
+        self._width = 300
+        self._text = "UITextBlock"
+        self._text_color = [255, 255, 255]
+        self._font = Fonts.default()
+        self._alignment = Orientation.Left
+
+        self._paragraphs = []
+        self._stale = True
+        self._repaint = True
+        self._drawn = None
+
+        self.batch_update(**kwargs)
+
+    def batch_update(self, **properties):
+        """Sets several properties, after checking all of them. The text is laid out once, on the next render()"""
+        for key, value in properties.items():
+            if key.startswith("_") or not hasattr(self, key):
+                raise AttributeError("Invalid keyword: {}".format(key))
+
+        for key, value in properties.items():
+            setattr(self, key, value)
+
+    def render(self, surface: _pygame.Surface):
+        self._dirty = False
+
+        if self._stale:
+            self._layout()
+
+        if self._repaint:
+            # Where the block was, and where it is now, changed on screen
+            drawn = self._bounds()
+
+            if drawn != self._drawn:
+                _DirtyRegions.add_on(surface, self._drawn)
+
+            _DirtyRegions.add_on(surface, drawn)
+            self._drawn = drawn
+            self._repaint = False
+
+        line_height = self._font.get_linesize()
+        clip = surface.get_clip()
+        x, y = self._position
+
+        # Only lines within the clip are rasterized and drawn
+        for paragraph in self._paragraphs:
+            if y >= clip.bottom:
+                break
+
+            bottom = y + paragraph.lines.__len__() * line_height
+
+            if bottom <= clip.top:
+                y = bottom
+                continue
+
+            for i in range(paragraph.lines.__len__()):
+                if clip.top < y + line_height and y < clip.bottom:
+                    raster = paragraph.rasters[i]
+
+                    if raster is None:
+                        raster = paragraph.rasters[i] = \
+                            TextRasters.render(self._font, paragraph.lines[i], self._text_color)
+
+                    if self._alignment == Orientation.Left:
+                        surface.blit(raster, (x, y))
+
+                    elif self._alignment == Orientation.Center:
+                        surface.blit(raster, (x + (self._width - raster.get_width()) / 2, y))
+
+                    else:
+                        surface.blit(raster, (x + self._width - raster.get_width(), y))
+
+                y += line_height
+
+
+class _PrefixSums:
+    """Fenwick tree: sums of the first n values, updating a value, and finding where the sums pass x, in O(log n)"""
+
+    __slots__ = ("_tree",)
+
+    def __init__(self, values: [int]):
+        tree = [0] + list(values)
+
+        for i in range(1, tree.__len__()):
+            parent = i + (i & -i)
+
+            if parent < tree.__len__():
+                tree[parent] += tree[i]
+
+        self._tree = tree
+
+    def add(self, index: int, delta: int):
+        i = index + 1
+
+        while i < self._tree.__len__():
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count: int) -> int:
+        """Sum of the first count values"""
+        total = 0
+
+        while count > 0:
+            total += self._tree[count]
+            count -= count & -count
+
+        return total
+
+    def search(self, x: float) -> int:
+        """The largest count whose prefix() doesn't exceed x. Values must not be negative"""
+        count = 0
+        step = 1 << (self._tree.__len__() - 1).bit_length()
+
+        while step:
+            if count + step < self._tree.__len__() and self._tree[count + step] <= x:
+                count += step
+                x -= self._tree[count]
+
+            step >>= 1
+
+        return count
+
+
+class TextBuffer:
+    """
+    Editable text in a gap buffer: edits at the gap move no characters, and moving the gap moves only the characters
+    in between, so typing is cheap however long the text is. Each character's advance is kept along with it, in a
+    Fenwick tree laid out like the buffer, so a caret's x, and the caret at an x, are found in O(log n). Advances are
+    measured a word at a time, kerning included, so they add up to the width of the word as drawn. Words longer than
+    CHUNK are measured in chunks of it, leaving out the kerning between chunks. An edit measures only the words it
+    touched.
+    """
+
+    CHUNK = 32  # Most characters measured together. A word costs O(length * CHUNK) to measure
+
+    _characters: [str or None]  # With the gap, of None, in the middle
+    _advances: [int]  # Per character, laid out like _characters. 0 in the gap
+    _sums: _PrefixSums  # Of _advances
+    _gap_start: int
+    _gap_end: int
+
+    _font: _pygame.font.Font
+    _string: str or None
+
+    def __init__(self, font: _pygame.font.Font, text: str = ""):
+        self._font = font
+        self._characters = [None] * 64
+        self._advances = [0] * 64
+        self._sums = _PrefixSums(self._advances)
+        self._gap_start = 0
+        self._gap_end = 64
+
+        self._string = None
+
+        self.insert(0, text)
+
+    def __len__(self) -> int:
+        return self._characters.__len__() - (self._gap_end - self._gap_start)
+
+    def __str__(self) -> str:
+        if self._string is None:
+            self._string = "".join(self._characters[:self._gap_start]) + "".join(self._characters[self._gap_end:])
+
+        return self._string
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    @property
+    def font(self) -> _pygame.font.Font:
+        return self._font
+
+    @font.setter
+    def font(self, f: _pygame.font.Font):
+        self._font = f
+        self._measure(0, self.__len__())
+
+    @property
+    def width(self) -> int:
+        return self._sums.prefix(self._characters.__len__())
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def insert(self, index: int, text: str):
+        if not text:
+            return
+
+        self._move_gap(index)
+
+        if self._gap_end - self._gap_start < text.__len__():
+            grow = max(text.__len__(), self.__len__(), 64)
+            self._characters[self._gap_end:self._gap_end] = [None] * grow
+            self._advances[self._gap_end:self._gap_end] = [0] * grow
+            self._sums = _PrefixSums(self._advances)
+            self._gap_end += grow
+
+        end = self._gap_start + text.__len__()
+        self._characters[self._gap_start:end] = text
+        self._gap_start = end
+
+        self._string = None
+        self._measure(index, end)
+
+    def delete(self, start: int, end: int):
+        if start >= end:
+            return
+
+        self._move_gap(start)
+
+        for position in range(self._gap_end, self._gap_end + end - start):
+            self._characters[position] = None
+            self._set(position, 0)
+
+        self._gap_end += end - start
+
+        self._string = None
+        self._measure(start, start)  # The rest of the word, which may have joined the next
+
+    def offset(self, index: int) -> int:
+        """The x of the caret before character index"""
+        return self._sums.prefix(index if index <= self._gap_start else index + self._gap_end - self._gap_start)
+
+    def index_at(self, x: float) -> int:
+        """The caret nearest to x, counted from the text's left edge"""
+        position = self._sums.search(x)
+
+        if position <= self._gap_start:
+            index = position
+
+        else:
+            index = max(position - (self._gap_end - self._gap_start), self._gap_start)
+
+        if index < self.__len__() and self.offset(index + 1) - x < x - self.offset(index):
+            return index + 1
+
+        return index
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def _slot(self, index: int) -> int:
+        """Where character index is kept"""
+        return index if index < self._gap_start else index + self._gap_end - self._gap_start
+
+    def _set(self, position: int, advance: int):
+        delta = advance - self._advances[position]
+
+        if delta:
+            self._advances[position] = advance
+            self._sums.add(position, delta)
+
+    def _measure(self, start: int, end: int):
+        """
+        Measures the characters from start up to the end of the word at end again. Words are split by spaces, and
+        into chunks of CHUNK characters from their start. A character's advance is the difference between the widths
+        of its chunk's prefixes ending before and at it, so advances before start, within the word, don't change
+        """
+        length = self.__len__()
+        word_start = start
+
+        while word_start > 0 and self._characters[self._slot(word_start - 1)] != " ":
+            word_start -= 1
+
+        while end < length and self._characters[self._slot(end)] != " ":
+            end += 1
+
+        space = self._font.size(" ")[0]
+        chunk_start = start - (start - word_start) % TextBuffer.CHUNK
+        chunk = "".join(self._characters[self._slot(index)] for index in range(chunk_start, start))
+        left = self._font.size(chunk)[0] if chunk else 0
+
+        for index in range(start, end):
+            character = self._characters[self._slot(index)]
+
+            if character == " ":
+                self._set(self._slot(index), space)
+                chunk = ""
+                left = 0
+                continue
+
+            if chunk.__len__() == TextBuffer.CHUNK:
+                chunk = ""
+                left = 0
+
+            chunk += character
+            right = self._font.size(chunk)[0]
+            self._set(self._slot(index), max(right - left, 0))
+            left = right
+
+    def _move_gap(self, index: int):
+        if index < self._gap_start:
+            moved = self._gap_start - index
+            destination = self._gap_end - moved
+
+        elif index > self._gap_start:
+            moved = index - self._gap_start
+            destination = self._gap_start
+
+        else:
+            return
+
+        source = index if index < self._gap_start else self._gap_end
+        characters = self._characters[source:source + moved]
+        advances = self._advances[source:source + moved]
+
+        for offset in range(moved):
+            self._set(source + offset, 0)
+
+        self._characters[destination:destination + moved] = characters
+
+        for offset, advance in enumerate(advances):
+            self._set(destination + offset, advance)
+
+        if index < self._gap_start:
+            self._gap_start -= moved
+            self._gap_end -= moved
+
+        else:
+            self._gap_start += moved
+            self._gap_end += moved
+
+
+class UIInteractiveText(UILabel, _info.InfoGetter):
+    """
+    A line of editable text, with a cursor and a selection. The text lives in a TextBuffer, so typing doesn't rebuild
+    the string, and carets are placed without measuring it. It's drawn a word at a time through TextRasters, so an
+    edit rasterizes only the words it changed.
+    """
+
+    _position: [2]
+    _buffer: TextBuffer
+    _text_color: [3]
 
     _horizontal_alignment: Orientation
     _vertical_alignment: Orientation
 
-    _x: int
-    _y: int
+    _cursor: int
+    _anchor: int or None  # The selection runs from here to the cursor
+
+    cursor_blink: float  # Seconds the cursor stays shown, then hidden, while active
+    selection_color: [3]
+
+    _target: _pygame.Surface or None  # Last rendered to
+    _drawn: (int, int, int, int) or None  # Rectangle last drawn to, on _target
+    _caret: (int, int, int, int) or None  # Rectangle of the cursor, on _target
 
     # ------------------------------------------------------------------------------------------------------------------
 
-    def _set_x(self):
+    def _changed(self):
+        self._moved = True
+        self.invalidate()
+
+    def _origin(self) -> (float, float):
+        """The text's top left corner"""
+        width = self._buffer.width
+        height = self._buffer.font.get_height()
+
         if self._horizontal_alignment == Orientation.Center:
-            self._x = self._position[0] - self._font.size(str(self._text))[0] / 2
+            x = self._position[0] - width / 2
 
         elif self._horizontal_alignment == Orientation.Right:
-            self._x = self._position[0]
+            x = self._position[0]
 
         elif self._horizontal_alignment == Orientation.Left:
-            self._x = self._position[0] - self._font.size(str(self._text))[0]
+            x = self._position[0] - width
 
         else:
             raise ValueError("Horizontal orientation out of bounds")
 
-    def _set_y(self):
         if self._vertical_alignment == Orientation.Center:
-            self._y = self._position[1] - self._font.size(str(self._text))[1] / 2
+            y = self._position[1] - height / 2
 
         elif self._vertical_alignment == Orientation.Below:
-            self._y = self._position[1]
+            y = self._position[1]
 
         elif self._vertical_alignment == Orientation.Over:
-            self._y = self._position[1] - self._font.size(str(self._text))[1]
+            y = self._position[1] - height
 
         else:
             raise ValueError("Vertical orientation out of bounds")
 
-    def _set_text(self):
-        self._rendered_text = self.font.render(self.text, True, self.text_color)
+        return x, y
 
     # ------------------------------------------------------------------------------------------------------------------
 
@@ -619,7 +1443,7 @@ class UIInteractiveText(UILabel, _info.InfoGetter):
     @horizontal_alignment.setter
     def horizontal_alignment(self, orientation: Orientation):
         self._horizontal_alignment = orientation
-        self._set_x()
+        self._changed()
 
     @property
     def vertical_alignment(self):
@@ -628,7 +1452,7 @@ class UIInteractiveText(UILabel, _info.InfoGetter):
     @vertical_alignment.setter
     def vertical_alignment(self, orientation: Orientation):
         self._vertical_alignment = orientation
-        self._set_x()
+        self._changed()
 
     @property
     def position(self):
@@ -637,20 +1461,19 @@ class UIInteractiveText(UILabel, _info.InfoGetter):
     @position.setter
     def position(self, p: (int, int)):
         self._position = p
-        self._set_x()
-        self._set_y()
+        self._changed()
 
     @property
-    def text(self):
-        return self._text
+    def text(self) -> str:
+        return self._buffer.__str__()
 
     @text.setter
     def text(self, string: str):
-        self._text = string
-        self._set_x()
-        self._set_y()
-        self._set_text()
-        self._at_text = self._text.__len__()
+        self._buffer.delete(0, self._buffer.__len__())
+        self._buffer.insert(0, string)
+        self._cursor = self._buffer.__len__()
+        self._anchor = None
+        self._changed()
 
     @property
     def text_color(self):
@@ -659,18 +1482,46 @@ class UIInteractiveText(UILabel, _info.InfoGetter):
     @text_color.setter
     def text_color(self, color: [int, int, int]):
         self._text_color = color
-        self._set_text()
+        self._changed()
 
     @property
     def font(self):
-        return self._font
+        return self._buffer.font
 
     @font.setter
     def font(self, f: _pygame.font.Font):
-        self._font = f
-        self._set_x()
-        self._set_y()
-        self._set_text()
+        self._buffer.font = f
+        self._changed()
+
+    @property
+    def cursor(self) -> int:
+        """Index of the character after the caret. Setting it clears the selection"""
+        return self._cursor
+
+    @cursor.setter
+    def cursor(self, index: int):
+        self._cursor = _maximum(self._buffer.__len__(), _minimum(0, index))
+        self._anchor = None
+        self._show_cursor()
+
+    @property
+    def selection(self) -> (int, int) or None:
+        """(start, end) of the selected characters, or None"""
+        if self._anchor is None or self._anchor == self._cursor:
+            return None
+
+        return min(self._anchor, self._cursor), max(self._anchor, self._cursor)
+
+    def select(self, start: int, end: int):
+        """Selects from start to end. The cursor ends up at end"""
+        length = self._buffer.__len__()
+        self._anchor = _maximum(length, _minimum(0, start))
+        self._cursor = _maximum(length, _minimum(0, end))
+        self._show_cursor()
+
+    def index_at(self, x: float) -> int:
+        """The caret nearest to x, on the surface the text is rendered to. For placing the cursor at a click"""
+        return self._buffer.index_at(x - self._origin()[0])
 
     @property  # sets/returns if text operates at all. Disconnect everything if false, including mouse/click callbacks.
     def operative(self):
@@ -694,55 +1545,53 @@ class UIInteractiveText(UILabel, _info.InfoGetter):
         try:
             if boolean and not self._active:
                 _EventHandler.callbacks.add.keydown(self._keydown)
-                _EventHandler.callbacks.add.keyup(self._keyup)
-                _EventHandler.callbacks.add.update(self.update)
-
-                self._pressed_keys: {int: [str, float, int]} = {}
+                _EventHandler.callbacks.add.key_repeat(self._key_repeat)
 
             else:
                 _EventHandler.callbacks.remove.keydown(self._keydown)
-                _EventHandler.callbacks.remove.keyup(self._keyup)
-                _EventHandler.callbacks.remove.update(self.update)
-
-                self._pressed_keys = None
+                _EventHandler.callbacks.remove.key_repeat(self._key_repeat)
 
         except ValueError:
             pass
 
         self._active = boolean
+        self._show_cursor()
 
     # ------------------------------------------------------------------------------------------------------------------
 
     def __init__(self, **kwargs):
         self._position = (0, 0)
-        self._text = "UIText"
+        self._buffer = TextBuffer(Fonts.default(), "UIText")
         self._text_color = [255, 255, 255]
-        self._font = _pygame.font.Font(_pygame.font.get_default_font(), 20)
 
         self._horizontal_alignment: Orientation = Orientation.Center
         self._vertical_alignment: Orientation = Orientation.Center
 
-        self._rendered_text = None
+        self._cursor = self._buffer.__len__()
+        self._anchor = None
+
+        self.cursor_blink = 0.5
+        self.selection_color = [160, 190, 230]
 
         self._operative = True
         self._active = False
 
+        self._cursor_visible = False
+        self._cursor_timer = None
+
+        self._moved = True  # Changed since the last render(), in more than the cursor blinking
+        self._target = None
+        self._drawn = None
+        self._caret = None
+
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
             else:
                 raise AttributeError("Invalid keyword: {}".format(key))
 
-        self._set_x()
-        self._set_y()
-
-        self._set_text()
-
         # Behaviour setup
 
-        self._pressed_keys = None
-        self._at_text = self._text.__len__()
-
         if _EventHandler.initialized:
             self.operative = self._operative
 
@@ -757,60 +1606,127 @@ class UIInteractiveText(UILabel, _info.InfoGetter):
 
     # ------------------------------------------------------------------------------------------------------------------
 
+    def _show_cursor(self):
+        """Shows the cursor while active, and restarts its blinking, so it stays put while typing"""
+        if self._cursor_timer is not None:
+            self._cursor_timer.cancel()
+            self._cursor_timer = None
+
+        visible = self._active
+
+        if visible:
+            self._cursor_timer = _EventHandler.scheduler.call_every(self.cursor_blink, self._blink_cursor)
+
+        self._cursor_visible = visible
+        self._changed()
+
+    def _blink_cursor(self):
+        self._cursor_visible = not self._cursor_visible
+        self.invalidate()
+
+        if self._caret is not None:
+            _DirtyRegions.add_on(self._target, self._caret)
+
     def _keydown(self, event: _pygame.event.Event):
-        self._pressed_keys[event.key] = [event.unicode, _time.time(), 0]
+        self._type(event)
 
-    def _keyup(self, event: _pygame.event.Event):
-        try:
-            self._pressed_keys.pop(event.key)
+    def _key_repeat(self, event: _pygame.event.Event):
+        self._type(event)
 
-        except KeyError:
-            if self._pressed_keys[event.key]:
-                raise KeyError(_traceback.format_exc())
+    def _type(self, event: _pygame.event.Event):
+        if event.mod & _pygame.KMOD_META:
+            return  # Shortcuts aren't text
 
-            # A key was released after construction, while pressed before construction.
+        selection = self.selection
+        extend = event.mod & _pygame.KMOD_SHIFT
 
-    def update(self):
-        if 310 in self._pressed_keys:
-            return
+        if event.key in (_pygame.K_BACKSPACE, _pygame.K_DELETE):
+            if selection is not None:
+                self._replace(selection, "")
+
+            elif event.key == _pygame.K_BACKSPACE and self._cursor > 0:
+                self._replace((self._cursor - 1, self._cursor), "")
 
-        for code, data in self._pressed_keys.items():
+            elif event.key == _pygame.K_DELETE and self._cursor < self._buffer.__len__():
+                self._replace((self._cursor, self._cursor + 1), "")
 
-            # print(str(code) + ": '" + str(data[0]) + "'")
+        elif event.key in (_pygame.K_LEFT, _pygame.K_RIGHT, _pygame.K_HOME, _pygame.K_END):
+            if event.key == _pygame.K_HOME:
+                cursor = 0
 
-            if _time.time() - data[1] > 0.4 or data[2] == 0:
-                data[2] += 1
-                print()
+            elif event.key == _pygame.K_END:
+                cursor = self._buffer.__len__()
 
-                if code == 8:
-                    if self._at_text != 0:
-                        self._text = self._text[:self._at_text - 1] + self._text[self._at_text:]
-                        self._set_x()
-                        self._set_y()
-                        self._set_text()
+            elif selection is not None and not extend:
+                cursor = selection[0] if event.key == _pygame.K_LEFT else selection[1]  # Collapses the selection
 
-                    self._at_text = _minimum(0, self._at_text - 1)
+            else:
+                cursor = self._cursor + (1 if event.key == _pygame.K_RIGHT else -1)
 
-                elif data[0] == "":
-                    continue
+            if extend:
+                self.select(self._cursor if self._anchor is None else self._anchor, cursor)
 
-                elif code == 276:
-                    self._at_text = _minimum(0, self._at_text - 1)
-                    print("1:   ", self._at_text)
+            else:
+                self.cursor = cursor
 
-                elif code == 275:
-                    self._at_text = _maximum(self._text.__len__() + 1, self._at_text + 1)
-                    print("2:   ", self._at_text)
+        elif event.unicode != "" and event.unicode.isprintable():
+            self._replace(selection or (self._cursor, self._cursor), event.unicode)
 
-                else:
-                    self._text += data[0]
-                    self._set_x()
-                    self._set_y()
-                    self._set_text()
-                    self._at_text = _maximum(self._text.__len__() + 1, self._at_text + 1)
+    def _replace(self, span: (int, int), text: str):
+        self._buffer.delete(*span)
+        self._buffer.insert(span[0], text)
+        self.cursor = span[0] + text.__len__()
 
     def render(self, surface: _pygame.Surface):
-        surface.blit(self._rendered_text, (self._x, self._y))
+        self._dirty = False
+
+        buffer = self._buffer
+        x, y = self._origin()
+        height = buffer.font.get_height()
+
+        # Where the text was, and where it is now, changed on screen. The extra pixel is the cursor at the end
+        drawn = (int(x), int(y), buffer.width + 1, height)
+
+        if self._moved or surface is not self._target:
+            if drawn != self._drawn and self._target is surface:
+                _DirtyRegions.add_on(surface, self._drawn)
+
+            _DirtyRegions.add_on(surface, drawn)
+
+        self._moved = False
+        self._target = surface
+        self._drawn = drawn
+
+        selection = self.selection
+
+        if selection is not None:
+            start, end = selection
+            left = buffer.offset(start)
+            _pygame.draw.rect(surface, self.selection_color, (x + left, y, buffer.offset(end) - left, height))
+
+        # A word at a time, so rasters of the words an edit didn't touch are reused. Words outside the clip are skipped
+        left, right = surface.get_clip().left - x, surface.get_clip().right - x
+        index = 0
+
+        for word in buffer.__str__().split(" "):
+            end = index + word.__len__()
+
+            if word:
+                start = buffer.offset(index)
+
+                if start >= right:
+                    break
+
+                if buffer.offset(end) > left:
+                    surface.blit(TextRasters.render(buffer.font, word, self._text_color), (x + start, y))
+
+            index = end + 1
+
+        caret = int(x + buffer.offset(self._cursor))
+        self._caret = (caret, int(y), 1, height)
+
+        if self._cursor_visible:
+            _pygame.draw.line(surface, self._text_color, (caret, int(y)), (caret, int(y) + height - 1))
 
 
 class UIInteractiveTextBlock(UILabel, _info.InfoGetter):
@@ -905,6 +1821,8 @@ class UIImage(UILabel, _info.InfoGetter):  # TODO: add possibility to move image
     # ------------------------------------------------------------------------------------------------------------------
 
     def render(self, surface: _pygame.Surface):
+        self._dirty = False
+
         if self.visible:
 
             if self._loaded_image is None:
@@ -913,10 +1831,9 @@ class UIImage(UILabel, _info.InfoGetter):  # TODO: add possibility to move image
                     return
 
                 _pygame.draw.rect(surface, (200, 200, 200), self.size)
-                font = _pygame.font.Font(_pygame.font.get_default_font(), 20)
-                text = font.render("UIImage", True, (0, 0, 0))
-                x = self.size[0] + (self.size[2] / 2) - font.size(str("UIImage"))[0] / 2
-                y = self.size[1] + (self.size[3] / 2) - font.size(str("UIImage"))[1] / 2
+                text = TextRasters.render(Fonts.default(), "UIImage", (0, 0, 0))
+                x = self.size[0] + (self.size[2] / 2) - text.get_width() / 2
+                y = self.size[1] + (self.size[3] / 2) - text.get_height() / 2
                 surface.blit(text, (x, y))
 
             else:
@@ -995,6 +1912,8 @@ class UIImage(UILabel, _info.InfoGetter):  # TODO: add possibility to move image
         # noinspection PyArgumentList
         self._image = self._image.convert()
 
+        self.invalidate()
+
     # ------------------------------------------------------------------------------------------------------------------
 
     def set_current_size(self):
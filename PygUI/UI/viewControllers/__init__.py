@@ -6,6 +6,9 @@ from abc import ABC, abstractmethod
 
 import pygame as _pygame
 
+from PygUI.controller import DirtyRegions as _DirtyRegions
+from PygUI.controller import RenderNode as _RenderNode
+from PygUI.controller import Surfaces as _Surfaces
 from PygUI.event import EventHandler as _EventHandler
 from PygUI.UI.accesories import Orientation as _Orientation
 from PygUI.UI.accesories import UITabBar as _UITabBar
@@ -16,12 +19,14 @@ from PygUI.maths import *  # TODO: change this
 import PygUI.info as _info
 
 
-class UIViewController(_info.InfoGetter, ABC):
+class UIViewController(_RenderNode, _info.InfoGetter, ABC):
 
     surface: _pygame.Surface
+    subsurfaces: bool  # Children render into subsurfaces of self.surface, cut by child_surface(), instead of copies
 
-    def __init__(self, surface: _pygame.Surface):
+    def __init__(self, surface: _pygame.Surface, subsurfaces: bool = False):
         self.surface = surface
+        self.subsurfaces = subsurfaces
 
         self.connect()
 
@@ -77,16 +82,35 @@ class UIViewController(_info.InfoGetter, ABC):
     def instantiate_view_controller(self, view_controller: object):  # TODO: find a way to have view_controller be self
         pass
 
+    def child_surface(self, rectangle: [4]) -> _pygame.Surface:
+        """
+        A surface for a child to render into, covering rectangle of self.surface. With subsurfaces, it's a subsurface
+        of self.surface, clipped to it, so the child draws in place and compose() has nothing to copy. Cut it again
+        once self.surface is replaced
+        """
+        rectangle = _pygame.Rect(rectangle[0], rectangle[1], minimum(0, rectangle[2]), minimum(0, rectangle[3]))
+
+        if self.subsurfaces:
+            return self.surface.subsurface(rectangle.clip(self.surface.get_rect()))
+
+        return _pygame.Surface(rectangle.size)
+
+    def compose(self, surface: _pygame.Surface, position: (int, int)):
+        """Copies a child's surface into self.surface at position, unless the child already rendered into it"""
+        if surface.get_parent() is not self.surface:
+            self.surface.blit(surface, position)
+
     def update_dimensions(self, dimensions: [2]):
         dimensions[0] = minimum(0, dimensions[0] if dimensions[0] is not None else self.surface.get_width())
         dimensions[1] = minimum(0, dimensions[1] if dimensions[1] is not None else self.surface.get_height())
-        self.surface = _pygame.transform.scale(self.surface, dimensions)
+        self.surface = _Surfaces.resize(self.surface, dimensions)
+        self.invalidate()
 
     # ------------------------------------------------------------------------------------------------------------------
 
     @abstractmethod
     def render(self):
-        """Call from program loop to render ViewController"""
+        """Call from program loop to render ViewController, or call refresh() to only render it when invalidated"""
         pass
 
     @abstractmethod
@@ -109,7 +133,7 @@ class UITabBarViewController(UIViewController, _info.InfoGetter):
     _view_controller_surface: _pygame.Surface
 
     def __init__(self, surface: _pygame.Surface, tab_bar_items: list, **tab_bar_kwargs):
-        super().__init__(surface)
+        super().__init__(surface, tab_bar_kwargs.pop("subsurfaces", False))
         tb_height = 80
 
         for key, value in tab_bar_kwargs.items():
@@ -118,7 +142,9 @@ class UITabBarViewController(UIViewController, _info.InfoGetter):
                 tab_bar_kwargs.pop(key)
                 break
 
-        self._view_controller_surface = _pygame.Surface((surface.get_width(), surface.get_height() - tb_height))
+        self._view_controller_surface = self.child_surface(
+            (0, tb_height, surface.get_width(), surface.get_height() - tb_height))
+        tab_bar_surface = self.child_surface((0, 0, surface.get_width(), tb_height))
 
         self._view_controllers = list()
 
@@ -130,8 +156,9 @@ class UITabBarViewController(UIViewController, _info.InfoGetter):
             tab_bar_items[i].command_parameters.append(i)
             tab_bar_items[i].command = self.instantiate_view_controller
 
-        self._tab_bar = _UITabBar(_pygame.Surface((surface.get_width(), tb_height)), tab_bar_items, **tab_bar_kwargs)
+        self._tab_bar = _UITabBar(tab_bar_surface, tab_bar_items, **tab_bar_kwargs)
         self._view_controller = None
+        self.adopt(self._tab_bar)
         self.instantiate_view_controller(0)
 
     def __del__(self):
@@ -144,10 +171,11 @@ class UITabBarViewController(UIViewController, _info.InfoGetter):
     # ------------------------------------------------------------------------------------------------------------------
 
     def render(self):
-        self._view_controller.render()
-        self._tab_bar.render()
-        self.surface.blit(self._tab_bar.surface, (0, 0))
-        self.surface.blit(self._view_controller.surface, (0, self._tab_bar.surface.get_height()))
+        self._view_controller.refresh()
+        self._tab_bar.refresh()
+
+        self.compose(self._tab_bar.surface, (0, 0))
+        self.compose(self._view_controller.surface, (0, self._tab_bar.surface.get_height()))
 
     def update(self, x, y, delta: float):
         self._tab_bar.update(x, y)
@@ -169,9 +197,14 @@ class UITabBarViewController(UIViewController, _info.InfoGetter):
         except TypeError:
             self._view_controller = view_controller
 
+        self.adopt(self._view_controller)
         self._view_controller.on_navigated()
         self._view_controller.did_navigate()
 
+        # View controllers share one surface, so a kept view controller must render again
+        self._view_controller.invalidate()
+        _DirtyRegions.add_all()
+
     # ------------------------------------------------------------------------------------------------------------------
 
     def did_resize(self, event):
@@ -180,10 +213,21 @@ class UITabBarViewController(UIViewController, _info.InfoGetter):
     def update_dimensions(self, dimensions: [2]):
         dimensions[0] = dimensions[0] if dimensions[0] is not None else self.surface.get_width()
         dimensions[1] = dimensions[1] if dimensions[1] is not None else self.surface.get_height()
-        self.surface = _pygame.transform.scale(self.surface, dimensions)
+        self.surface = _Surfaces.resize(self.surface, dimensions)
+        self.invalidate()
+
+        if self.subsurfaces:
+            # The subsurfaces belong to the replaced surface, so they're cut again from the new one
+            height = self._tab_bar.surface.get_height()
+            width = self.surface.get_width()
+
+            self._tab_bar.surface = self.child_surface((0, 0, width, height))
+            self._view_controller_surface = self.child_surface((0, height, width, self.surface.get_height() - height))
+            self._view_controller.surface = self._view_controller_surface
+
         self._tab_bar.update_dimensions([dimensions[0], None])
 
-        self._view_controller_surface = _pygame.transform.scale(
+        self._view_controller_surface = _Surfaces.resize(
             self._view_controller_surface,
             (dimensions[0], minimum(0, dimensions[1] - self._tab_bar.surface.get_height())))
 
@@ -260,7 +304,7 @@ class UIScrollViewController(UIViewController, _info.InfoGetter, ABC):
         self._vertical_scroller_drag = False
         self._vertical_scroller_mouse_position = 0
         self._vertical_scroller_visible = False
-        self._vertical_scroller_visibility_timeout = 0
+        self._vertical_scroller_timer = None  # Keeps the scroller visible while active
 
         # Horizontal scroller
         self._horizontal_scroller_size = [0, 0, 0, 0]
@@ -270,7 +314,7 @@ class UIScrollViewController(UIViewController, _info.InfoGetter, ABC):
         self._horizontal_scroller_drag = False
         self._horizontal_scroller_mouse_position = 0
         self._horizontal_scroller_visible = False
-        self._horizontal_scroller_visibility_timeout = 0
+        self._horizontal_scroller_timer = None  # Keeps the scroller visible while active
 
         # new:
 
@@ -281,11 +325,18 @@ class UIScrollViewController(UIViewController, _info.InfoGetter, ABC):
 
         self.length = 0
 
+        self._appearance = None  # Drawn state last reported to DirtyRegions
+
         # Callback setup
         try:
             _EventHandler.callbacks.add.window_resize(self.resize)
 
-            _EventHandler.callbacks.add.mouse_motion(self._mouse_motion)
+            _EventHandler.hit_test.add(
+                self,
+                (0, 0, surface.get_width(), surface.get_height()),
+                mouse_motion=self._mouse_motion,
+                mouse_leave=self._mouse_leave)
+
             _EventHandler.callbacks.add.mouse_press(self._mouse_press)
             _EventHandler.callbacks.add.mouse_button_down(self._mouse_button_down)
             _EventHandler.callbacks.add.mouse_button_up(self._mouse_button_up)
@@ -309,11 +360,12 @@ class UIScrollViewController(UIViewController, _info.InfoGetter, ABC):
         try:
             _EventHandler.callbacks.remove.window_resize(self.resize)
 
-            _EventHandler.callbacks.remove.mouse_motion(self._mouse_motion)
             _EventHandler.callbacks.remove.mouse_press(self._mouse_press)
             _EventHandler.callbacks.remove.mouse_button_down(self._mouse_button_down)
             _EventHandler.callbacks.remove.mouse_button_up(self._mouse_button_up)
 
+            _EventHandler.hit_test.remove(self)
+
         except ValueError:
             pass  # As in every other deinit, this fails if the program quits. TODO: find out why.
 
@@ -462,10 +514,10 @@ class UIScrollViewController(UIViewController, _info.InfoGetter, ABC):
 
             if self.direction == _Orientation.Vertical:
                 self.y = min(self.y + move, 0)
-                self._vertical_scroller_visibility_timeout = self.scroller_timeout
+                self._vertical_scroller_timer = self._reveal_scroller(self._vertical_scroller_timer)
             else:
                 self.x = min(self.x + move, 0)
-                self._horizontal_scroller_visibility_timeout = self.scroller_timeout
+                self._horizontal_scroller_timer = self._reveal_scroller(self._horizontal_scroller_timer)
 
         elif event.button == 5:
             # Drag up
@@ -473,13 +525,31 @@ class UIScrollViewController(UIViewController, _info.InfoGetter, ABC):
 
             if self.direction == _Orientation.Vertical:
                 self.y = max(self.y - move, 0 - self.scroll_surface.get_height() + self.surface.get_height())
-                self._vertical_scroller_visibility_timeout = self.scroller_timeout
+                self._vertical_scroller_timer = self._reveal_scroller(self._vertical_scroller_timer)
             else:
                 self.x = max(self.x - move, 0 - self.scroll_surface.get_width() + self.surface.get_width())
-                self._horizontal_scroller_visibility_timeout = self.scroller_timeout
+                self._horizontal_scroller_timer = self._reveal_scroller(self._horizontal_scroller_timer)
 
         self._evaluate_scroller()
 
+    def _reveal_scroller(self, timer):
+        """Restarts a scroller's timeout. Once it runs out, the woken loop's update() hides the scroller"""
+        if timer is not None:
+            timer.cancel()
+
+        return _EventHandler.scheduler.call_later(self.scroller_timeout / 1000, self.invalidate)
+
+    def _mouse_leave(self, _):
+        self._vertical_scroller_within = False
+        self._horizontal_scroller_within = False
+
+        if not self._vertical_scroller_drag:
+            self._vertical_scroller_active_color = self.scroller_color
+
+        if not self._horizontal_scroller_drag:
+            self._horizontal_scroller_active_color = self.scroller_color
+
+    # Only called by the hit-test index, while the pointer is over the view controller
     def _mouse_motion(self, event):
 
         x = event.pos[0] - self._x_offset
@@ -520,21 +590,37 @@ class UIScrollViewController(UIViewController, _info.InfoGetter, ABC):
         self._x_offset = x
         self._y_offset = y
 
+        try:
+            _EventHandler.hit_test.move(self, (x, y, self.surface.get_width(), self.surface.get_height()))
+
+        except ValueError:
+            pass  # EventHandler wasn't set up.
+
         self._delta = delta
 
-        self._vertical_scroller_visibility_timeout = max(self._vertical_scroller_visibility_timeout - delta, 0)
-        self._horizontal_scroller_visibility_timeout = max(self._horizontal_scroller_visibility_timeout - delta, 0)
+        timer = self._vertical_scroller_timer
 
-        self._vertical_scroller_visible  = self._vertical_scroller_visibility_timeout > 0
+        self._vertical_scroller_visible  = timer is not None and timer.active
         self._vertical_scroller_visible |= self._vertical_scroller_within
         self._vertical_scroller_visible |= self._vertical_scroller_drag
         self._vertical_scroller_visible &= self.surface.get_height() < self.scroll_surface.get_height()
 
-        self._horizontal_scroller_visible  = self._horizontal_scroller_visibility_timeout > 0
+        self._horizontal_scroller_visible  = self._horizontal_scroller_timer is not None and \
+                                             self._horizontal_scroller_timer.active
         self._horizontal_scroller_visible |= self._horizontal_scroller_within
         self._horizontal_scroller_visible |= self._horizontal_scroller_drag
         self._horizontal_scroller_visible &= self.surface.get_width() < self.scroll_surface.get_width()
 
+        # Scrolling and scroller changes redraw the whole view
+        appearance = (self.x, self.y,
+                      self._vertical_scroller_visible, tuple(self._vertical_scroller_active_color),
+                      self._horizontal_scroller_visible, tuple(self._horizontal_scroller_active_color))
+
+        if appearance != self._appearance:
+            self._appearance = appearance
+            self.invalidate()
+            _DirtyRegions.add((x, y, self.surface.get_width(), self.surface.get_height()))
+
 # ----------------------------------------------------------------------------------------------------------------------
 # ----------------------------------------------------------------------------------------------------------------------
 # ----------------------------------------------------------------------------------------------------------------------
@@ -559,6 +645,7 @@ class UIScrollMenuViewController(UIScrollViewController, _info.InfoGetter):
         self.scroll_surface = _pygame.Surface((self.width, self.surface.get_height() + 1000))
 
         self.test_button = UIButton()
+        self.adopt(self.title, self.test_button)
 
         for key, value in kwargs.items():
             if hasattr(self, key):
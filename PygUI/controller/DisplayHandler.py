@@ -1,6 +1,14 @@
+import atexit as _atexit
+import hashlib as _hashlib
+import os as _os
+import queue as _queue
+import threading as _threading
+import time as _time
+
 import pygame as _pygame
 from pygame.locals import *
 
+from PygUI.controller import DirtyRegions as _DirtyRegions
 from PygUI.event import EventHandler as _EventHandler
 from PygUI.utilities import minimum as _minimum
 
@@ -15,6 +23,26 @@ class DisplayHandler:
 
     title: str
 
+    coverage_threshold: float  # Share of the display above which dirty rectangles are presented by a full flip
+
+    headless: bool  # Renders without a window, on SDL's dummy video driver. Set before set_display()
+
+    # Called as capture(frame, buffer) for every frame that presents something. buffer is a zero-copy
+    # pygame.BufferProxy of the display's pixels, and buffer.parent the display. It keeps the display locked, so
+    # consumers must be done with it when they return. frame counts update() calls, including ones presenting nothing.
+    capture: object or None
+    frame: int
+
+    @property
+    def dirty_rectangles(self) -> bool:
+        """Present only the rectangles reported to DirtyRegions, instead of flipping the whole display"""
+        return _DirtyRegions.enabled
+
+    @dirty_rectangles.setter
+    def dirty_rectangles(self, boolean: bool):
+        _DirtyRegions.enabled = boolean
+        _DirtyRegions.add_all()
+
     def __init__(self, **kwargs):
         self._monitor = _pygame.display.Info()
 
@@ -27,6 +55,12 @@ class DisplayHandler:
         self.display = None
         self.title = None
         self.flags = RESIZABLE | HWSURFACE | HWACCEL | DOUBLEBUF
+        self.coverage_threshold = 0.6
+
+        # Lets a whole app run in CI, and write its frames, from the command line
+        self.headless = bool(_os.environ.get("PYGUI_HEADLESS"))
+        self.capture = FrameWriter(_os.environ["PYGUI_CAPTURE"]) if _os.environ.get("PYGUI_CAPTURE") else None
+        self.frame = 0
 
         for key, value in kwargs.items():
             if hasattr(self, key):
@@ -61,12 +95,19 @@ class DisplayHandler:
         self.display.convert()
         self.display.set_alpha(None)
 
+        _DirtyRegions.add_all()
+
     # ------------------------------------------------------------------------------------------------------------------
 
     def set_display(self, title: str, width: int = None, height: int = None):
         if self.display is not None:
             self.close_display()
 
+        if self.headless and _os.environ.get("SDL_VIDEODRIVER") not in ("dummy", "offscreen"):
+            # The driver is picked when the video system starts, so it's started again
+            _os.environ["SDL_VIDEODRIVER"] = "dummy"
+            _pygame.display.quit()
+
         _pygame.display.init()
 
         self.title = title if title is not None else self.title if self.title is not None else ""
@@ -80,6 +121,8 @@ class DisplayHandler:
         self.display.convert()
         self.display.set_alpha(None)
 
+        _DirtyRegions.add_all()
+
         _EventHandler.callbacks.add.window_resize(self.resize)
 
     def close_display(self):
@@ -88,4 +131,116 @@ class DisplayHandler:
         _EventHandler.callbacks.remove.window_resize(self.resize)
 
     def update(self):
-        _pygame.display.flip()
+        self.frame += 1
+
+        if self._present() and self.capture is not None:
+            self.capture(self.frame, self.display.get_buffer())
+
+    def _present(self) -> bool:
+        rectangles = _DirtyRegions.take()
+
+        if not self.dirty_rectangles or rectangles is None:
+            _pygame.display.flip()
+            return True
+
+        if not rectangles:
+            return False  # Nothing changed
+
+        rectangles = _DirtyRegions.merge(rectangles, self.display.get_rect())
+        coverage = sum(rectangle.width * rectangle.height for rectangle in rectangles)
+
+        if coverage > self.coverage_threshold * self.width * self.height:
+            _pygame.display.flip()
+
+        else:
+            _pygame.display.update(rectangles)
+
+        return True
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class FrameHasher:
+    """DisplayHandler.capture consumer hashing every frame, for comparing runs against golden values"""
+
+    hashes: [(int, str)]  # (frame, hex digest)
+
+    def __init__(self, algorithm: str = "sha1"):
+        self.algorithm = algorithm
+        self.hashes = []
+
+    def __call__(self, frame: int, buffer: _pygame.BufferProxy):
+        self.hashes.append((frame, _hashlib.new(self.algorithm, buffer).hexdigest()))
+
+
+class FrameWriter:
+    """
+    DisplayHandler.capture consumer saving every frame as an image in directory. The loop thread only copies the
+    pixels, encoding happens on a background thread. Once backlog frames wait to be encoded, the loop waits too.
+
+    The copy can't be avoided: the buffer is only valid until the call returns, and the display is drawn over by the
+    next frame. It's one memcpy of the display, timed in copy_time.
+    """
+
+    frames: int  # Frames captured so far
+    copy_time: int  # Nanoseconds the loop thread spent copying them
+
+    def __init__(self, directory: str, name: str = "frame{:06}.png", backlog: int = 64):
+        _os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.name = name
+
+        self.frames = 0
+        self.copy_time = 0
+
+        self._frames = _queue.Queue(backlog)
+        self._thread = _threading.Thread(target=self._write, name="FrameWriter", daemon=True)
+        self._thread.start()
+
+        _atexit.register(self.close)
+
+    def __call__(self, frame: int, buffer: _pygame.BufferProxy):
+        start = _time.perf_counter_ns()
+        pixels = buffer.raw
+        self.copy_time += _time.perf_counter_ns() - start
+        self.frames += 1
+
+        surface = buffer.parent
+        self._frames.put((frame, pixels, surface.get_pitch(), surface.get_size(), surface.get_bitsize(),
+                          surface.get_bytesize(), surface.get_masks()))
+
+    def close(self):
+        """Waits for the frames captured so far to be written"""
+        if self._thread is not None:
+            self._frames.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _write(self):
+        while True:
+            item = self._frames.get()
+
+            if item is None:
+                return
+
+            frame, pixels, pitch, size, bitsize, bytesize, masks = item
+
+            surface = _pygame.Surface(size, 0, bitsize, masks)
+            target = surface.get_buffer()
+
+            if surface.get_pitch() == pitch:
+                target.write(pixels)
+
+            else:
+                # Rows of the display may be padded differently than rows of the copy
+                row = size[0] * bytesize
+
+                for y in range(size[1]):
+                    target.write(pixels[y * pitch:y * pitch + row], y * surface.get_pitch())
+
+            del target  # Unlocks the surface for saving
+
+            _pygame.image.save(surface, _os.path.join(self.directory, self.name.format(frame)))
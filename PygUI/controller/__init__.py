@@ -0,0 +1,185 @@
+import math as _math
+import time as _time
+import weakref as _weakref
+
+import pygame as _pygame
+
+
+class DirtyRegions:
+    """
+    Screen space rectangles changed since the last presentation. Widgets and view controllers report them,
+    DisplayHandler presents only them while DisplayHandler.dirty_rectangles is set.
+    """
+
+    enabled: bool = False
+
+    _rectangles: [_pygame.Rect] = []
+    _everything: bool = True
+
+    @staticmethod
+    def add(rectangle: [4]):
+        if DirtyRegions.enabled and not DirtyRegions._everything and rectangle is not None:
+            DirtyRegions._rectangles.append(_pygame.Rect(rectangle))
+
+    @staticmethod
+    def add_on(surface: _pygame.Surface, rectangle: [4]):
+        """
+        Adds rectangle, given in surface's coordinates. Only the display and its subsurfaces are known on screen, so
+        for other surfaces everything is added
+        """
+        if not DirtyRegions.enabled or DirtyRegions._everything or rectangle is None:
+            return
+
+        if surface.get_abs_parent() is not _pygame.display.get_surface():
+            DirtyRegions.add_all()
+            return
+
+        DirtyRegions._rectangles.append(_pygame.Rect(rectangle).move(surface.get_abs_offset()))
+
+    @staticmethod
+    def add_all():
+        """For changes that can't be located on screen"""
+        DirtyRegions._everything = True
+        DirtyRegions._rectangles = []
+
+    @staticmethod
+    def take() -> [_pygame.Rect] or None:
+        """Returns the rectangles reported since the last call, or None if everything changed"""
+        rectangles = None if DirtyRegions._everything else DirtyRegions._rectangles
+
+        DirtyRegions._rectangles = []
+        DirtyRegions._everything = False
+
+        return rectangles
+
+    @staticmethod
+    def merge(rectangles: [_pygame.Rect], bounds: _pygame.Rect) -> [_pygame.Rect]:
+        """Clips rectangles to bounds, and unites the overlapping ones"""
+        merged = []
+
+        for rectangle in rectangles:
+            rectangle = rectangle.clip(bounds)
+
+            if rectangle.width <= 0 or rectangle.height <= 0:
+                continue
+
+            # A union may overlap rectangles merged before it, so keep uniting until nothing overlaps
+            index = rectangle.collidelist(merged)
+
+            while index != -1:
+                rectangle.union_ip(merged.pop(index))
+                index = rectangle.collidelist(merged)
+
+            merged.append(rectangle)
+
+        return merged
+
+
+class RenderNode:
+    """
+    Node of the retained render tree. A node keeps what it rendered until it's invalidated, and invalidating a node
+    invalidates its ancestors. Parents re-render only when something below them changed, compositing their clean
+    children from what those already drew. When what was drawn is lost altogether, invalidate_subtree() has
+    everything below a node render again.
+    """
+
+    _parent: _weakref.ReferenceType = None
+    _children: _weakref.WeakSet = None
+    _dirty: bool = True
+
+    invalidated_at: float = 0.0  # perf_counter() of the last invalidate() of any node. Counts as activity for pacing
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def invalidate(self):
+        RenderNode.invalidated_at = _time.perf_counter()
+        node = self
+
+        while node is not None:
+            node._dirty = True
+            node = node._parent() if node._parent is not None else None
+
+    def invalidate_subtree(self):
+        """Invalidates this node, its ancestors, and every node below it"""
+        nodes = [self]
+
+        while nodes:
+            node = nodes.pop()
+            node._dirty = True
+
+            if node._children is not None:
+                nodes.extend(node._children)
+
+        self.invalidate()
+
+    def adopt(self, *children):
+        """Makes this node the parent of children. Children that are ancestors of this node are ignored"""
+        for child in children:
+            node = self
+
+            while node is not None and node is not child:
+                node = node._parent() if node._parent is not None else None
+
+            if node is None:
+                parent = child._parent() if child._parent is not None else None
+
+                if parent is not None and parent._children is not None:
+                    parent._children.discard(child)
+
+                if self._children is None:
+                    self._children = _weakref.WeakSet()
+
+                self._children.add(child)
+                child._parent = _weakref.ref(self)
+
+        self.invalidate()
+
+    def refresh(self, *arguments) -> bool:
+        """Renders the node if it was invalidated since its last refresh. Returns whether it rendered"""
+        if not self._dirty:
+            return False
+
+        self._dirty = False
+        # noinspection PyUnresolvedReferences
+        self.render(*arguments)
+
+        return True
+
+
+class Surfaces:
+    """
+    Reallocates surfaces on resize. Pixels are never resampled, as whatever owns a resized surface renders it again.
+    Surfaces are cut from larger backing surfaces, so growing within the backing, or shrinking, doesn't allocate.
+    """
+
+    headroom: float = 1.25  # Backing surfaces are allocated this much larger than asked for, in both dimensions
+
+    _backings: _weakref.WeakSet = _weakref.WeakSet()
+
+    @staticmethod
+    def resize(surface: _pygame.Surface, dimensions: [2]) -> _pygame.Surface:
+        """
+        Returns a surface of dimensions for surface's owner to render into. A subsurface of something other than a
+        backing surface is cut again from its parent, clipped to it, so it keeps rendering into the parent.
+        """
+        width, height = max(int(dimensions[0]), 0), max(int(dimensions[1]), 0)
+        parent = surface.get_parent()
+
+        if parent is not None and parent not in Surfaces._backings:
+            return parent.subsurface(_pygame.Rect(surface.get_offset(), (width, height)).clip(parent.get_rect()))
+
+        if surface.get_size() == (width, height):
+            return surface
+
+        if parent is not None and width <= parent.get_width() and height <= parent.get_height():
+            # Backings shrunk to under a quarter are given back
+            if width * height * 4 >= parent.get_width() * parent.get_height():
+                return parent.subsurface((0, 0, width, height))
+
+        backing = _pygame.Surface((_math.ceil(width * Surfaces.headroom), _math.ceil(height * Surfaces.headroom)),
+                                  surface.get_flags() & _pygame.SRCALPHA, surface)
+        Surfaces._backings.add(backing)
+
+        return backing.subsurface((0, 0, width, height))
@@ -1,8 +1,129 @@
+import atexit as _atexit
+import collections as _collections
+import heapq as _heapq
+import json as _json
+import marshal as _marshal
+import math as _math
+import os as _os
+import struct as _struct
+import time as _time
 import traceback as _traceback
+import types as _types
+import weakref as _weakref
 
 import pygame as _pygame
 
 from PygUI.utilities import weak as _weak
+from PygUI.maths import within_rectangle as _within_rectangle
+
+
+# Input event types EventHandler may block in SDL while nobody is subscribed to them. System and window events,
+# QUIT included, are always queued. So are mouse buttons, as EventHandler tracks them for mouse_press callbacks.
+_filterable: {int} = {getattr(_pygame, name) for name in (
+    "KEYDOWN", "KEYUP", "TEXTINPUT", "TEXTEDITING",
+    "MOUSEMOTION", "MOUSEWHEEL",
+    "JOYAXISMOTION", "JOYBALLMOTION", "JOYHATMOTION", "JOYBUTTONDOWN", "JOYBUTTONUP",
+    "CONTROLLERAXISMOTION", "CONTROLLERBUTTONDOWN", "CONTROLLERBUTTONUP",
+    "FINGERMOTION", "FINGERDOWN", "FINGERUP", "MULTIGESTURE",
+) if hasattr(_pygame, name)}
+
+
+# Emitted by KeyRepeat for held keys, with the attributes of the key's KEYDOWN
+KEYREPEAT: int = _pygame.event.custom_type()
+
+# Names of the event types that have EventHandler.Callback helpers, as reported by EventProfiler
+_kinds: {int: str} = {
+    _pygame.KEYDOWN: "keydown",
+    _pygame.KEYUP: "keyup",
+    _pygame.MOUSEBUTTONDOWN: "mouse_button_down",
+    _pygame.MOUSEBUTTONUP: "mouse_button_up",
+    _pygame.MOUSEMOTION: "mouse_motion",
+    _pygame.VIDEORESIZE: "window_resize",
+    KEYREPEAT: "key_repeat",
+}
+
+# Posted by other threads to end EventHandler.wait(). Never blocked, and nobody subscribes to it
+_WAKE: int = _pygame.event.custom_type()
+
+
+class _CallbackReference(_weakref.WeakMethod):
+    __slots__ = ("key", "registered")
+
+
+class _CallbackRegistry:
+    """
+    Insertion-ordered set of weakly referenced bound methods, with O(1) add and remove.
+    Entries are pruned by weakref callbacks when their owner is collected, not while dispatching.
+    Iterating is safe while callbacks add or remove entries: removed entries are skipped, added ones wait for the
+    next iteration. on_empty is called with the registry when its last entry is removed or pruned.
+    """
+
+    _references: {(int, object): _CallbackReference}
+    _snapshot: (_CallbackReference,) or None
+    _on_empty: object
+
+    def __init__(self, on_empty=None):
+        self._references = {}
+        self._snapshot = ()
+        self._on_empty = on_empty
+
+    def __len__(self) -> int:
+        return self._references.__len__()
+
+    def __iter__(self):
+        if self._snapshot is None:
+            self._snapshot = tuple(self._references.values())
+
+        for reference in self._snapshot:
+            if reference.registered:
+                callback = reference()
+
+                if callback is not None:
+                    yield callback
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    @staticmethod
+    def _key(callback) -> (int, object):
+        try:
+            return id(callback.__self__), callback.__func__
+
+        except AttributeError:
+            raise TypeError("argument should be a bound method, not {}".format(type(callback)))
+
+    def add(self, callback):
+        """Adding a registered callback again has no effect"""
+        key = self._key(callback)
+
+        if key in self._references:
+            return
+
+        reference = _CallbackReference(callback, self._prune)
+        reference.key = key
+        reference.registered = True
+
+        self._references[key] = reference
+        self._snapshot = None
+
+    def remove(self, callback):
+        reference = self._references.pop(self._key(callback), None)
+
+        if reference is None:
+            raise ValueError("Callback not registered: {}".format(callback))
+
+        self._release(reference)
+
+    def _prune(self, reference: _CallbackReference):
+        if self._references.get(reference.key) is reference:
+            del self._references[reference.key]
+            self._release(reference)
+
+    def _release(self, reference: _CallbackReference):
+        reference.registered = False
+        self._snapshot = None
+
+        if not self._references and self._on_empty is not None:
+            self._on_empty(self)
 
 
 class EventHandler:
@@ -12,134 +133,258 @@ class EventHandler:
         class _Add:
             @staticmethod
             def early_update(callback):
-                EventHandler.callbacks.early_update.append(_weak(callback))
+                EventHandler.callbacks.early_update.add(callback)
 
             @staticmethod
             def update(callback):
-                EventHandler.callbacks.update.append(_weak(callback))
+                EventHandler.callbacks.update.add(callback)
 
             @staticmethod
             def any(callback):
-                EventHandler.callbacks.any.append(_weak(callback))
+                EventHandler.callbacks.any.add(callback)
+
+                if EventHandler.callbacks.any.__len__() == 1:
+                    EventHandler._filter()
+
+            @staticmethod
+            def event(event_type: int, callback):
+                """Subscribes to any pygame event type, e.g. pygame.JOYBUTTONDOWN, pygame.TEXTINPUT or a USEREVENT"""
+                callbacks = EventHandler.callbacks.events.get(event_type)
+
+                if callbacks is None:
+                    callbacks = _CallbackRegistry(
+                        lambda registry: EventHandler.Callback._unsubscribed(event_type, registry))
+                    callbacks.add(callback)
+
+                    EventHandler.callbacks.events[event_type] = callbacks
+                    EventHandler._filter()
+
+                else:
+                    callbacks.add(callback)
 
             @staticmethod
             def keydown(callback):
-                EventHandler.callbacks.keydown.append(_weak(callback))
+                EventHandler.Callback._Add.event(_pygame.KEYDOWN, callback)
 
             @staticmethod
             def keyup(callback):
-                EventHandler.callbacks.keyup.append(_weak(callback))
+                EventHandler.Callback._Add.event(_pygame.KEYUP, callback)
+
+            @staticmethod
+            def key_repeat(callback):
+                EventHandler.Callback._Add.event(KEYREPEAT, callback)
+                EventHandler.key_repeat.connect()
 
             @staticmethod
             def mouse_button_down(callback):
-                EventHandler.callbacks.mouse_button_down.append(_weak(callback))
+                EventHandler.Callback._Add.event(_pygame.MOUSEBUTTONDOWN, callback)
 
             @staticmethod
             def mouse_button_up(callback):
-                EventHandler.callbacks.mouse_button_up.append(_weak(callback))
+                EventHandler.Callback._Add.event(_pygame.MOUSEBUTTONUP, callback)
 
             @staticmethod
             def mouse_motion(callback):
-                EventHandler.callbacks.mouse_motion.append(_weak(callback))
+                EventHandler.Callback._Add.event(_pygame.MOUSEMOTION, callback)
 
             @staticmethod
             def mouse_press(callback):
-                EventHandler.callbacks.mouse_press.append(_weak(callback))
+                EventHandler.callbacks.mouse_press.add(callback)
 
             @staticmethod
             def window_resize(callback):
-                EventHandler.callbacks.window_resize.append(_weak(callback))
+                EventHandler.Callback._Add.event(_pygame.VIDEORESIZE, callback)
 
         class _Remove:
 
             @staticmethod
             def early_update(callback):
-                EventHandler.callbacks.early_update.remove(_weak(callback))
+                EventHandler.callbacks.early_update.remove(callback)
 
             @staticmethod
             def update(callback):
-                EventHandler.callbacks.update.remove(_weak(callback))
+                EventHandler.callbacks.update.remove(callback)
 
             @staticmethod
             def any(callback):
-                EventHandler.callbacks.any.remove(_weak(callback))
+                EventHandler.callbacks.any.remove(callback)
+
+            @staticmethod
+            def event(event_type: int, callback):
+                callbacks = EventHandler.callbacks.events.get(event_type)
+
+                if callbacks is None:
+                    raise ValueError("No callbacks registered for event type {}".format(event_type))
+
+                callbacks.remove(callback)
 
             @staticmethod
             def keydown(callback):
-                EventHandler.callbacks.keydown.remove(_weak(callback))
+                EventHandler.Callback._Remove.event(_pygame.KEYDOWN, callback)
 
             @staticmethod
             def keyup(callback):
-                EventHandler.callbacks.keyup.remove(_weak(callback))
+                EventHandler.Callback._Remove.event(_pygame.KEYUP, callback)
+
+            @staticmethod
+            def key_repeat(callback):
+                EventHandler.Callback._Remove.event(KEYREPEAT, callback)
 
             @staticmethod
             def mouse_button_down(callback):
-                EventHandler.callbacks.mouse_button_down.remove(_weak(callback))
+                EventHandler.Callback._Remove.event(_pygame.MOUSEBUTTONDOWN, callback)
 
             @staticmethod
             def mouse_button_up(callback):
-                EventHandler.callbacks.mouse_button_up.remove(_weak(callback))
+                EventHandler.Callback._Remove.event(_pygame.MOUSEBUTTONUP, callback)
 
             @staticmethod
             def mouse_motion(callback):
-                EventHandler.callbacks.mouse_motion.remove(_weak(callback))
+                EventHandler.Callback._Remove.event(_pygame.MOUSEMOTION, callback)
 
             @staticmethod
             def mouse_press(callback):
-                EventHandler.callbacks.mouse_press.remove(_weak(callback))
+                EventHandler.callbacks.mouse_press.remove(callback)
 
             @staticmethod
             def window_resize(callback):
-                EventHandler.callbacks.window_resize.remove(_weak(callback))
+                EventHandler.Callback._Remove.event(_pygame.VIDEORESIZE, callback)
 
         add: _Add
         remove: _Remove
 
-        # May need special arrays for weak members. This is for the callback's class to release.
-        early_update:      [object]
-        update:            [object]
+        early_update:      _CallbackRegistry
+        update:            _CallbackRegistry
 
-        any:               [object]
-        keydown:           [object]
-        keyup:             [object]
-        mouse_button_down: [object]
-        mouse_button_up:   [object]
-        mouse_motion:      [object]
-        mouse_press:       [object]
-        window_resize:     [object]
+        any:               _CallbackRegistry
+        mouse_press:       _CallbackRegistry
+
+        events:            {int: _CallbackRegistry}  # Dispatch table: pygame event type -> callbacks
 
         def __init__(self):
             self.add = self._Add()
             self.remove = self._Remove()
 
-            self.early_update:      [object] = []
-            self.update:            [object] = []
+            self.early_update:      _CallbackRegistry = _CallbackRegistry()
+            self.update:            _CallbackRegistry = _CallbackRegistry()
+
+            self.any:               _CallbackRegistry = _CallbackRegistry(lambda _: EventHandler._filter())
+            self.mouse_press:       _CallbackRegistry = _CallbackRegistry()
 
-            self.any:               [object] = []
-            self.keydown:           [object] = []
-            self.keyup:             [object] = []
-            self.mouse_button_down: [object] = []
-            self.mouse_button_up:   [object] = []
-            self.mouse_motion:      [object] = []
-            self.mouse_press:       [object] = []
-            self.window_resize:     [object] = []
+            self.events:            {int: _CallbackRegistry} = {}
+
+        @staticmethod
+        def _unsubscribed(event_type: int, registry: _CallbackRegistry):
+            """Called when the last callback of a type is removed or collected"""
+
+            # Unsubscribed types are kept out of the table, so that their events cost a single lookup
+            if EventHandler.callbacks.events.get(event_type) is registry:
+                del EventHandler.callbacks.events[event_type]
+                EventHandler._filter()
+
+                if event_type == KEYREPEAT:
+                    EventHandler.key_repeat.disconnect()
+
+        # Read-only views of the dispatch table, for the event types that used to have their own lists
+
+        @property
+        def keydown(self) -> _CallbackRegistry or ():
+            return self.events.get(_pygame.KEYDOWN, ())
+
+        @property
+        def keyup(self) -> _CallbackRegistry or ():
+            return self.events.get(_pygame.KEYUP, ())
+
+        @property
+        def key_repeat(self) -> _CallbackRegistry or ():
+            return self.events.get(KEYREPEAT, ())
+
+        @property
+        def mouse_button_down(self) -> _CallbackRegistry or ():
+            return self.events.get(_pygame.MOUSEBUTTONDOWN, ())
+
+        @property
+        def mouse_button_up(self) -> _CallbackRegistry or ():
+            return self.events.get(_pygame.MOUSEBUTTONUP, ())
+
+        @property
+        def mouse_motion(self) -> _CallbackRegistry or ():
+            return self.events.get(_pygame.MOUSEMOTION, ())
+
+        @property
+        def window_resize(self) -> _CallbackRegistry or ():
+            return self.events.get(_pygame.VIDEORESIZE, ())
 
     # ------------------------------------------------------------------------------------------------------------------
 
     callbacks: Callback
+    hit_test: "HitTestIndex"
+    key_repeat: "KeyRepeat"
+    scheduler: "Scheduler"
+
+    # Merges consecutive MOUSEMOTION events of a frame into one. Raw samples are kept in the event's 'history'
+    coalesce_mouse_motion: bool = False
+
+    # Keeps SDL from queueing input events nobody is subscribed to. Set before init()
+    filter_events: bool = True
+
+    # Only the last VIDEORESIZE of a frame is dispatched. It's held back until this many milliseconds pass without
+    # another, so dragging a window edge rebuilds the display and its surfaces once, instead of on every step
+    resize_delay: int = 0
 
     _mouse_press: {}
 
+    recorder: "EventRecorder" or None
+    replay_source: "EventReplay" or None
+
+    # Times every callback while set. Checked once per dispatch, so leaving it None costs nothing measurable
+    profiler: "EventProfiler" or None = None
+
+    active_at: float = 0.0  # perf_counter() of the last dispatched event, held mouse button, or request_frame()
+
+    _invalidated: bool
+    _pending: [(_pygame.event.Event, int)]  # Taken off the queue by wait(), dispatched by the next update()
+
+    _resize: _pygame.event.Event or None  # Held back by resize_delay
+    _resize_deadline: float
+
+    _inbound: _collections.deque  # (event, ticks) and (function, arguments) calls, posted from any thread
+    _wake_posted: bool
+
     _errors: [str]
 
     @staticmethod
     def init():
         EventHandler.callbacks = EventHandler.Callback()
+        EventHandler.hit_test = HitTestIndex()
+        EventHandler.key_repeat = KeyRepeat()
+        EventHandler.scheduler = Scheduler()
 
         EventHandler._mouse_press = set([])
 
+        EventHandler._invalidated = False
+        EventHandler._pending = []
+
+        EventHandler._resize = None
+        EventHandler._resize_deadline = 0.0
+
+        EventHandler._inbound = _collections.deque()
+        EventHandler._wake_posted = False
+
         EventHandler._errors = []
 
+        EventHandler._filter()
+
+        # Lets a whole app be recorded, or replayed for benchmarking, from the command line
+        EventHandler.recorder = None
+        EventHandler.replay_source = None
+
+        if _os.environ.get("PYGUI_RECORD"):
+            EventHandler.record(_os.environ["PYGUI_RECORD"])
+
+        if _os.environ.get("PYGUI_REPLAY"):
+            EventHandler.replay(_os.environ["PYGUI_REPLAY"], report=True)
+
     @staticmethod
     def flush():
         del EventHandler.Callback
@@ -153,34 +398,238 @@ class EventHandler:
 
     # ------------------------------------------------------------------------------------------------------------------
 
+    @staticmethod
+    def request_frame():
+        """
+        Requests another frame: the next wait() returns immediately. Call every frame while animating. Thread-safe: a
+        wait() already blocking is woken
+        """
+        EventHandler.active_at = _time.perf_counter()
+
+        if not EventHandler._invalidated:
+            EventHandler._invalidated = True
+            EventHandler._wake()
+
+    @staticmethod
+    def now() -> float:
+        """The scheduler's clock in seconds: time.perf_counter(), or the recorded time while replaying"""
+        if EventHandler.replay_source is not None:
+            return EventHandler.replay_source.time
+
+        return _time.perf_counter()
+
+    @staticmethod
+    def wait(timeout: int = None) -> bool:
+        """
+        Blocks until an event arrives, a timer or held back resize is due, or timeout milliseconds pass. Doesn't
+        block while invalidated, or while mouse buttons are held, as mouse_press callbacks run every frame. Returns
+        whether it blocked.
+        """
+        if EventHandler._invalidated or EventHandler._mouse_press or EventHandler._pending or EventHandler._inbound:
+            return False
+
+        deadline = EventHandler.scheduler.next_deadline()
+
+        if EventHandler._resize is not None:
+            deadline = min(deadline, EventHandler._resize_deadline) \
+                if deadline is not None else EventHandler._resize_deadline
+
+        if deadline is not None:
+            remaining = int((deadline - EventHandler.now()) * 1000) + 1
+
+            if remaining <= 0:
+                return False
+
+            timeout = min(timeout, remaining) if timeout is not None else remaining
+
+        event = _pygame.event.wait(timeout) if timeout is not None else _pygame.event.wait()
+
+        if event.type != _pygame.NOEVENT and event.type != _WAKE:
+            EventHandler._pending.append((event, _pygame.time.get_ticks()))
+
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Thread-safe. Widgets and callbacks may only be touched from the loop thread: hand work over through these.
+
+    @staticmethod
+    def call_soon(function, *arguments):
+        """Calls function(*arguments) on the loop thread, at the start of the next update()"""
+        EventHandler._inbound.append((function, arguments))
+        EventHandler._wake()
+
+    @staticmethod
+    def post(event: _pygame.event.Event):
+        """Dispatches event on the loop thread, with the events of the next update()"""
+        EventHandler._inbound.append((event, _pygame.time.get_ticks()))
+        EventHandler._wake()
+
+    @staticmethod
+    def _wake():
+        if EventHandler._wake_posted:
+            return
+
+        EventHandler._wake_posted = True
+
+        try:
+            _pygame.event.post(_pygame.event.Event(_WAKE, {}))
+
+        except _pygame.error:
+            pass  # Video system not initialized. Nothing can be waiting
+
+    @staticmethod
+    def _drain() -> [(_pygame.event.Event, int)]:
+        """Runs the calls posted since the last update(), and returns the posted events with their ticks"""
+        EventHandler._wake_posted = False
+
+        inbound = EventHandler._inbound
+        posted = []
+
+        # Only what was posted before draining started. The rest belongs to the next frame
+        for _ in range(inbound.__len__()):
+            item = inbound.popleft()
+
+            if isinstance(item[0], _pygame.event.EventType):
+                posted.append(item)
+
+            else:
+                item[0](*item[1])
+
+        return posted
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    @staticmethod
+    def record(path: str):
+        """Writes every event, and the Clock delta of every frame, to path"""
+        EventHandler.stop_recording()
+        EventHandler.recorder = EventRecorder(path)
+
+    @staticmethod
+    def stop_recording():
+        if EventHandler.recorder is not None:
+            EventHandler.recorder.close()
+            EventHandler.recorder = None
+
+    @staticmethod
+    def replay(path: str, report: bool = False):
+        """
+        Dispatches the events of a recording instead of pygame's, and posts QUIT when it ends. With report, the
+        frame count and elapsed time are printed then, as when replaying from the command line.
+        """
+        EventHandler.replay_source = EventReplay(path, report)
+
+    @staticmethod
+    def mouse_position() -> (int, int):
+        """The pointer position, as recorded while replaying"""
+        if EventHandler.replay_source is not None:
+            return EventHandler.replay_source.mouse_position
+
+        return _pygame.mouse.get_pos()
+
+    # ------------------------------------------------------------------------------------------------------------------
+
     @staticmethod
     def update():
-        for callback in EventHandler.callbacks.early_update:
-            callback()()
+        EventHandler._invalidated = False
+
+        profiler = EventHandler.profiler
+
+        if profiler is None:
+            for callback in EventHandler.callbacks.early_update:
+                callback()
+
+        else:
+            profiler.dispatch("early_update", EventHandler.callbacks.early_update)
+
+        queue = [event for event in _pygame.event.get() if event.type != _WAKE]  # Wake-ups are only for wait()
+        arrivals = None
+        posted = EventHandler._drain() if EventHandler._inbound else []
+
+        if EventHandler.replay_source is not None:
+            # The recording replaces pygame's input, but what the app posts itself still happens
+            EventHandler._pending = []
+            queue = EventHandler.replay_source.take() + [event for event, _ in posted]
+            arrivals = EventHandler.replay_source.timestamps + [ticks for _, ticks in posted]
+
+        elif EventHandler._pending or posted:
+            # Events that arrived before this update() keep the ticks they arrived at, for the recorder
+            ticks = _pygame.time.get_ticks()
+            stamped = EventHandler._pending + [(event, ticks) for event in queue] + posted
+            EventHandler._pending = []
+
+            queue = [event for event, _ in stamped]
+            arrivals = [ticks for _, ticks in stamped]
+
+        if EventHandler.recorder is not None:
+            EventHandler.recorder.write(queue, arrivals)
+
+        if EventHandler.coalesce_mouse_motion:
+            queue = EventHandler._coalesce(queue)
 
-        for event in _pygame.event.get():
+        queue = EventHandler._debounce_resize(queue)
 
-            for callback in EventHandler.callbacks.any:
-                callback()(event)
+        if queue or EventHandler._mouse_press:
+            EventHandler.active_at = _time.perf_counter()
 
-            if event.type == _pygame.KEYDOWN:
-                for callback in EventHandler.callbacks.keydown:
-                    callback()(event)
+        EventHandler._dispatch(queue, profiler)
 
-            elif event.type == _pygame.KEYUP:
-                for callback in EventHandler.callbacks.keyup:
-                    callback()(event)
+        # Run after the frame's KEYUP events are handled, so released keys don't repeat
+        EventHandler.scheduler.run(EventHandler.now())
+
+        if EventHandler.key_repeat.connected:
+            repeats = EventHandler.key_repeat.take()
+
+            if repeats:
+                if EventHandler.recorder is not None:
+                    EventHandler.recorder.append(repeats)
+
+                EventHandler._dispatch(repeats, profiler)
+
+        if EventHandler._mouse_press.__len__() > 0:
+            e = _pygame.event.Event(0, {"buttons": EventHandler._mouse_press, "pos": EventHandler.mouse_position()})
+
+            if profiler is None:
+                for callback in EventHandler.callbacks.mouse_press:
+                    callback(e)
+
+            else:
+                profiler.dispatch("mouse_press", EventHandler.callbacks.mouse_press, e)
+
+        if profiler is None:
+            for callback in EventHandler.callbacks.update:
+                callback()
+
+        else:
+            profiler.dispatch("update", EventHandler.callbacks.update)
+
+    @staticmethod
+    def _dispatch(queue: [_pygame.event.Event], profiler):
+        events = EventHandler.callbacks.events
 
-            elif event.type == _pygame.MOUSEBUTTONDOWN:
-                for callback in EventHandler.callbacks.mouse_button_down:
-                    callback()(event)
+        for event in queue:
 
+            callbacks = events.get(event.type)
+
+            if profiler is None:
+                for callback in EventHandler.callbacks.any:
+                    callback(event)
+
+                if callbacks is not None:
+                    for callback in callbacks:
+                        callback(event)
+
+            else:
+                profiler.dispatch("any", EventHandler.callbacks.any, event)
+
+                if callbacks is not None:
+                    profiler.dispatch(_kinds.get(event.type) or _pygame.event.event_name(event.type), callbacks, event)
+
+            # Held buttons are tracked after the callbacks ran, like before the dispatch table
+            if event.type == _pygame.MOUSEBUTTONDOWN:
                 EventHandler._mouse_press.add(event.button)
 
             elif event.type == _pygame.MOUSEBUTTONUP:
-                for callback in EventHandler.callbacks.mouse_button_up:
-                    callback()(event)
-
                 try:
                     EventHandler._mouse_press.remove(event.button)
 
@@ -189,18 +638,759 @@ class EventHandler:
                     print("Error occured in EventHandler.")
                     print(_traceback.format_exc())
 
-            elif event.type == _pygame.MOUSEMOTION:
-                for callback in EventHandler.callbacks.mouse_motion:
-                    callback()(event)
+    @staticmethod
+    def _filter():
+        """Allows the filterable event types with subscribers in SDL, and blocks the rest"""
+        if not EventHandler.filter_events:
+            return
 
-            elif event.type == _pygame.VIDEORESIZE:
-                for callback in EventHandler.callbacks.window_resize:
-                    callback()(event)
+        if EventHandler.callbacks.any:
+            allowed = _filterable
 
-        if EventHandler._mouse_press.__len__() > 0:
-            e = _pygame.event.Event(0, {"buttons": EventHandler._mouse_press, "pos": _pygame.mouse.get_pos()})
-            for callback in EventHandler.callbacks.mouse_press:
-                callback()(e)
+        else:
+            allowed = _filterable.intersection(EventHandler.callbacks.events)
+
+        blocked = _filterable.difference(allowed)
+
+        try:
+            if blocked:
+                _pygame.event.set_blocked(list(blocked))
+
+            if allowed:
+                _pygame.event.set_allowed(list(allowed))
+
+        except _pygame.error:
+            pass  # Video system not initialized. Nothing is queued until it is
+
+    @staticmethod
+    def _coalesce(queue: [_pygame.event.Event]) -> [_pygame.event.Event]:
+        """Merges every run of consecutive MOUSEMOTION events, keeping the order relative to other events"""
+        coalesced = []
+        run = []
+
+        for event in queue:
+            if event.type == _pygame.MOUSEMOTION:
+                run.append(event)
+                continue
+
+            if run:
+                coalesced.append(EventHandler._merge_motion(run))
+                run = []
+
+            coalesced.append(event)
+
+        if run:
+            coalesced.append(EventHandler._merge_motion(run))
+
+        return coalesced
+
+    @staticmethod
+    def _debounce_resize(queue: [_pygame.event.Event]) -> [_pygame.event.Event]:
+        """Holds back the last VIDEORESIZE of the queue, and appends the held one once resize_delay has passed"""
+        latest = None
+
+        for event in queue:
+            if event.type == _pygame.VIDEORESIZE:
+                latest = event
+
+        now = EventHandler.now()  # Recorded time while replaying, like the scheduler
+
+        if latest is not None:
+            queue = [event for event in queue if event.type != _pygame.VIDEORESIZE]
+
+            EventHandler._resize = latest
+            EventHandler._resize_deadline = now + EventHandler.resize_delay / 1000
+
+        if EventHandler._resize is not None and now >= EventHandler._resize_deadline:
+            queue = queue + [EventHandler._resize]
+            EventHandler._resize = None
+
+        return queue
+
+    @staticmethod
+    def _merge_motion(run: [_pygame.event.Event]) -> _pygame.event.Event:
+        """Last position and buttons, summed relative motion. Subscribers needing raw samples read 'history'"""
+        attributes = dict(run[-1].dict)
+        attributes["rel"] = (sum(event.rel[0] for event in run), sum(event.rel[1] for event in run))
+        attributes["history"] = run
+
+        return _pygame.event.Event(_pygame.MOUSEMOTION, attributes)
+
+
+# Owners collected while the interpreter exits are still pruned, when pygame can't be called any more
+_atexit.register(setattr, EventHandler, "filter_events", False)
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class HitTestIndex:
+    """
+    Uniform grid over screen space. Mouse events are only delivered to the regions under the pointer, in the order
+    the regions were added. Region callbacks: mouse_enter, mouse_leave, mouse_motion, mouse_button_down,
+    mouse_button_up, mouse_press
+    """
+
+    class _Region:
+        order: int  # Regions under the pointer are called in this order
+        rectangle: (int, int, int, int)
+        cells: [(int, int)]
+        callbacks: {str: object}
+        finalizer: _weakref.finalize
+
+    cell_size: int
+
+    _cells: {(int, int): {int}}
+    _regions: {int: _Region}
+    _hovered: {int}
+    _pointer: (int, int) or None
+    _sequence: int
+
+    def __init__(self, cell_size: int = 128):
+        self.cell_size = cell_size
+
+        self._cells = {}
+        self._regions = {}
+        self._hovered = set()
+        self._pointer = None
+        self._sequence = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def add(self, owner: object, rectangle: [4], **callbacks):
+        """Registers owner's screen space rectangle. Callbacks are held weakly, like EventHandler callbacks"""
+        key = id(owner)
+
+        if key in self._regions:
+            self.remove(owner)
+
+        self._sequence += 1
+
+        region = HitTestIndex._Region()
+        region.order = self._sequence
+        region.rectangle = None
+        region.cells = []
+        region.callbacks = {kind: _weak(callback) for kind, callback in callbacks.items()}
+        region.finalizer = _weakref.finalize(owner, self._discard, key)
+
+        if not self._regions:
+            self._connect()
+
+        self._regions[key] = region
+        self._place(key, region, rectangle)
+
+    def move(self, owner: object, rectangle: [4]):
+        region = self._regions.get(id(owner))
+
+        if region is None:
+            raise ValueError("Region not registered: {}".format(owner))
+
+        self._place(id(owner), region, rectangle)
+
+    def remove(self, owner: object):
+        region = self._regions.get(id(owner))
+
+        if region is None:
+            raise ValueError("Region not registered: {}".format(owner))
+
+        region.finalizer.detach()
+        self._discard(id(owner))
+
+    def at(self, x: int, y: int) -> [int]:
+        """Returns the keys of every region containing the point, in the order the regions were added"""
+        members = self._cells.get((x // self.cell_size, y // self.cell_size))
+
+        if not members:
+            return []
+
+        hits = [key for key in members if _within_rectangle(x, y, self._regions[key].rectangle)]
+        hits.sort(key=self._order)
+
+        return hits
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def _place(self, key: int, region: _Region, rectangle: [4]):
+        rectangle = tuple(rectangle)
+
+        if rectangle == region.rectangle:
+            return
+
+        self._unlink(key, region)
+
+        region.rectangle = rectangle
+
+        if rectangle[2] > 0 and rectangle[3] > 0:
+            left = int(rectangle[0] // self.cell_size)
+            top = int(rectangle[1] // self.cell_size)
+            right = int((rectangle[0] + rectangle[2] - 1) // self.cell_size)
+            bottom = int((rectangle[1] + rectangle[3] - 1) // self.cell_size)
+
+            for column in range(left, right + 1):
+                for row in range(top, bottom + 1):
+                    self._cells.setdefault((column, row), set()).add(key)
+                    region.cells.append((column, row))
+
+        # Hover follows the region as well as the pointer, so moved regions are entered and left too
+        pointer = self._pointer if self._pointer is not None else EventHandler.mouse_position()
+        within = _within_rectangle(pointer[0], pointer[1], rectangle)
+
+        if within != (key in self._hovered):
+            event = _pygame.event.Event(_pygame.MOUSEMOTION, {
+                "pos": pointer,
+                "rel": (0, 0),
+                "buttons": _pygame.mouse.get_pressed()})
+
+            if within:
+                self._hovered.add(key)
+                self._call(key, "mouse_enter", event)
+
+            else:
+                self._hovered.discard(key)
+                self._call(key, "mouse_leave", event)
+
+    def _order(self, key: int) -> int:
+        return self._regions[key].order
+
+    def _unlink(self, key: int, region: _Region):
+        for cell in region.cells:
+            members = self._cells[cell]
+            members.discard(key)
+
+            if not members:
+                del self._cells[cell]
+
+        region.cells = []
+
+    def _discard(self, key: int):
+        region = self._regions.pop(key, None)
+
+        if region is None:
+            return
+
+        self._unlink(key, region)
+        self._hovered.discard(key)
+
+        if not self._regions:
+            self._disconnect()
+
+    def _call(self, key: int, kind: str, event: _pygame.event.Event):
+        region = self._regions.get(key)
+
+        if region is None:
+            return  # Removed by an earlier callback of the same event
+
+        callback = region.callbacks.get(kind)
+
+        if callback is not None:
+            method = callback()
+
+            if method is not None:
+                if EventHandler.profiler is None:
+                    method(event)
+
+                else:
+                    # Inclusive: the time is also part of the HitTestIndex entry of the dispatching event
+                    EventHandler.profiler.call("hit_test." + kind, method, event)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def _connect(self):
+        EventHandler.callbacks.add.mouse_motion(self._mouse_motion)
+        EventHandler.callbacks.add.mouse_button_down(self._mouse_button_down)
+        EventHandler.callbacks.add.mouse_button_up(self._mouse_button_up)
+        EventHandler.callbacks.add.mouse_press(self._mouse_press)
+
+    def _disconnect(self):
+        try:
+            EventHandler.callbacks.remove.mouse_motion(self._mouse_motion)
+            EventHandler.callbacks.remove.mouse_button_down(self._mouse_button_down)
+            EventHandler.callbacks.remove.mouse_button_up(self._mouse_button_up)
+            EventHandler.callbacks.remove.mouse_press(self._mouse_press)
+
+        except (ValueError, AttributeError):
+            pass  # EventHandler has been flushed
+
+        self._pointer = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def _mouse_motion(self, event: _pygame.event.Event):
+        self._pointer = event.pos
+
+        under = self.at(*event.pos)
+        left = sorted(self._hovered.difference(under), key=self._order)
+        entered = [key for key in under if key not in self._hovered]
+        self._hovered = set(under)
+
+        for key in left:
+            self._call(key, "mouse_leave", event)
+
+        for key in entered:
+            self._call(key, "mouse_enter", event)
+
+        for key in under:
+            self._call(key, "mouse_motion", event)
+
+    def _mouse_button_down(self, event: _pygame.event.Event):
+        for key in self.at(*event.pos):
+            self._call(key, "mouse_button_down", event)
+
+    def _mouse_button_up(self, event: _pygame.event.Event):
+        for key in self.at(*event.pos):
+            self._call(key, "mouse_button_up", event)
+
+    def _mouse_press(self, event: _pygame.event.Event):
+        for key in self.at(*event.pos):
+            self._call(key, "mouse_press", event)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class Timer:
+    """
+    Handle of a call scheduled with Scheduler.call_later or call_every. Bound methods are referenced weakly, like
+    callbacks, so a pending timer doesn't keep its owner alive: the timer is cancelled once the owner is collected.
+    """
+
+    __slots__ = ("deadline", "interval", "active", "_function", "_reference", "_arguments")
+
+    deadline: float  # Next run, in EventHandler.now() seconds
+    interval: float or None  # Seconds between runs of repeating timers
+    active: bool  # False once cancelled, or once a one-shot timer has run
+
+    def __init__(self, deadline: float, interval: float or None, function, arguments: tuple):
+        self.deadline = deadline
+        self.interval = interval
+        self.active = True
+
+        self._function = None if isinstance(function, _types.MethodType) else function
+        self._reference = _weak(function) if isinstance(function, _types.MethodType) else None
+        self._arguments = arguments
+
+    def cancel(self):
+        self.active = False
+
+    def _run(self):
+        function = self._function if self._reference is None else self._reference()
+
+        if function is None:
+            self.active = False
+            return
+
+        function(*self._arguments)
+
+
+class Scheduler:
+    """
+    Runs calls on the loop thread once their deadline passes. Timers wait in a heap ordered by deadline, so run() only
+    touches due timers, and next_deadline() tells EventHandler.wait() exactly how long it may block. Cancelled timers
+    stay in the heap until they reach its top. Times are in EventHandler.now() seconds.
+    """
+
+    _heap: [(float, int, Timer)]  # (deadline, sequence, timer). The sequence keeps equal deadlines in order
+    _sequence: int
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return self._heap.__len__()
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def call_later(self, delay: float, function, *arguments) -> Timer:
+        """Calls function once, delay seconds from now"""
+        return self._push(Timer(EventHandler.now() + delay, None, function, arguments))
+
+    def call_every(self, interval: float, function, *arguments, delay: float = None) -> Timer:
+        """Calls function every interval seconds, the first time after delay seconds (defaults to interval)"""
+        delay = interval if delay is None else delay
+        return self._push(Timer(EventHandler.now() + delay, interval, function, arguments))
+
+    def clear(self):
+        for _, _, timer in self._heap:
+            timer.active = False
+
+        self._heap = []
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def next_deadline(self) -> float or None:
+        while self._heap:
+            deadline, _, timer = self._heap[0]
+
+            if timer.active:
+                return deadline
+
+            _heapq.heappop(self._heap)
+
+        return None
+
+    def run(self, now: float) -> int:
+        """Runs the timers due at now, and returns how many ran. Timers scheduled meanwhile wait for the next run"""
+        due = []
+
+        while self._heap and self._heap[0][0] <= now:
+            _, _, timer = _heapq.heappop(self._heap)
+
+            if timer.active:
+                due.append(timer)
+
+        for timer in due:
+            if not timer.active:
+                continue  # Cancelled by an earlier timer of this run
+
+            if timer.interval is None:
+                timer.active = False
+
+            timer._run()
+
+            if timer.active:
+                # Late frames get one run, not a burst of the missed ones
+                deadline = timer.deadline + timer.interval
+                timer.deadline = deadline if deadline > now else now + timer.interval
+                self._push(timer)
+
+        return due.__len__()
+
+    def _push(self, timer: Timer) -> Timer:
+        self._sequence += 1
+        _heapq.heappush(self._heap, (timer.deadline, self._sequence, timer))
+        return timer
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class KeyRepeat:
+    """
+    Emits KEYREPEAT events for held keys, from a repeating timer per key in EventHandler.scheduler. Listens to keys
+    while anybody is subscribed through EventHandler.callbacks.add.key_repeat. Replays hold the recorded repeats, so
+    none are generated while replaying.
+    """
+
+    delay: float  # Seconds from KEYDOWN to the first repeat
+    interval: float  # Seconds between repeats
+    connected: bool
+
+    _timers: {int: Timer}  # key -> repeat timer, while held
+    _due: [_pygame.event.Event]  # Repeats of the current frame, taken by EventHandler.update()
+
+    def __init__(self, delay: float = 0.4, interval: float = 0.05):
+        self.delay = delay
+        self.interval = interval
+        self.connected = False
+
+        self._timers = {}
+        self._due = []
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def connect(self):
+        if not self.connected:
+            EventHandler.callbacks.add.keydown(self._keydown)
+            EventHandler.callbacks.add.keyup(self._keyup)
+            self.connected = True
+
+    def disconnect(self):
+        if self.connected:
+            EventHandler.callbacks.remove.keydown(self._keydown)
+            EventHandler.callbacks.remove.keyup(self._keyup)
+            self.connected = False
+
+        for timer in self._timers.values():
+            timer.cancel()
+
+        self._timers = {}
+        self._due = []
+
+    def take(self) -> [_pygame.event.Event]:
+        due = self._due
+        self._due = []
+        return due
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def _keydown(self, event: _pygame.event.Event):
+        if EventHandler.replay_source is not None:
+            return
+
+        timer = self._timers.get(event.key)
+
+        if timer is not None:
+            timer.cancel()
+
+        self._timers[event.key] = EventHandler.scheduler.call_every(
+            self.interval, self._repeat, dict(event.dict), delay=self.delay)
+
+    def _keyup(self, event: _pygame.event.Event):
+        timer = self._timers.pop(event.key, None)
+
+        if timer is not None:
+            timer.cancel()
+
+    def _repeat(self, attributes: dict):
+        self._due.append(_pygame.event.Event(KEYREPEAT, attributes))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+# Event log layout, after the header:
+#     frame: b"F", Clock delta as a double (NaN for None)
+#     event: b"E", type, pygame.time.get_ticks() when it arrived, attribute length, marshalled attributes
+# Attributes that aren't plain values (numbers, strings, None, or tuples and lists of those) are left out. Custom
+# types are numbered by pygame.event.custom_type() in the order they're created, so they're written as the
+# negative ids of _LOG_IDS instead.
+
+_LOG_HEADER = b"PygUI events\x00" + bytes([_marshal.version])
+_LOG_FRAME = _struct.Struct("<cd")
+_LOG_EVENT = _struct.Struct("<ciII")
+
+_LOG_IDS: {int: int} = {KEYREPEAT: -1}
+_LOG_TYPES: {int: int} = {log_id: event_type for event_type, log_id in _LOG_IDS.items()}
+
+
+def _loggable(value) -> bool:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return True
+
+    if isinstance(value, (tuple, list)):
+        return all(_loggable(item) for item in value)
+
+    return False
+
+
+class EventRecorder:
+    """Writes the raw event stream of every EventHandler.update() to a binary log"""
+
+    delta: float or None  # Set by Clock, written with the next frame
+
+    def __init__(self, path: str):
+        self.delta = None
+
+        self._file = open(path, "wb")
+        self._file.write(_LOG_HEADER)
+
+        _atexit.register(self.close)
+
+    def write(self, queue: [_pygame.event.Event], arrivals: [int] = None):
+        """
+        Starts a frame with queue. arrivals holds the pygame.time.get_ticks() each event arrived at; events without
+        one are stamped now
+        """
+        if self._file is None:
+            return
+
+        self._file.write(_LOG_FRAME.pack(b"F", self.delta if self.delta is not None else _math.nan))
+        self.delta = None
+
+        self._encode(queue, arrivals)
+
+    def append(self, queue: [_pygame.event.Event], arrivals: [int] = None):
+        """Adds events to the frame last written"""
+        if self._file is None:
+            return
+
+        self._encode(queue, arrivals)
+
+    def _encode(self, queue: [_pygame.event.Event], arrivals: [int] or None):
+        if arrivals is None:
+            arrivals = [_pygame.time.get_ticks()] * queue.__len__()
+
+        for event, ticks in zip(queue, arrivals):
+            attributes = {key: value for key, value in event.dict.items() if _loggable(value)}
+            payload = _marshal.dumps(attributes, _marshal.version)
+
+            self._file.write(_LOG_EVENT.pack(b"E", _LOG_IDS.get(event.type, event.type), ticks, payload.__len__()))
+            self._file.write(payload)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+            _atexit.unregister(self.close)
+
+
+class EventReplay:
+    """
+    Feeds a log written by EventRecorder back through EventHandler, one recorded frame per update(). Clock runs
+    unthrottled, on the recorded deltas. Once the log ends, QUIT is posted and elapsed is set; with report, it's
+    printed too.
+    """
+
+    delta: float or None
+    time: float  # Seconds of recorded deltas so far. EventHandler.now() while replaying
+    timestamps: [int]  # pygame.time.get_ticks() of the current frame's events, as recorded
+    mouse_position: (int, int)
+    frames: int
+    finished: bool
+    elapsed: float or None  # Wall-clock seconds the replay took, once finished
+    report: bool
+
+    def __init__(self, path: str, report: bool = False):
+        with open(path, "rb") as file:
+            self._log = file.read()
+
+        if not self._log.startswith(_LOG_HEADER):
+            raise ValueError("Not an event log of this Python version: {}".format(path))
+
+        self._offset = _LOG_HEADER.__len__()
+        self._events = []
+        self._advanced = False
+
+        self.delta = None
+        self.time = 0.0
+        self.timestamps = []
+        self.mouse_position = (0, 0)
+        self.frames = 0
+        self.finished = False
+        self.elapsed = None
+        self.report = report
+
+        self._started = _time.perf_counter()
+
+    def advance(self) -> float or None:
+        """Reads the next frame. Returns its delta"""
+        self._advanced = True
+        self._events = []
+        self.timestamps = []
+
+        if self.finished:
+            return self.delta
+
+        if self._offset >= self._log.__len__():
+            self.finished = True
+            self.elapsed = _time.perf_counter() - self._started
+            self._events.append(_pygame.event.Event(_pygame.QUIT, {}))
+
+            if self.report:
+                print("Replayed {} frames in {:.3f} s".format(self.frames, self.elapsed))
+
+            return self.delta
+
+        _, delta = _LOG_FRAME.unpack_from(self._log, self._offset)
+        self._offset += _LOG_FRAME.size
+        self.delta = None if _math.isnan(delta) else delta
+        self.frames += 1
+
+        if self.delta is not None:
+            self.time += self.delta / 1000
+
+        while self._offset < self._log.__len__() and self._log[self._offset:self._offset + 1] == b"E":
+            _, event_type, ticks, length = _LOG_EVENT.unpack_from(self._log, self._offset)
+            self._offset += _LOG_EVENT.size
+            event_type = _LOG_TYPES.get(event_type, event_type)
+
+            attributes = _marshal.loads(self._log[self._offset:self._offset + length])
+            self._offset += length
+
+            if "pos" in attributes:
+                self.mouse_position = attributes["pos"]
+
+            self._events.append(_pygame.event.Event(event_type, attributes))
+            self.timestamps.append(ticks)
+
+        return self.delta
+
+    def take(self) -> [_pygame.event.Event]:
+        """The events of the current frame. Advances first, if Clock hasn't"""
+        if not self._advanced:
+            self.advance()
+
+        self._advanced = False
+        return self._events
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class EventProfiler:
+    """
+    Times the callbacks EventHandler dispatches. Totals are kept per owner class and event kind, and the last
+    capacity calls are kept in a ring buffer. Enable with EventHandler.profiler = EventProfiler().
+    """
+
+    capacity: int
+
+    _totals: {(str, str): [int]}  # (owner, kind) -> [calls, total ns, maximum ns]
+    _samples: [(str, str, str, int) or None]  # (owner, kind, callback, ns)
+    _next: int
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self._totals = {}
+        self._samples = [None] * self.capacity
+        self._next = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def dispatch(self, kind: str, callbacks, *arguments):
+        for callback in callbacks:
+            self.call(kind, callback, *arguments)
+
+    def call(self, kind: str, callback, *arguments):
+        start = _time.perf_counter_ns()
+        callback(*arguments)
+        duration = _time.perf_counter_ns() - start
+
+        owner = type(callback.__self__).__qualname__
+        totals = self._totals.get((owner, kind))
+
+        if totals is None:
+            totals = self._totals[(owner, kind)] = [0, 0, 0]
+
+        totals[0] += 1
+        totals[1] += duration
+
+        if duration > totals[2]:
+            totals[2] = duration
+
+        self._samples[self._next] = (owner, kind, callback.__name__, duration)
+        self._next = (self._next + 1) % self.capacity
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def statistics(self) -> [{str: object}]:
+        """Totals per owner class and event kind, slowest in total first. Durations in nanoseconds"""
+        statistics = [{
+            "owner": owner,
+            "kind": kind,
+            "calls": totals[0],
+            "total": totals[1],
+            "mean": totals[1] // totals[0],
+            "maximum": totals[2]
+        } for (owner, kind), totals in self._totals.items()]
+
+        statistics.sort(key=lambda entry: entry["total"], reverse=True)
+        return statistics
+
+    def recent(self) -> [{str: object}]:
+        """The calls in the ring buffer, oldest first"""
+        samples = self._samples[self._next:] + self._samples[:self._next]
+
+        return [{
+            "owner": sample[0],
+            "kind": sample[1],
+            "callback": sample[2],
+            "duration": sample[3]
+        } for sample in samples if sample is not None]
 
-        for callback in EventHandler.callbacks.update:
-            callback()()
+    def dump(self, path: str):
+        with open(path, "w") as file:
+            _json.dump({"statistics": self.statistics(), "recent": self.recent()}, file, indent=4)
@@ -15,6 +15,7 @@ class Info(Enum):
     Orientation = ""
     Click = ""
     Fonts = ""
+    TextRasters = ""
     UILabel = ""
     Style = ""
     UITabBarItem = ""
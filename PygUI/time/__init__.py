@@ -1,55 +1,505 @@
+from array import array as _array
+from collections import deque as _deque
+from math import ceil as _ceil
+from time import perf_counter as _perf_counter
+from time import perf_counter_ns as _perf_counter_ns
 from time import sleep as _sleep
 from time import time as _time
 import pygame
 from PygUI.UI.accesories import Fonts
-from PygUI.UI.accesories import UIText
+from PygUI.UI.accesories import TextRasters
+from PygUI.controller import DirtyRegions as _DirtyRegions
+from PygUI.controller import RenderNode as _RenderNode
+from PygUI.event import EventHandler as _EventHandler
+from PygUI.event import Scheduler  # The loop's timers: EventHandler.scheduler, drained by EventHandler.update()
+from PygUI.event import Timer
+
+
+class FrameTimings:
+    """
+    Durations of named phases, such as input, logic, render and present, over the last capacity frames. Kept in
+    nanoseconds, in one ring buffer per phase.
+    """
+
+    capacity: int
+    budget: int or None  # Nanoseconds the phases of one frame may take together. Frames above it are overruns
+
+    frames: int  # Frames ended so far
+    overruns: int  # Frames above budget so far
+
+    def __init__(self, capacity: int = 600):
+        self.capacity = capacity
+        self.budget = None
+
+        self.frames = 0
+        self.overruns = 0
+
+        self._phases = {}  # Phase name: durations
+        self._totals = _array("q", bytes(8 * capacity))
+
+        self._started = {}
+        self._current = {}
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def begin_phase(self, name: str):
+        self._started[name] = _perf_counter_ns()
+
+    def end_phase(self, name: str):
+        """A phase may run several times in a frame. Its durations are summed"""
+        duration = _perf_counter_ns() - self._started.pop(name)
+        self._current[name] = self._current.get(name, 0) + duration
+
+    def end_frame(self):
+        if not self._current:
+            return
+
+        index = self.frames % self.capacity
+        total = 0
+
+        for name, duration in self._current.items():
+            if name not in self._phases:
+                self._phases[name] = _array("q", bytes(8 * self.capacity))
+
+            total += duration
+
+        for name, durations in self._phases.items():
+            durations[index] = self._current.get(name, 0)
+
+        self._totals[index] = total
+
+        if self.budget is not None and total > self.budget:
+            self.overruns += 1
+
+        self.frames += 1
+        self._current.clear()
+
+    def last(self) -> {str: float}:
+        """Phase durations of the last ended frame, in milliseconds"""
+        if self.frames == 0:
+            return {}
+
+        index = (self.frames - 1) % self.capacity
+
+        return {name: durations[index] / 1e6 for name, durations in self._phases.items()}
+
+    def recent(self, count: int):
+        """Yields the durations of up to count of the latest frames, oldest first, in nanoseconds"""
+        count = min(count, self.frames, self.capacity)
+
+        for offset in range(count, 0, -1):
+            yield self._totals[(self.frames - offset) % self.capacity]
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def percentiles(self, name: str = None, percents: (int, ...) = (50, 95, 99)) -> [int]:
+        """Nearest-rank percentiles of a phase, or of whole frames if name is None, in nanoseconds"""
+        durations = self._totals if name is None else self._phases[name]
+        window = sorted(durations[:min(self.frames, self.capacity)])
+
+        if not window:
+            return [0 for _ in percents]
+
+        return [window[max(_ceil(window.__len__() * percent / 100) - 1, 0)] for percent in percents]
+
+    def report(self) -> {str: {str: float}}:
+        """p50, p95, p99 and max of every phase and of whole frames, in milliseconds, over the kept frames"""
+        report = {}
+
+        for name in list(self._phases) + [None]:
+            p50, p95, p99, p100 = self.percentiles(name, (50, 95, 99, 100))
+            report[name if name is not None else "frame"] = \
+                {"p50": p50 / 1e6, "p95": p95 / 1e6, "p99": p99 / 1e6, "max": p100 / 1e6}
+
+        kept = self._totals[:min(self.frames, self.capacity)]
+        report["frame"]["overruns"] = sum(1 for total in kept if total > self.budget) if self.budget else 0
+
+        return report
+
+    def summary(self) -> str:
+        lines = ["{:<12}{:>10}{:>10}{:>10}{:>10}".format("phase (ms)", "p50", "p95", "p99", "max")]
+
+        for name, values in self.report().items():
+            lines.append("{:<12}{:>10.3f}{:>10.3f}{:>10.3f}{:>10.3f}".format(
+                name, values["p50"], values["p95"], values["p99"], values["max"]))
+
+        lines.append("{} of {} frames over budget".format(self.overruns, self.frames))
+
+        return "\n".join(lines)
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class FrameHistory:
+    """
+    Durations of the last capacity loops, in milliseconds, and whether each was a jank, in array ring buffers. The sum
+    and a histogram are kept up to date alongside, so the statistics are read without sorting or allocating.
+    """
+
+    capacity: int
+    bin_width: float  # Milliseconds per histogram bin. The last bin takes everything longer
+    histogram: _array  # Loops per bin. Read only
+
+    count: int  # Durations kept, at most capacity
+    total: float  # Sum of the durations kept
+
+    def __init__(self, capacity: int = 600, bin_width: float = 1.0, bins: int = 100):
+        self.capacity = capacity
+        self.bin_width = bin_width
+        self.histogram = _array("l", bytes(_array("l").itemsize * (bins + 1)))
+
+        self.count = 0
+        self.total = 0.0
+
+        self._durations = _array("d", bytes(8 * capacity))
+        self._janks = bytearray(capacity)
+        self._next = 0
+
+    def add(self, duration: float, jank: bool = False):
+        if self.count == self.capacity:
+            evicted = self._durations[self._next]
+            self.histogram[self._bin(evicted)] -= 1
+            self.total -= evicted
+
+        else:
+            self.count += 1
+
+        self._durations[self._next] = duration
+        self._janks[self._next] = jank
+        self._next = (self._next + 1) % self.capacity
+
+        self.histogram[self._bin(duration)] += 1
+        self.total += duration
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Upper edge of the histogram bin holding the nearest-rank percentile, or 0 without durations. Durations past
+        the last bin give its lower edge
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = max(_ceil(self.count * percent / 100), 1)
+        last = self.histogram.__len__() - 1
+
+        for index in range(last + 1):
+            rank -= self.histogram[index]
+
+            if rank <= 0:
+                return min(index + 1, last) * self.bin_width
+
+        return last * self.bin_width
+
+    def recent(self, count: int):
+        """Yields up to count of the latest (duration, jank), oldest first"""
+        count = min(count, self.count)
+
+        for offset in range(count, 0, -1):
+            index = (self._next - offset) % self.capacity
+            yield self._durations[index], bool(self._janks[index])
+
+    def _bin(self, duration: float) -> int:
+        return min(int(duration / self.bin_width), self.histogram.__len__() - 1)
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class FrameOverlay(_RenderNode):
+    """
+    Loop rate and a graph of recent loop durations from FrameHistory, drawn over the UI. Rasterized only when Clock
+    hands it new numbers, once per second, and kept as a surface in between. It's translucent, so it keeps the pixels
+    it was drawn over: erase() puts them back before the UI renders again, so the overlay isn't blended over itself.
+    """
+
+    position: (int, int)
+    color: [3]
+    jank_color: [3]  # Bars of janks
+    font: pygame.font.Font
+
+    def __init__(self, position: (int, int) = (0, 0), size: (int, int) = (240, 80)):
+        self.position = position
+        self.color = (255, 255, 255)
+        self.jank_color = (255, 80, 80)
+        self.font = Fonts.get("monospace", 20)
+
+        self._surface = pygame.Surface(size, pygame.SRCALPHA)
+        self._numbers = None
+
+        self._under = pygame.Surface(size)
+        self._drawn = None  # (surface, its size, area) the overlay was last drawn over
+
+    def update(self, lps: int, history: FrameHistory, jank: float):
+        """Called by Clock with the numbers to show. The graph's height is jank, a loop duration in milliseconds"""
+        numbers = (lps, history.percentile(50), history.percentile(95))
+
+        if numbers == self._numbers:
+            return
+
+        self._numbers = numbers
+
+        width, height = self._surface.get_size()
+        text_height = self.font.get_linesize()
+
+        self._surface.fill((0, 0, 0, 140))
+        self._surface.blit(
+            TextRasters.render(self.font, "{} lps  p50 {:.0f}  p95 {:.0f} ms".format(*numbers), self.color), (4, 2))
+
+        # One pixel per loop. Janks are the loops Clock flagged
+        graph = height - text_height - 4
+        scale = graph / jank
+        x = width - min(history.count, width)
+
+        for duration, janked in history.recent(width):
+            bar = min(int(duration * scale), graph)
+            color = self.jank_color if janked else self.color
+            pygame.draw.line(self._surface, color, (x, height - 1), (x, height - 1 - bar))
+            x += 1
+
+        self._dirty = True  # Not invalidate(): the overlay's numbers changing isn't activity
+
+    def render(self, surface: pygame.Surface):
+        area = pygame.Rect(self.position, self._surface.get_size()).clip(surface.get_rect())
+
+        if self._dirty:
+            _DirtyRegions.add(area)  # New numbers. Otherwise it's blended again over what the UI reported
+
+        self._dirty = False
+        self._under.blit(surface, (0, 0), area)
+        self._drawn = (surface, surface.get_size(), area)
+
+        surface.blit(self._surface, self.position)
+
+    def erase(self, surface: pygame.Surface):
+        """Puts back the pixels the overlay was drawn over, unless surface was replaced or resized since"""
+        if self._drawn is None:
+            return
+
+        drawn, size, area = self._drawn
+        self._drawn = None
+
+        if drawn is surface and surface.get_size() == size:
+            surface.blit(self._under, area, (0, 0, area.width, area.height))
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class FramePacing:
+    """
+    Loop rate policy for Clock. Runs at the requested rate during input or animation (see EventHandler.active_at and
+    RenderNode.invalidated_at), then decays toward idle_rate. Runs at background_rate without input focus, and
+    suspends while the window is minimized or hidden.
+    """
+
+    ACTIVE = "active"
+    IDLE = "idle"
+    BACKGROUND = "background"
+    SUSPENDED = "suspended"
+
+    idle_rate: int
+    background_rate: int
+    idle_after: float  # Seconds without activity before the rate decays
+    decay: float  # Seconds the rate takes to fall to idle_rate
+
+    state: str
+
+    def __init__(self, idle_rate: int = 15, background_rate: int = 5, idle_after: float = 0.5, decay: float = 1.0):
+        self.idle_rate = idle_rate
+        self.background_rate = background_rate
+        self.idle_after = idle_after
+        self.decay = decay
+
+        self.state = FramePacing.ACTIVE
+
+        self._focused = True
+        self._minimized = False
+        self._hidden = False
+
+        # Window events are never filtered, so these work on every video driver, headless included
+        _EventHandler.callbacks.add.event(pygame.WINDOWFOCUSGAINED, self._focus_gained)
+        _EventHandler.callbacks.add.event(pygame.WINDOWFOCUSLOST, self._focus_lost)
+        _EventHandler.callbacks.add.event(pygame.WINDOWMINIMIZED, self._minimized_changed)
+        _EventHandler.callbacks.add.event(pygame.WINDOWRESTORED, self._minimized_changed)
+        _EventHandler.callbacks.add.event(pygame.WINDOWHIDDEN, self._hidden_changed)
+        _EventHandler.callbacks.add.event(pygame.WINDOWSHOWN, self._hidden_changed)
+
+    def rate(self, loops_per_second: int) -> int:
+        """Updates state, and returns the loop rate for it. loops_per_second is the active rate"""
+        if self._minimized or self._hidden:
+            self.state = FramePacing.SUSPENDED
+            return 0
+
+        if not self._focused:
+            self.state = FramePacing.BACKGROUND
+            return min(self.background_rate, loops_per_second)
+
+        # Input, and any render node changing, such as a running animation, keep the rate up
+        quiet = _perf_counter() - max(_EventHandler.active_at, _RenderNode.invalidated_at) - self.idle_after
+
+        if quiet <= 0:
+            self.state = FramePacing.ACTIVE
+            return loops_per_second
+
+        self.state = FramePacing.IDLE
+        decayed = min(quiet / self.decay, 1.0) if self.decay > 0 else 1.0
+
+        return max(int(loops_per_second + (self.idle_rate - loops_per_second) * decayed), 1)
+
+    def _focus_gained(self, _):
+        self._focused = True
+
+    def _focus_lost(self, _):
+        self._focused = False
+
+    def _minimized_changed(self, event: pygame.event.Event):
+        self._minimized = event.type == pygame.WINDOWMINIMIZED
+
+    def _hidden_changed(self, event: pygame.event.Event):
+        self._hidden = event.type == pygame.WINDOWHIDDEN
+
+# ----------------------------------------------------------------------------------------------------------------------
 
 
 class Clock:
 
-    _last_frame_time: int
+    _last_frame_time: int  # perf_counter_ns()
     _last_time: int
-    delta: float
+    delta: float  # Milliseconds each logic update advances. The measured elapsed time, unless fixed_rate is set
+    elapsed: float  # Milliseconds since the previous loop
     framecount: int
     lps: int
 
+    idle: bool  # Sleep in synchronize_loop() until an event arrives, or EventHandler.request_frame() is called
+    idle_timeout: int or None  # Longest idle sleep, in milliseconds. None sleeps until an event
+
+    # Fixed-timestep mode: logic updates per second, independent of the loop rate. Run 'steps' logic updates after
+    # every synchronize_loop(), each advancing delta
+    fixed_rate: int or None
+    max_steps: int  # Most logic updates per loop. Time beyond them is dropped, so a slow frame can't snowball
+    steps: int
+    accumulator: float  # Milliseconds not yet simulated
+
+    # Share of a fixed step simulated ahead of what's rendered, for render() to interpolate with. 1 without fixed_rate
+    alpha: float
+
+    timings: FrameTimings  # Phases marked by begin_phase() and end_phase(). Frames end in synchronize_loop()
+
+    history: FrameHistory  # elapsed of every loop, and whether it was a jank
+    jank_threshold: float  # Loops taking longer than this many frame budgets are janks
+    janks: _deque  # Latest janks, as (frame, elapsed, phase durations of the frame), in milliseconds
+    overlay: FrameOverlay or None  # Updated once per second. Render with render_overlay()
+
+    pacing: FramePacing or None  # Lowers the loop rate while nothing happens. Replays ignore it
+    presenting: bool  # False while pacing is suspended: skip logic, rendering and presentation
+
     def __init__(self):
-        self._last_frame_time = int(_time() * 100)
-        self._last_time = int(_time() * 100)
+        self._last_frame_time = _perf_counter_ns()
+        self._last_time = self._last_frame_time
         self.delta = None
+        self.elapsed = None
         self.frameCount = 0
         self.lps = 0
 
+        self.idle = False
+        self.idle_timeout = None
+
+        self.fixed_rate = None
+        self.max_steps = 5
+        self.steps = 1
+        self.accumulator = 0.0
+        self.alpha = 1.0
+
+        self.timings = FrameTimings()
+
+        self.pacing = None
+        self.presenting = True
+
+        self.history = FrameHistory()
+        self.jank_threshold = 2.0
+        self.janks = _deque(maxlen=64)
+        self.overlay = None
+
         self.pygame_clock = pygame.time.Clock()
-        self.lps_text = UIText()
-        self.lps_text.font = Fonts.get("monospace", 40)
-        self.lps_text.position = [1000, 140]
 
         # Test
         self.old_time = pygame.time.get_ticks()
         self.old = _time()
 
-        self.t = 0.0
-        self.dt = 0.01
+    def synchronize_loop(self, loops_per_second: int):
+        self.timings.end_frame()
+        self.timings.budget = 1000000000 // loops_per_second
+
+        self.presenting = True
+        budget = 1000 / loops_per_second
 
-        self.current_time = _time()
-        self.accumulator = 0.0
+        if self.pacing is not None and _EventHandler.replay_source is None:
+            loops_per_second = self.pacing.rate(loops_per_second)
 
-    def synchronize_loop(self, loops_per_second: int):
-        self.pygame_clock.tick(loops_per_second)
+            if self.pacing.state == FramePacing.SUSPENDED:
+                # Only events are handled, so the window being restored or closed is noticed
+                self.presenting = False
+
+                if not _EventHandler.wait(500):
+                    _sleep(0.05)  # Something kept wait() from blocking, like a button held when the window went away
 
-        current_frame_time = int(_time() * 100)
-        self.delta = (current_frame_time * 10 - self._last_frame_time * 10)
-        # sleep = (loops_per_second - self.delta) * 6
+                # Time spent suspended isn't simulated
+                self._last_frame_time = _perf_counter_ns()
+                self.elapsed = 0.0
+                self.steps = 0
+                return
+
+        if _EventHandler.replay_source is not None:
+            # Replays run as fast as possible, on the recorded deltas
+            self.elapsed = _EventHandler.replay_source.advance()
+            self._last_frame_time = _perf_counter_ns()
+
+        else:
+            if self.idle and _EventHandler.wait(self.idle_timeout):
+                # Time spent idle isn't simulated. The frame that follows gets the delta of one regular loop
+                self._last_frame_time = _perf_counter_ns() - 1000000000 // loops_per_second
+
+            self.pygame_clock.tick(loops_per_second)
+
+            current_frame_time = _perf_counter_ns()
+            self.elapsed = (current_frame_time - self._last_frame_time) / 1000000
+            self._last_frame_time = current_frame_time
+
+        if _EventHandler.recorder is not None:
+            _EventHandler.recorder.delta = self.elapsed
+
+        if self.fixed_rate is None:
+            self.delta = self.elapsed
+            self.steps = 1
+            self.alpha = 1.0
+
+        else:
+            step = 1000 / self.fixed_rate
+
+            self.accumulator = min(self.accumulator + (self.elapsed or 0.0), step * self.max_steps)
+            self.steps = int(self.accumulator // step)
+            self.accumulator -= self.steps * step
+
+            self.delta = step
+            self.alpha = self.accumulator / step
+
+        if self.elapsed is not None:
+            # Measured against the rate the loop was paced at, so slowing down on purpose isn't jank
+            jank = self.elapsed > self.jank_threshold * 1000 / loops_per_second
+            self.history.add(self.elapsed, jank)
+
+            if jank:
+                self.janks.append((self.timings.frames, self.elapsed, self.timings.last()))
 
         self.frameCount += 1
-        if self._last_frame_time - self._last_time >= 100:
-            self._last_time = int(_time() * 100)
+        if self._last_frame_time - self._last_time >= 1000000000:
+            self._last_time = self._last_frame_time
             self.lps = self.frameCount
             self.frameCount = 0
-        # if not sleep <= 0:
-        #     time.sleep(1 / sleep)
-        self._last_frame_time = int(_time() * 100)
+
+            if self.overlay is not None:
+                self.overlay.update(self.lps, self.history, self.jank_threshold * budget)
 
     def test(self):
         new_time = pygame.time.get_ticks()
@@ -58,10 +508,23 @@ class Clock:
         if waited < 60:
             _sleep(1.0 / (60 - waited))
 
+    def begin_phase(self, name: str):
+        self.timings.begin_phase(name)
+
+    def end_phase(self, name: str):
+        self.timings.end_phase(name)
+
     def restart(self):
-        self._last_frame_time = int(_time() * 100)
+        self._last_frame_time = _perf_counter_ns()
         self.delta = None
+        self.elapsed = None
+        self.accumulator = 0.0
+
+    def render_overlay(self, surface: pygame.Surface):
+        if self.overlay is not None:
+            self.overlay.render(surface)
 
-    def render_lps(self, surface: pygame.Surface):
-        self.lps_text.text = str(self.lps)
-        self.lps_text.render(surface)
+    def erase_overlay(self, surface: pygame.Surface):
+        """Call before rendering into surface again, when the overlay was rendered over it"""
+        if self.overlay is not None:
+            self.overlay.erase(surface)
@@ -0,0 +1,616 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import random
+import unittest
+
+import pygame
+
+from PygUI.UI.accesories import Fonts
+from PygUI.UI.accesories import Orientation
+from PygUI.UI.accesories import TextBuffer
+from PygUI.UI.accesories import TextRasters
+from PygUI.UI.accesories import UIButton
+from PygUI.UI.accesories import UITabBar
+from PygUI.UI.accesories import UITabBarItem
+from PygUI.UI.accesories import UIInteractiveText
+from PygUI.UI.accesories import UIText
+from PygUI.UI.accesories import UITextBlock
+from PygUI.UI.accesories import _PrefixSums
+from PygUI.controller import DirtyRegions
+from PygUI.event import EventHandler
+
+
+class AccesoriesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.init()
+        self.display = pygame.display.set_mode((640, 480))
+        EventHandler.init()
+        pygame.event.clear()
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class UIButtonTests(AccesoriesTestCase):
+
+    def click(self, position: (int, int)):
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=position))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, button=1, pos=position))
+        EventHandler.update()
+
+    def region(self, button: UIButton) -> (int, int, int, int):
+        return EventHandler.hit_test._regions[id(button)].rectangle
+
+    def test_assigning_size_moves_the_region(self):
+        button = UIButton()
+        button.size = [200, 300, 80, 40]
+
+        self.assertEqual(self.region(button), (200, 300, 80, 40))
+        self.assertEqual(EventHandler.hit_test.at(210, 310), [id(button)])
+        self.assertEqual(EventHandler.hit_test.at(10, 10), [])
+
+    def test_assigning_position_moves_the_region(self):
+        button = UIButton(size=(0, 0, 90, 50))
+        button.position = (400, 100)
+
+        self.assertEqual(button.size, [400, 100, 90, 50])
+        self.assertEqual(self.region(button), (400, 100, 90, 50))
+
+    def test_update_offsets_the_region(self):
+        button = UIButton(size=(10, 10, 90, 50))
+        button.update(0, 80)
+
+        self.assertEqual(self.region(button), (10, 90, 90, 50))
+
+    def test_clicks_run_the_command(self):
+        clicked = []
+
+        class Target:
+            def command(self, *parameters):
+                clicked.append(parameters)
+
+        target = Target()
+        button = UIButton(size=(100, 100, 90, 50), command=target.command)
+
+        self.click((10, 10))
+        self.assertEqual(clicked, [])
+
+        self.click((120, 120))
+        self.assertEqual(clicked.__len__(), 1)
+
+        button.position = (0, 0)
+        self.click((10, 10))
+        self.assertEqual(clicked.__len__(), 2)
+
+    def test_inoperative_buttons_have_no_region(self):
+        button = UIButton(size=(0, 0, 90, 50))
+        button.operative = False
+
+        self.assertEqual(EventHandler.hit_test.at(10, 10), [])
+
+    def test_changed_properties_invalidate_and_report_the_button(self):
+        button = UIButton(size=(10, 20, 90, 50), text="button")
+        button.render(self.display)
+        DirtyRegions.enabled = True
+        DirtyRegions.take()
+
+        try:
+            for name, value in (("color", (1, 2, 3)), ("text", "other"), ("text_color", (4, 5, 6)),
+                                ("font", pygame.font.Font(None, 30))):
+                setattr(button, name, value)
+
+                self.assertTrue(button.dirty, name)
+                self.assertEqual(DirtyRegions.take(), [pygame.Rect(10, 20, 90, 50)], name)
+                button.render(self.display)
+
+        finally:
+            DirtyRegions.enabled = False
+
+    def test_unchanged_properties_dont_invalidate(self):
+        button = UIButton(text="button", color=[1, 2, 3])
+        button.render(self.display)
+
+        button.text = "button"
+        button.color = [1, 2, 3]
+        button.update(0, 0)
+
+        self.assertFalse(button.dirty)
+
+
+class UITabBarTests(AccesoriesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.bar = UITabBar(pygame.Surface((300, 40)), [UITabBarItem(str(i), None) for i in range(3)])
+
+    region = UIButtonTests.region
+
+    def test_items_are_registered_where_they_are_drawn(self):
+        self.assertEqual([self.region(item) for item in self.bar._items],
+                         [(0, 0, 100, 40), (100, 0, 100, 40), (200, 0, 100, 40)])
+
+    def test_resizing_moves_the_regions(self):
+        self.bar.update_dimensions([600, 40])
+
+        self.assertEqual(self.region(self.bar._items[2]), (400, 0, 200, 40))
+        self.assertEqual(EventHandler.hit_test.at(450, 10), [id(self.bar._items[2])])
+
+
+class FontsTests(AccesoriesTestCase):
+    """Sizes from 100 up aren't used anywhere else, and are dropped from Fonts afterwards"""
+
+    def setUp(self):
+        super().setUp()
+        self.capacity = Fonts.capacity
+
+    def tearDown(self):
+        Fonts.capacity = self.capacity
+
+        for key in [key for key in Fonts._loaded if key[1] >= 100]:
+            font = Fonts._loaded.pop(key)
+            Fonts.fonts.remove((font, key[0], key[1]))
+
+        Fonts._declared = {key for key in Fonts._declared if key[1] < 100}
+
+    def test_fonts_are_loaded_once(self):
+        font = Fonts.get(None, 100)
+
+        self.assertIs(Fonts.get(None, 100), font)
+        self.assertIs(Fonts.default(100), font)
+        self.assertEqual(Fonts.key(font), (None, 100))
+        self.assertEqual([entry for entry in Fonts.fonts if entry[0] is font], [(font, None, 100)])
+
+    def test_least_recently_requested_fonts_are_dropped(self):
+        Fonts.capacity = Fonts._loaded.__len__() + 2
+        first = Fonts.get(None, 100)
+        Fonts.get(None, 101)
+        Fonts.get(None, 100)
+        Fonts.get(None, 102)
+
+        self.assertNotIn((None, 101), Fonts._loaded)
+        self.assertIs(Fonts.get(None, 100), first)
+        self.assertNotIn(101, [size for _, _, size in Fonts.fonts])
+
+    def test_declared_fonts_are_kept(self):
+        Fonts.capacity = Fonts._loaded.__len__() + 1
+        kept = Fonts.add(None, 100)
+        Fonts.get(None, 101)
+        Fonts.get(None, 102)
+
+        self.assertIs(Fonts._loaded.get((None, 100)), kept)
+        self.assertNotIn((None, 101), Fonts._loaded)
+
+    def test_preloading_loads_one_font_per_update(self):
+        Fonts.preload((None, 100), (None, 101))
+
+        self.assertNotIn((None, 100), Fonts._loaded)
+
+        EventHandler.update()
+        self.assertIn((None, 100), Fonts._loaded)
+        self.assertNotIn((None, 101), Fonts._loaded)
+
+        EventHandler.update()
+        self.assertIn((None, 101), Fonts._loaded)
+
+    def test_preloaded_fonts_asked_for_early_are_loaded_once(self):
+        Fonts.preload((None, 100))
+        font = Fonts.get(None, 100)
+
+        EventHandler.update()
+
+        self.assertIs(Fonts.get(None, 100), font)
+        self.assertEqual([size for _, _, size in Fonts.fonts].count(100), 1)
+
+
+class TextRastersTests(AccesoriesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        TextRasters.clear()
+        self.byte_budget = TextRasters.byte_budget
+        self.font = Fonts.get(None, 23)
+
+    def tearDown(self):
+        TextRasters.byte_budget = self.byte_budget
+        TextRasters.clear()
+
+    def test_equal_text_is_rendered_once(self):
+        hits, misses = TextRasters.hits, TextRasters.misses
+
+        first = TextRasters.render(self.font, "text", (0, 0, 0))
+        second = TextRasters.render(self.font, "text", (0, 0, 0))
+
+        self.assertIs(first, second)
+        self.assertEqual((TextRasters.hits - hits, TextRasters.misses - misses), (1, 1))
+
+    def test_rasters_are_keyed_by_color_and_antialiasing(self):
+        black = TextRasters.render(self.font, "text", (0, 0, 0))
+
+        self.assertIsNot(TextRasters.render(self.font, "text", (255, 0, 0)), black)
+        self.assertIsNot(TextRasters.render(self.font, "text", (0, 0, 0), False), black)
+
+    def test_rasters_are_keyed_by_font_name_and_size(self):
+        TextRasters.render(self.font, "text", (0, 0, 0))
+
+        self.assertEqual(list(TextRasters._rasters)[0][0], (None, 23))
+
+    def test_rasters_are_keyed_by_font_style(self):
+        regular = TextRasters.render(self.font, "text", (0, 0, 0))
+        self.font.set_bold(True)
+
+        try:
+            bold = TextRasters.render(self.font, "text", (0, 0, 0))
+
+        finally:
+            self.font.set_bold(False)
+
+        self.assertIsNot(bold, regular)
+        self.assertIs(TextRasters.render(self.font, "text", (0, 0, 0)), regular)
+
+    def test_fonts_from_elsewhere_are_not_cached(self):
+        font = pygame.font.Font(None, 23)
+
+        self.assertIsNot(TextRasters.render(font, "text", (0, 0, 0)), TextRasters.render(font, "text", (0, 0, 0)))
+        self.assertEqual(TextRasters._rasters.__len__(), 0)
+
+    def test_least_recently_drawn_rasters_are_dropped_over_budget(self):
+        # Rasters of one string in different colors take equal bytes
+        red = TextRasters.render(self.font, "text", (255, 0, 0))
+        TextRasters.byte_budget = TextRasters.byte_count * 2
+        TextRasters.render(self.font, "text", (0, 255, 0))
+        TextRasters.render(self.font, "text", (255, 0, 0))
+        TextRasters.render(self.font, "text", (0, 0, 255))
+
+        self.assertEqual([key[3] for key in TextRasters._rasters], [(255, 0, 0), (0, 0, 255)])
+        self.assertIs(TextRasters.render(self.font, "text", (255, 0, 0)), red)
+        self.assertLessEqual(TextRasters.byte_count, TextRasters.byte_budget)
+
+
+class UITextTests(AccesoriesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        DirtyRegions.enabled = True
+
+        self.text = UIText(text="text", position=(100, 100), horizontal_alignment=Orientation.Right,
+                           vertical_alignment=Orientation.Below)
+        self.text.render(self.display)
+        DirtyRegions.take()
+
+    def tearDown(self):
+        DirtyRegions.enabled = False
+
+    def test_unchanged_values_dont_invalidate(self):
+        self.text.batch_update(text="text", position=[100, 100], text_color=(255, 255, 255))
+
+        self.assertFalse(self.text.dirty)
+
+    def test_changes_are_laid_out_once_on_render(self):
+        self.text.batch_update(text="other", position=(50, 50))
+
+        self.assertTrue(self.text.dirty)
+        self.assertIsNone(self.text._rendered_text)
+
+        self.text.render(self.display)
+        self.assertEqual(self.text._drawn[:2], (50, 50))
+
+    def test_invalid_batches_change_nothing(self):
+        with self.assertRaises(AttributeError):
+            self.text.batch_update(text="other", size=10)
+
+        self.assertEqual(self.text.text, "text")
+
+    def test_moving_reports_where_the_text_was_and_is(self):
+        width, height = self.text._drawn[2:]
+        self.text.position = (200, 100)
+        self.text.render(self.display)
+
+        self.assertEqual(DirtyRegions.take(), [pygame.Rect(100, 100, width, height),
+                                               pygame.Rect(200, 100, width, height)])
+
+    def test_rectangles_on_subsurfaces_are_in_display_coordinates(self):
+        text = UIText(text="text", position=(0, 0), horizontal_alignment=Orientation.Right,
+                      vertical_alignment=Orientation.Below)
+        text.render(self.display.subsurface((30, 40, 200, 100)))
+
+        self.assertEqual(DirtyRegions.take()[0].topleft, (30, 40))
+
+    def test_off_screen_surfaces_report_everything(self):
+        self.text.text = "other"
+        self.text.render(pygame.Surface((640, 480)))
+
+        self.assertIsNone(DirtyRegions.take())
+
+
+class UITextBlockTests(AccesoriesTestCase):
+
+    TEXT = "the quick brown fox jumps over the lazy dog " * 4
+
+    def setUp(self):
+        super().setUp()
+        self.block = UITextBlock(text=self.TEXT.strip() + "\nsecond paragraph", width=200)
+        self.font = self.block.font
+
+    def lines(self) -> [[str]]:
+        self.block.render(self.display)
+        return [paragraph.lines for paragraph in self.block._paragraphs]
+
+    def test_lines_fit_the_width(self):
+        lines = self.lines()
+
+        self.assertGreater(lines[0].__len__(), 1)
+        self.assertEqual(" ".join(lines[0]), self.TEXT.strip())
+
+        for line in lines[0]:
+            self.assertLessEqual(self.font.size(line)[0], 200)
+
+    def test_lines_are_as_long_as_they_fit(self):
+        lines = self.lines()[0]
+
+        for line, following in zip(lines, lines[1:]):
+            self.assertGreater(self.font.size(line + " " + following.split(" ")[0])[0], 200)
+
+    def test_line_feeds_start_paragraphs(self):
+        self.assertEqual(self.lines()[1], ["second paragraph"])
+
+    def test_wide_words_overflow_their_own_line(self):
+        self.block.text = "a " + "w" * 80 + " b"
+
+        self.assertEqual(self.lines(), [["a", "w" * 80, "b"]])
+
+    def test_height_counts_every_line(self):
+        lines = self.lines()
+
+        self.assertEqual(self.block.height, (lines[0].__len__() + 1) * self.font.get_linesize())
+
+    def test_editing_rewraps_only_changed_paragraphs(self):
+        self.lines()
+        first = self.block._paragraphs[0]
+
+        self.block.text = self.TEXT.strip() + "\nchanged"
+        self.lines()
+
+        self.assertIs(self.block._paragraphs[0], first)
+        self.assertEqual(self.block._paragraphs[1].lines, ["changed"])
+
+    def test_widths_the_breaks_hold_for_dont_rewrap(self):
+        self.lines()
+        paragraph = self.block._paragraphs[0]
+        lines = paragraph.lines
+
+        self.block.width = paragraph.low
+        self.lines()
+        self.assertIs(paragraph.lines, lines)
+
+        self.block.width = paragraph.high
+        self.lines()
+        self.assertIsNot(paragraph.lines, lines)
+
+    def test_only_lines_within_the_clip_are_rasterized(self):
+        self.display.set_clip((0, 0, 640, self.font.get_linesize()))
+        self.lines()
+        self.display.set_clip(None)
+
+        rasters = self.block._paragraphs[0].rasters
+        self.assertIsNotNone(rasters[0])
+        self.assertEqual(rasters[1:], [None] * (rasters.__len__() - 1))
+
+    def test_moving_reports_where_the_block_was_and_is(self):
+        DirtyRegions.enabled = True
+
+        try:
+            self.block.render(self.display)
+            before = pygame.Rect(0, 0, 200, self.block.height)
+            self.assertEqual(DirtyRegions.take(), [before])
+
+            self.block.position = (20, 30)
+            self.block.render(self.display)
+            self.assertEqual(DirtyRegions.take(), [before, before.move(20, 30)])
+
+            self.block.batch_update(position=(20, 30), text=self.block.text)
+            self.block.render(self.display)
+            self.assertEqual(DirtyRegions.take(), [])
+
+        finally:
+            DirtyRegions.enabled = False
+
+    def test_overflowing_words_widen_the_bounds(self):
+        word = "w" * 80
+        self.block.batch_update(text="a " + word, alignment=Orientation.Right)
+        self.block.render(self.display)
+
+        overflow = self.font.size(word)[0] - 200
+        self.assertEqual(self.block._drawn, (-overflow, 0, self.font.size(word)[0], self.block.height))
+
+
+class PrefixSumsTests(unittest.TestCase):
+
+    def test_matches_summing_a_list(self):
+        values = [random.Random(i).randrange(0, 20) for i in range(100)]
+        sums = _PrefixSums(values)
+
+        for index in (0, 17, 63, 99):
+            sums.add(index, 5)
+            values[index] += 5
+
+        for count in range(101):
+            self.assertEqual(sums.prefix(count), sum(values[:count]))
+
+        for x in range(0, sum(values) + 10, 7):
+            expected = max(count for count in range(101) if sum(values[:count]) <= x)
+            self.assertEqual(sums.search(x), expected)
+
+
+class TextBufferTests(AccesoriesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.font = Fonts.default(20)
+
+    def width(self, text: str) -> int:
+        """Width of text as drawn a word at a time, long words a chunk at a time"""
+        words = text.split(" ")
+        chunk = TextBuffer.CHUNK
+        chunks = [word[i:i + chunk] for word in words for i in range(0, word.__len__(), chunk)]
+
+        return sum(self.font.size(part)[0] for part in chunks) + (words.__len__() - 1) * self.font.size(" ")[0]
+
+    def assertMeasured(self, buffer: TextBuffer, text: str):
+        self.assertEqual(str(buffer), text)
+        self.assertEqual(buffer.__len__(), text.__len__())
+
+        for index in range(text.__len__() + 1):
+            self.assertEqual(buffer.offset(index), self.width(text[:index]))
+
+    def test_edits_anywhere_keep_text_and_offsets(self):
+        generator = random.Random(25)
+        buffer = TextBuffer(self.font, "hello world")
+        text = "hello world"
+
+        for _ in range(200):
+            if text and generator.random() < 0.4:
+                start = generator.randrange(text.__len__())
+                end = min(start + generator.randrange(1, 4), text.__len__())
+                buffer.delete(start, end)
+                text = text[:start] + text[end:]
+
+            else:
+                index = generator.randrange(text.__len__() + 1)
+                inserted = "".join(generator.choice("ab WVfi") for _ in range(generator.randrange(1, 6)))
+                buffer.insert(index, inserted)
+                text = text[:index] + inserted + text[index:]
+
+            self.assertMeasured(buffer, text)
+
+        self.assertEqual(buffer.width, self.width(text))
+
+    def test_long_text_grows_the_buffer(self):
+        text = "word " * 100
+        buffer = TextBuffer(self.font)
+        buffer.insert(0, text)
+
+        self.assertMeasured(buffer, text)
+
+    def test_long_words_are_measured_in_chunks(self):
+        measured = []
+
+        class Font:
+            """Counts the characters measured"""
+            def size(_, text: str) -> (int, int):
+                measured.append(text.__len__())
+                return self.font.size(text)
+
+        word = "".join(random.Random(3).choice("abcWVfi") for _ in range(200))
+        buffer = TextBuffer(Font(), word)
+        self.assertLessEqual(sum(measured), (word.__len__() + 1) * TextBuffer.CHUNK)
+
+        measured.clear()
+        buffer.insert(150, "xyz")
+        self.assertLessEqual(sum(measured), (word.__len__() - 150 + 4) * TextBuffer.CHUNK)
+
+        text = word[:150] + "xyz" + word[150:]
+        self.assertMeasured(buffer, text)
+
+    def test_index_at_finds_the_nearest_caret(self):
+        buffer = TextBuffer(self.font, "caret placement")
+
+        for index in range(buffer.__len__() + 1):
+            self.assertEqual(buffer.index_at(buffer.offset(index)), index)
+
+        self.assertEqual(buffer.index_at(buffer.offset(3) + 1), 3)
+        self.assertEqual(buffer.index_at(buffer.offset(4) - 1), 4)
+        self.assertEqual(buffer.index_at(-10), 0)
+        self.assertEqual(buffer.index_at(buffer.width + 10), buffer.__len__())
+
+    def test_changing_the_font_measures_again(self):
+        buffer = TextBuffer(self.font, "some text")
+        self.font = Fonts.default(40)
+        buffer.font = self.font
+
+        self.assertMeasured(buffer, "some text")
+
+
+class UIInteractiveTextTests(AccesoriesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        DirtyRegions.enabled = True
+
+        self.field = UIInteractiveText(text="hello", position=(100, 100), horizontal_alignment=Orientation.Right,
+                                       vertical_alignment=Orientation.Below)
+        self.assertTrue(self.field.active)  # Operative text is active once EventHandler runs
+
+    def tearDown(self):
+        DirtyRegions.enabled = False
+
+    def type(self, *keys: (int, str), mod: int = 0):
+        for key, unicode in keys:
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=mod, unicode=unicode))
+
+        EventHandler.update()
+
+    def test_typing_inserts_at_the_cursor(self):
+        self.field.cursor = 0
+        self.type((pygame.K_a, "a"), (pygame.K_b, "b"))
+
+        self.assertEqual(self.field.text, "abhello")
+        self.assertEqual(self.field.cursor, 2)
+
+    def test_backspace_and_delete(self):
+        self.field.cursor = 2
+        self.type((pygame.K_BACKSPACE, ""), (pygame.K_DELETE, ""))
+
+        self.assertEqual(self.field.text, "hlo")
+        self.assertEqual(self.field.cursor, 1)
+
+    def test_typing_replaces_the_selection(self):
+        self.type((pygame.K_LEFT, ""), (pygame.K_LEFT, ""), mod=pygame.KMOD_SHIFT)
+
+        self.assertEqual(self.field.selection, (3, 5))
+
+        self.type((pygame.K_p, "p"))
+        self.assertEqual(self.field.text, "help")
+        self.assertIsNone(self.field.selection)
+
+    def test_arrows_collapse_the_selection(self):
+        self.field.select(1, 3)
+        self.type((pygame.K_LEFT, ""))
+
+        self.assertEqual((self.field.cursor, self.field.selection), (1, None))
+
+    def test_inactive_text_ignores_keys(self):
+        self.field.active = False
+        self.type((pygame.K_a, "a"))
+
+        self.assertEqual(self.field.text, "hello")
+
+    def test_clicks_place_the_cursor(self):
+        self.field.render(self.display)
+        x = self.field._origin()[0] + self.field._buffer.offset(2)
+
+        self.assertEqual(self.field.index_at(x), 2)
+
+    def test_blinking_reports_only_the_caret(self):
+        self.field.render(self.display)
+        DirtyRegions.take()
+
+        self.field._blink_cursor()
+        self.field.render(self.display)
+
+        self.assertEqual(DirtyRegions.take(), [pygame.Rect(self.field._caret)])
+
+    def test_edits_report_the_old_and_new_text(self):
+        self.field.render(self.display)
+        before = pygame.Rect(self.field._drawn)
+        DirtyRegions.take()
+
+        self.type((pygame.K_BACKSPACE, ""))
+        self.field.render(self.display)
+
+        self.assertEqual(DirtyRegions.take(), [before, pygame.Rect(self.field._drawn)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,268 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import gc
+import os.path
+import tempfile
+import unittest
+
+import pygame
+
+from PygUI.controller import DirtyRegions
+from PygUI.controller import RenderNode
+from PygUI.controller import Surfaces
+from PygUI.controller.DisplayHandler import DisplayHandler
+from PygUI.controller.DisplayHandler import FrameHasher
+from PygUI.controller.DisplayHandler import FrameWriter
+from PygUI.event import EventHandler
+
+
+class ControllerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.init()
+        EventHandler.init()
+
+        DirtyRegions.enabled = True
+        DirtyRegions.take()
+
+    def tearDown(self):
+        DirtyRegions.enabled = False
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class DirtyRegionsTests(ControllerTestCase):
+
+    def test_added_rectangles_are_taken_once(self):
+        DirtyRegions.add((0, 0, 10, 10))
+
+        self.assertEqual(DirtyRegions.take(), [pygame.Rect(0, 0, 10, 10)])
+        self.assertEqual(DirtyRegions.take(), [])
+
+    def test_add_all_takes_as_none(self):
+        DirtyRegions.add((0, 0, 10, 10))
+        DirtyRegions.add_all()
+        DirtyRegions.add((20, 20, 10, 10))
+
+        self.assertIsNone(DirtyRegions.take())
+
+    def test_nothing_is_kept_while_disabled(self):
+        DirtyRegions.enabled = False
+        DirtyRegions.add((0, 0, 10, 10))
+
+        self.assertEqual(DirtyRegions.take(), [])
+
+    def test_merge_unites_overlapping_rectangles(self):
+        rectangles = [pygame.Rect(0, 0, 10, 10), pygame.Rect(5, 5, 10, 10), pygame.Rect(50, 50, 5, 5)]
+        merged = DirtyRegions.merge(rectangles, pygame.Rect(0, 0, 100, 100))
+
+        self.assertEqual(sorted(merged), [pygame.Rect(0, 0, 15, 15), pygame.Rect(50, 50, 5, 5)])
+
+    def test_merge_unites_chains(self):
+        # The last one bridges the first two, which don't overlap each other
+        rectangles = [pygame.Rect(0, 0, 10, 10), pygame.Rect(20, 0, 10, 10), pygame.Rect(5, 0, 20, 5)]
+
+        self.assertEqual(DirtyRegions.merge(rectangles, pygame.Rect(0, 0, 100, 100)), [pygame.Rect(0, 0, 30, 10)])
+
+    def test_merge_clips_to_bounds(self):
+        rectangles = [pygame.Rect(-10, -10, 20, 20), pygame.Rect(200, 200, 10, 10)]
+
+        self.assertEqual(DirtyRegions.merge(rectangles, pygame.Rect(0, 0, 100, 100)), [pygame.Rect(0, 0, 10, 10)])
+
+
+class PresentationTests(ControllerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.display_handler = DisplayHandler()
+        self.display_handler.set_display("Test", 200, 100)
+        self.display_handler.dirty_rectangles = True
+        DirtyRegions.take()
+
+    def test_nothing_dirty_presents_nothing(self):
+        self.assertFalse(self.display_handler._present())
+
+    def test_dirty_rectangles_present(self):
+        DirtyRegions.add((0, 0, 10, 10))
+
+        self.assertTrue(self.display_handler._present())
+        self.assertFalse(self.display_handler._present())
+
+    def test_resizing_presents_everything(self):
+        self.display_handler.resize(pygame.event.Event(pygame.VIDEORESIZE, w=300, h=150))
+
+        self.assertIsNone(DirtyRegions.take())
+
+
+class CaptureTests(ControllerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.display_handler = DisplayHandler()
+        self.display_handler.set_display("Test", 200, 100)
+        self.display_handler.dirty_rectangles = True
+        DirtyRegions.take()
+
+    def present(self, color: (int, int, int)):
+        self.display_handler.display.fill(color)
+        DirtyRegions.add_all()
+        self.display_handler.update()
+
+    def test_only_presented_frames_are_captured(self):
+        self.display_handler.capture = hasher = FrameHasher()
+
+        self.present((255, 0, 0))
+        self.display_handler.update()
+        self.present((0, 0, 255))
+
+        self.assertEqual([frame for frame, _ in hasher.hashes], [1, 3])
+
+    def test_equal_frames_hash_equal(self):
+        self.display_handler.capture = hasher = FrameHasher()
+
+        self.present((255, 0, 0))
+        self.present((0, 0, 255))
+        self.present((255, 0, 0))
+
+        digests = [digest for _, digest in hasher.hashes]
+        self.assertEqual(digests[0], digests[2])
+        self.assertNotEqual(digests[0], digests[1])
+
+    def test_frames_are_written_as_images(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.display_handler.capture = writer = FrameWriter(directory)
+
+            self.present((255, 0, 0))
+            self.present((0, 0, 255))
+            writer.close()
+
+            self.assertEqual(writer.frames, 2)
+            self.assertGreater(writer.copy_time, 0)
+            self.assertEqual(sorted(os.listdir(directory)), ["frame000001.png", "frame000002.png"])
+
+            image = pygame.image.load(os.path.join(directory, "frame000002.png"))
+            self.assertEqual(image.get_size(), (200, 100))
+            self.assertEqual(image.get_at((199, 99))[:3], (0, 0, 255))
+
+    def test_padded_rows_are_copied_row_by_row(self):
+        with tempfile.TemporaryDirectory() as directory:
+            writer = FrameWriter(directory)
+
+            # 4 by 2 pixels of 4 bytes, rows padded to 20 bytes. Padding is garbage that must not end up in the image
+            row = bytes((0, 0, 255, 255)) * 4 + bytes((255,)) * 4
+            masks = (0xff0000, 0xff00, 0xff, 0)
+            writer._frames.put((7, row * 2, 20, (4, 2), 32, 4, masks))
+            writer.close()
+
+            image = pygame.image.load(os.path.join(directory, "frame000007.png"))
+            self.assertEqual([image.get_at((x, y))[:3] for x in range(4) for y in range(2)], [(255, 0, 0)] * 8)
+
+
+class Node(RenderNode):
+
+    def __init__(self):
+        self.renders = 0
+
+    def render(self):
+        self.renders += 1
+
+
+class RenderNodeTests(ControllerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.root, self.child, self.leaf = Node(), Node(), Node()
+        self.root.adopt(self.child)
+        self.child.adopt(self.leaf)
+
+        for node in (self.root, self.child, self.leaf):
+            node.refresh()
+
+    def test_refresh_renders_only_when_dirty(self):
+        self.assertFalse(self.root.refresh())
+        self.assertEqual(self.root.renders, 1)
+
+    def test_invalidating_marks_ancestors_only(self):
+        self.child.invalidate()
+
+        self.assertTrue(self.root.dirty)
+        self.assertTrue(self.child.dirty)
+        self.assertFalse(self.leaf.dirty)
+
+    def test_adopting_an_ancestor_is_ignored(self):
+        self.leaf.adopt(self.root)
+
+        self.assertIsNone(self.root._parent)
+
+    def test_parents_are_held_weakly(self):
+        orphan = Node()
+        parent = Node()
+        parent.adopt(orphan)
+
+        del parent
+        gc.collect()
+
+        orphan.invalidate()
+        self.assertTrue(orphan.dirty)
+
+    def test_invalidating_a_subtree_marks_every_descendant(self):
+        sibling = Node()
+        self.root.adopt(sibling)
+        sibling.refresh()
+        self.root.refresh()
+
+        self.child.invalidate_subtree()
+
+        self.assertTrue(self.root.dirty)
+        self.assertTrue(self.child.dirty)
+        self.assertTrue(self.leaf.dirty)
+        self.assertFalse(sibling.dirty)
+
+    def test_adopting_moves_a_child_between_parents(self):
+        parent = Node()
+        parent.adopt(self.leaf)
+
+        self.assertIs(self.leaf._parent(), parent)
+        self.assertNotIn(self.leaf, set(self.child._children))
+        self.assertIn(self.leaf, set(parent._children))
+
+
+class SurfacesTests(ControllerTestCase):
+
+    def test_same_dimensions_keep_the_surface(self):
+        surface = Surfaces.resize(pygame.Surface((10, 10)), (40, 30))
+
+        self.assertIs(Surfaces.resize(surface, (40, 30)), surface)
+
+    def test_growing_within_the_backing_reuses_it(self):
+        surface = Surfaces.resize(pygame.Surface((10, 10)), (40, 40))
+        backing = surface.get_parent()
+
+        grown = Surfaces.resize(surface, (48, 46))
+
+        self.assertEqual(grown.get_size(), (48, 46))
+        self.assertIs(grown.get_parent(), backing)
+
+    def test_growing_past_the_backing_allocates_a_larger_one(self):
+        surface = Surfaces.resize(pygame.Surface((10, 10)), (40, 40))
+
+        grown = Surfaces.resize(surface, (100, 40))
+
+        self.assertEqual(grown.get_size(), (100, 40))
+        self.assertGreaterEqual(grown.get_parent().get_width(), 100)
+
+    def test_subsurfaces_are_cut_again_from_their_parent(self):
+        parent = pygame.Surface((100, 100))
+        surface = parent.subsurface((20, 30, 10, 10))
+
+        resized = Surfaces.resize(surface, (200, 40))
+
+        self.assertIs(resized.get_parent(), parent)
+        self.assertEqual(resized.get_offset(), (20, 30))
+        self.assertEqual(resized.get_size(), (80, 40))
+
+
+if __name__ == "__main__":
+    unittest.main()
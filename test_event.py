@@ -0,0 +1,809 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import gc
+import json
+import tempfile
+import threading
+import time
+import unittest
+import weakref
+
+import pygame
+
+from PygUI.event import EventHandler
+from PygUI.event import EventProfiler
+from PygUI.event import EventReplay
+from PygUI.event import KEYREPEAT
+from PygUI.event import Scheduler
+from PygUI.event import Timer
+from PygUI.event import _CallbackRegistry
+from PygUI.event import _LOG_EVENT
+from PygUI.event import _LOG_FRAME
+from PygUI.event import _LOG_HEADER
+
+
+class Recorder:
+    """Bound methods to subscribe with, as EventHandler only takes those"""
+
+    def __init__(self):
+        self.events = []
+        self.calls = 0
+
+    def record(self, event=None):
+        self.events.append(event)
+
+    def count(self):
+        self.calls += 1
+
+
+class EventHandlerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.init()
+        pygame.display.set_mode((320, 240))
+        EventHandler.init()
+        pygame.event.clear()
+
+    def post(self, event_type: int, **attributes):
+        pygame.event.post(pygame.event.Event(event_type, attributes))
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class DispatchTests(EventHandlerTestCase):
+
+    def test_callbacks_only_receive_their_type(self):
+        keys, clicks = Recorder(), Recorder()
+        EventHandler.callbacks.add.keydown(keys.record)
+        EventHandler.callbacks.add.mouse_button_down(clicks.record)
+
+        self.post(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a")
+        self.post(pygame.MOUSEBUTTONDOWN, button=1, pos=(5, 5))
+        EventHandler.update()
+
+        self.assertEqual([event.type for event in keys.events], [pygame.KEYDOWN])
+        self.assertEqual([event.type for event in clicks.events], [pygame.MOUSEBUTTONDOWN])
+
+    def test_any_receives_every_event_in_order(self):
+        everything = Recorder()
+        EventHandler.callbacks.add.any(everything.record)
+
+        self.post(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a")
+        self.post(pygame.KEYUP, key=pygame.K_a, mod=0)
+        EventHandler.update()
+
+        types = [event.type for event in everything.events]
+        self.assertLess(types.index(pygame.KEYDOWN), types.index(pygame.KEYUP))
+
+    def test_update_callbacks_run_every_update(self):
+        updates = Recorder()
+        EventHandler.callbacks.add.update(updates.count)
+
+        EventHandler.update()
+        EventHandler.update()
+
+        self.assertEqual(updates.calls, 2)
+
+    def test_held_buttons_are_tracked_after_the_callbacks(self):
+        held = []
+
+        class Watcher:
+            def down(self, _):
+                held.append(set(EventHandler._mouse_press))
+
+        watcher = Watcher()
+        EventHandler.callbacks.add.mouse_button_down(watcher.down)
+
+        self.post(pygame.MOUSEBUTTONDOWN, button=1, pos=(5, 5))
+        EventHandler.update()
+
+        self.assertEqual(held, [set()])
+        self.assertEqual(EventHandler._mouse_press, {1})
+
+        self.post(pygame.MOUSEBUTTONUP, button=1, pos=(5, 5))
+        EventHandler.update()
+
+        self.assertEqual(EventHandler._mouse_press, set())
+
+    def test_mouse_press_callbacks_run_while_a_button_is_held(self):
+        presses = Recorder()
+        EventHandler.callbacks.add.mouse_press(presses.record)
+
+        self.post(pygame.MOUSEBUTTONDOWN, button=3, pos=(5, 5))
+        EventHandler.update()
+        EventHandler.update()
+
+        self.assertEqual(presses.events.__len__(), 2)
+        self.assertEqual(presses.events[0].buttons, {3})
+
+
+class HitTestIndexTests(EventHandlerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = EventHandler.hit_test
+
+    def test_at_finds_regions_across_cells(self):
+        owner, other = Recorder(), Recorder()
+        self.index.add(owner, (100, 100, 200, 50))
+        self.index.add(other, (0, 0, 10, 10))
+
+        self.assertEqual(self.index.at(290, 120), [id(owner)])
+        self.assertEqual(self.index.at(5, 5), [id(other)])
+        self.assertEqual(self.index.at(50, 50), [])
+
+    def test_moved_regions_leave_their_old_cells(self):
+        owner = Recorder()
+        self.index.add(owner, (0, 0, 10, 10))
+        self.index.move(owner, (500, 500, 10, 10))
+
+        self.assertEqual(self.index.at(5, 5), [])
+        self.assertEqual(self.index.at(505, 505), [id(owner)])
+
+    def test_clicks_are_routed_to_the_region_under_the_pointer(self):
+        inside, outside = Recorder(), Recorder()
+        self.index.add(inside, (0, 0, 50, 50), mouse_button_down=inside.record)
+        self.index.add(outside, (100, 100, 50, 50), mouse_button_down=outside.record)
+
+        self.post(pygame.MOUSEBUTTONDOWN, button=1, pos=(10, 10))
+        EventHandler.update()
+
+        self.assertEqual(inside.events.__len__(), 1)
+        self.assertEqual(outside.events, [])
+
+    def test_overlapping_regions_are_called_in_the_order_they_were_added(self):
+        calls = []
+
+        class Owner:
+            def __init__(self, name: str):
+                self.name = name
+
+            def down(self, _):
+                calls.append(self.name)
+
+        owners = [Owner(str(i)) for i in range(20)]
+        for owner in owners:
+            self.index.add(owner, (0, 0, 50, 50), mouse_button_down=owner.down)
+
+        self.index.add(owners[3], (0, 0, 50, 50), mouse_button_down=owners[3].down)  # Added again: now the last
+
+        self.post(pygame.MOUSEBUTTONDOWN, button=1, pos=(10, 10))
+        EventHandler.update()
+
+        self.assertEqual(calls, [str(i) for i in range(20) if i != 3] + ["3"])
+
+    def test_motion_enters_and_leaves(self):
+        owner = Recorder()
+        entered, left = Recorder(), Recorder()
+        self.index.add(owner, (0, 0, 50, 50), mouse_enter=entered.record, mouse_leave=left.record)
+
+        self.post(pygame.MOUSEMOTION, pos=(10, 10), rel=(0, 0), buttons=(0, 0, 0))
+        EventHandler.update()
+        self.post(pygame.MOUSEMOTION, pos=(100, 100), rel=(90, 90), buttons=(0, 0, 0))
+        EventHandler.update()
+
+        self.assertEqual(entered.events.__len__(), 1)
+        self.assertEqual(left.events.__len__(), 1)
+
+    def test_collected_owners_are_removed(self):
+        owner = Recorder()
+        self.index.add(owner, (0, 0, 50, 50))
+
+        del owner
+        gc.collect()
+
+        self.assertEqual(self.index.at(10, 10), [])
+
+
+class CoalescingTests(EventHandlerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.motion = Recorder()
+        EventHandler.callbacks.add.any(self.motion.record)
+
+    def tearDown(self):
+        EventHandler.coalesce_mouse_motion = False
+
+    def move(self, x: int, y: int, rel: (int, int)):
+        self.post(pygame.MOUSEMOTION, pos=(x, y), rel=rel, buttons=(0, 0, 0))
+
+    def motions(self) -> [pygame.event.Event]:
+        return [event for event in self.motion.events if event.type == pygame.MOUSEMOTION]
+
+    def test_runs_merge_into_one_event(self):
+        EventHandler.coalesce_mouse_motion = True
+
+        self.move(1, 1, (1, 1))
+        self.move(3, 2, (2, 1))
+        self.move(6, 2, (3, 0))
+        EventHandler.update()
+
+        motions = self.motions()
+        self.assertEqual(motions.__len__(), 1)
+        self.assertEqual(motions[0].pos, (6, 2))
+        self.assertEqual(motions[0].rel, (6, 2))
+        self.assertEqual([event.pos for event in motions[0].history], [(1, 1), (3, 2), (6, 2)])
+
+    def test_other_events_split_runs(self):
+        EventHandler.coalesce_mouse_motion = True
+
+        self.move(1, 1, (1, 1))
+        self.post(pygame.MOUSEBUTTONDOWN, button=1, pos=(1, 1))
+        self.move(2, 2, (1, 1))
+        EventHandler.update()
+
+        types = [event.type for event in self.motion.events if event.type in (pygame.MOUSEMOTION,
+                                                                              pygame.MOUSEBUTTONDOWN)]
+        self.assertEqual(types, [pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION])
+
+    def test_every_sample_is_dispatched_by_default(self):
+        self.move(1, 1, (1, 1))
+        self.move(2, 2, (1, 1))
+        EventHandler.update()
+
+        self.assertEqual(self.motions().__len__(), 2)
+
+
+class FilterTests(EventHandlerTestCase):
+
+    def tearDown(self):
+        EventHandler.filter_events = True
+
+    def test_unsubscribed_input_is_blocked(self):
+        self.assertTrue(pygame.event.get_blocked(pygame.KEYDOWN))
+        self.assertTrue(pygame.event.get_blocked(pygame.MOUSEMOTION))
+
+    def test_subscribing_allows_and_unsubscribing_blocks_again(self):
+        keys = Recorder()
+
+        EventHandler.callbacks.add.keydown(keys.record)
+        self.assertFalse(pygame.event.get_blocked(pygame.KEYDOWN))
+
+        EventHandler.callbacks.remove.keydown(keys.record)
+        self.assertTrue(pygame.event.get_blocked(pygame.KEYDOWN))
+
+    def test_any_allows_everything(self):
+        everything = Recorder()
+        EventHandler.callbacks.add.any(everything.record)
+
+        self.assertFalse(pygame.event.get_blocked(pygame.KEYDOWN))
+        self.assertFalse(pygame.event.get_blocked(pygame.MOUSEMOTION))
+
+    def test_system_events_and_mouse_buttons_are_never_blocked(self):
+        for event_type in (pygame.QUIT, pygame.VIDEORESIZE, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            self.assertFalse(pygame.event.get_blocked(event_type))
+
+    def test_filtering_can_be_turned_off(self):
+        pygame.event.set_allowed(None)
+        EventHandler.filter_events = False
+        EventHandler.init()
+
+        self.assertFalse(pygame.event.get_blocked(pygame.KEYDOWN))
+
+
+class CallbackRegistryTests(EventHandlerTestCase):
+
+    def test_adding_twice_registers_once(self):
+        registry = _CallbackRegistry()
+        owner = Recorder()
+
+        registry.add(owner.count)
+        registry.add(owner.count)
+
+        self.assertEqual(registry.__len__(), 1)
+
+    def test_only_bound_methods_are_taken(self):
+        with self.assertRaises(TypeError):
+            _CallbackRegistry().add(lambda: None)
+
+    def test_removing_an_unregistered_callback_raises(self):
+        with self.assertRaises(ValueError):
+            _CallbackRegistry().remove(Recorder().count)
+
+    def test_collected_owners_are_pruned(self):
+        emptied = []
+        registry = _CallbackRegistry(emptied.append)
+        owner, kept = Recorder(), Recorder()
+
+        registry.add(owner.count)
+        registry.add(kept.count)
+
+        del owner
+        gc.collect()
+
+        self.assertEqual(list(registry), [kept.count])
+        self.assertEqual(emptied, [])
+
+        del kept
+        gc.collect()
+
+        self.assertEqual(registry.__len__(), 0)
+        self.assertEqual(emptied, [registry])
+
+    def test_removing_while_iterating_skips_the_removed(self):
+        registry = _CallbackRegistry()
+        calls = []
+
+        class Owner:
+            def __init__(self, name):
+                self.name = name
+
+            def call(self):
+                calls.append(self.name)
+
+                if self.name == "first" and calls.__len__() == 1:
+                    registry.remove(second.call)
+                    registry.add(third.call)
+
+        first, second, third = Owner("first"), Owner("second"), Owner("third")
+        registry.add(first.call)
+        registry.add(second.call)
+
+        for callback in registry:
+            callback()
+
+        self.assertEqual(calls, ["first"])
+
+        for callback in registry:
+            callback()
+
+        self.assertEqual(calls, ["first", "first", "third"])
+
+    def test_collected_subscribers_leave_the_dispatch_table(self):
+        keys = Recorder()
+        EventHandler.callbacks.add.keydown(keys.record)
+        self.assertIn(pygame.KEYDOWN, EventHandler.callbacks.events)
+
+        del keys
+        gc.collect()
+
+        self.assertNotIn(pygame.KEYDOWN, EventHandler.callbacks.events)
+        self.assertTrue(pygame.event.get_blocked(pygame.KEYDOWN))
+
+
+class WaitTests(EventHandlerTestCase):
+
+    def test_blocks_until_the_timeout(self):
+        EventHandler.update()  # Takes the window's events
+        start = time.perf_counter()
+
+        self.assertTrue(EventHandler.wait(50))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.04)
+
+    def test_requested_frames_dont_block(self):
+        EventHandler.request_frame()
+
+        self.assertFalse(EventHandler.wait(1000))
+
+    def test_events_end_the_wait_and_are_dispatched_next(self):
+        keys = Recorder()
+        EventHandler.callbacks.add.keydown(keys.record)
+        self.post(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a")
+
+        start = time.perf_counter()
+        EventHandler.wait(5000)
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertFalse(EventHandler.wait(5000))  # One is waiting to be dispatched
+
+        EventHandler.update()
+        self.assertEqual(keys.events.__len__(), 1)
+
+    def test_timers_bound_the_wait(self):
+        timer = Recorder()
+        EventHandler.scheduler.call_later(0.05, timer.count)
+
+        start = time.perf_counter()
+
+        # Window events may end a wait early, so wait until the timer ran
+        while timer.calls == 0 and time.perf_counter() - start < 5:
+            EventHandler.wait(5000)
+            EventHandler.update()
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(timer.calls, 1)
+
+    def test_held_buttons_dont_block(self):
+        self.post(pygame.MOUSEBUTTONDOWN, button=1, pos=(5, 5))
+        EventHandler.update()
+
+        self.assertFalse(EventHandler.wait(1000))
+
+
+class RecordingTests(EventHandlerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(tempfile.mkdtemp(), "events.log")
+
+    def tearDown(self):
+        EventHandler.stop_recording()
+        EventHandler.replay_source = None
+
+    def test_replay_returns_the_recorded_frames(self):
+        keys = Recorder()
+        EventHandler.callbacks.add.keydown(keys.record)
+        EventHandler.record(self.path)
+
+        EventHandler.recorder.delta = 16.0
+        self.post(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a")
+        EventHandler.update()
+
+        EventHandler.recorder.delta = 17.0
+        self.post(pygame.KEYDOWN, key=pygame.K_b, mod=0, unicode="b", unloggable=object())
+        EventHandler.update()
+
+        EventHandler.stop_recording()
+
+        replay = EventReplay(self.path)
+
+        self.assertEqual(replay.advance(), 16.0)
+        self.assertEqual([event.key for event in replay.take() if event.type == pygame.KEYDOWN], [pygame.K_a])
+
+        self.assertEqual(replay.advance(), 17.0)
+        events = [event for event in replay.take() if event.type == pygame.KEYDOWN]
+        self.assertEqual(events[0].key, pygame.K_b)
+        self.assertNotIn("unloggable", events[0].dict)
+        self.assertAlmostEqual(replay.time, 0.033)
+
+        replay.advance()
+        self.assertTrue(replay.finished)
+        self.assertEqual([event.type for event in replay.take()], [pygame.QUIT])
+        self.assertIsNotNone(replay.elapsed)
+
+    def test_events_keep_the_ticks_they_arrived_at(self):
+        EventHandler.callbacks.add.event(pygame.USEREVENT, Recorder().record)
+        EventHandler.record(self.path)
+
+        EventHandler.post(pygame.event.Event(pygame.USEREVENT, {}))
+        posted = pygame.time.get_ticks()
+        pygame.time.wait(30)
+        EventHandler.update()
+
+        EventHandler.stop_recording()
+
+        replay = EventReplay(self.path)
+        replay.take()
+        ticks = [ticks for event, ticks in zip(replay._events, replay.timestamps) if event.type == pygame.USEREVENT]
+
+        self.assertEqual(ticks.__len__(), 1)
+        self.assertLessEqual(ticks[0], posted)
+
+    def test_replaying_dispatches_instead_of_pygame(self):
+        keys = Recorder()
+        EventHandler.callbacks.add.keydown(keys.record)
+
+        EventHandler.record(self.path)
+        self.post(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a")
+        EventHandler.update()
+        EventHandler.stop_recording()
+
+        EventHandler.replay(self.path)
+        self.post(pygame.KEYDOWN, key=pygame.K_z, mod=0, unicode="z")  # Ignored while replaying
+        EventHandler.update()
+
+        self.assertEqual([event.key for event in keys.events], [pygame.K_a, pygame.K_a])
+
+    def test_stopped_recorders_are_released(self):
+        EventHandler.record(self.path)
+        recorder = weakref.ref(EventHandler.recorder)
+        EventHandler.stop_recording()
+        gc.collect()
+
+        self.assertIsNone(recorder())  # Not kept alive by an exit handler
+
+    def test_posted_events_are_dispatched_while_replaying(self):
+        keys = Recorder()
+        users = Recorder()
+        EventHandler.callbacks.add.keydown(keys.record)
+        EventHandler.callbacks.add.event(pygame.USEREVENT, users.record)
+
+        EventHandler.record(self.path)
+        self.post(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a")
+        EventHandler.update()
+        EventHandler.stop_recording()
+
+        EventHandler.replay(self.path)
+        EventHandler.post(pygame.event.Event(pygame.USEREVENT, {"during": "replay"}))
+        EventHandler.update()
+
+        self.assertEqual([event.key for event in keys.events], [pygame.K_a, pygame.K_a])
+        self.assertEqual([event.during for event in users.events], ["replay"])
+
+    def test_custom_types_are_logged_by_id(self):
+        EventHandler.record(self.path)
+        EventHandler.recorder.write([pygame.event.Event(KEYREPEAT, {"key": pygame.K_a})])
+        EventHandler.stop_recording()
+
+        with open(self.path, "rb") as file:
+            log = file.read()
+
+        # Not the number custom_type() gave KEYREPEAT in this run
+        offset = _LOG_HEADER.__len__() + _LOG_FRAME.size
+        self.assertEqual(_LOG_EVENT.unpack_from(log, offset)[1], -1)
+
+        replay = EventReplay(self.path)
+        self.assertEqual([(event.type, event.key) for event in replay.take()], [(KEYREPEAT, pygame.K_a)])
+
+    def test_logs_of_another_format_are_refused(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not an event log")
+
+        with self.assertRaises(ValueError):
+            EventReplay(self.path)
+
+
+class CrossThreadTests(EventHandlerTestCase):
+
+    def test_posted_events_are_dispatched_on_the_loop_thread(self):
+        threads = []
+
+        class Owner:
+            def user(self, _):
+                threads.append(threading.current_thread())
+
+        owner = Owner()
+        EventHandler.callbacks.add.event(pygame.USEREVENT, owner.user)
+
+        poster = threading.Thread(target=EventHandler.post, args=(pygame.event.Event(pygame.USEREVENT, {}),))
+        poster.start()
+        poster.join()
+
+        self.assertEqual(threads, [])
+
+        EventHandler.update()
+        self.assertEqual(threads, [threading.main_thread()])
+
+    def test_calls_run_at_the_next_update_in_order(self):
+        calls = []
+
+        def post():
+            for i in range(100):
+                EventHandler.call_soon(calls.append, i)
+
+        poster = threading.Thread(target=post)
+        poster.start()
+        poster.join()
+
+        EventHandler.update()
+        self.assertEqual(calls, list(range(100)))
+
+    def test_posting_ends_a_wait(self):
+        calls = []
+        EventHandler.update()
+
+        poster = threading.Timer(0.05, EventHandler.call_soon, (calls.append, "posted"))
+        poster.start()
+
+        start = time.perf_counter()
+
+        # Window events may end a wait early, so wait until the call was posted
+        while not EventHandler._inbound and time.perf_counter() - start < 5:
+            EventHandler.wait(5000)
+
+        poster.join()
+        EventHandler.update()
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(calls, ["posted"])
+
+    def test_requesting_a_frame_ends_a_wait(self):
+        EventHandler.update()
+
+        requester = threading.Timer(0.05, EventHandler.request_frame)
+        requester.start()
+
+        start = time.perf_counter()
+
+        while not EventHandler._invalidated and time.perf_counter() - start < 5:
+            EventHandler.wait(5000)
+
+        requester.join()
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_wake_ups_arent_dispatched(self):
+        events = Recorder()
+        EventHandler.callbacks.add.any(events.record)
+
+        EventHandler.request_frame()
+        EventHandler.call_soon(events.count)
+        EventHandler.update()
+
+        self.assertEqual(events.events, [])
+        self.assertEqual(events.calls, 1)
+
+
+class ProfilerTests(EventHandlerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        EventHandler.profiler = EventProfiler(capacity=4)
+
+    def tearDown(self):
+        EventHandler.profiler = None
+
+    def test_callbacks_are_counted_per_owner_and_kind(self):
+        keys, updates = Recorder(), Recorder()
+        EventHandler.callbacks.add.keydown(keys.record)
+        EventHandler.callbacks.add.update(updates.count)
+
+        self.post(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a")
+        self.post(pygame.KEYDOWN, key=pygame.K_b, mod=0, unicode="b")
+        EventHandler.update()
+
+        statistics = {(entry["owner"], entry["kind"]): entry for entry in EventHandler.profiler.statistics()}
+
+        self.assertEqual(statistics[("Recorder", "keydown")]["calls"], 2)
+        self.assertEqual(statistics[("Recorder", "update")]["calls"], 1)
+        self.assertEqual(keys.events.__len__(), 2)
+
+    def test_recent_calls_are_kept_in_a_ring(self):
+        updates = Recorder()
+        EventHandler.callbacks.add.update(updates.count)
+
+        for _ in range(6):
+            EventHandler.update()
+
+        recent = EventHandler.profiler.recent()
+
+        self.assertEqual(recent.__len__(), 4)
+        self.assertEqual({sample["callback"] for sample in recent}, {"count"})
+
+    def test_dump_writes_json(self):
+        path = os.path.join(tempfile.mkdtemp(), "profile.json")
+        EventHandler.callbacks.add.update(Recorder().count)
+        EventHandler.update()
+
+        EventHandler.profiler.dump(path)
+
+        with open(path) as file:
+            self.assertEqual(sorted(json.load(file)), ["recent", "statistics"])
+
+
+class KeyRepeatTests(EventHandlerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        EventHandler.key_repeat.delay = 0.03
+        EventHandler.key_repeat.interval = 0.01
+
+        self.repeats = Recorder()
+        EventHandler.callbacks.add.key_repeat(self.repeats.record)
+
+    def test_held_keys_repeat_after_the_delay(self):
+        self.post(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a")
+        EventHandler.update()
+        EventHandler.update()
+
+        self.assertEqual(self.repeats.events, [])
+
+        time.sleep(0.06)
+        EventHandler.update()
+
+        self.assertGreaterEqual(self.repeats.events.__len__(), 1)
+        self.assertEqual(self.repeats.events[0].type, KEYREPEAT)
+        self.assertEqual(self.repeats.events[0].unicode, "a")
+
+    def test_released_keys_stop_repeating(self):
+        self.post(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode="a")
+        EventHandler.update()
+        self.post(pygame.KEYUP, key=pygame.K_a, mod=0)
+        EventHandler.update()
+
+        time.sleep(0.06)
+        EventHandler.update()
+
+        self.assertEqual(self.repeats.events, [])
+        self.assertEqual(EventHandler.scheduler.next_deadline(), None)
+
+    def test_unsubscribing_disconnects(self):
+        EventHandler.callbacks.remove.key_repeat(self.repeats.record)
+
+        self.assertFalse(EventHandler.key_repeat.connected)
+
+
+class ResizeDebounceTests(EventHandlerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.resizes = Recorder()
+        EventHandler.callbacks.add.window_resize(self.resizes.record)
+
+    def tearDown(self):
+        EventHandler.resize_delay = 0
+
+    def test_only_the_last_resize_of_a_frame_is_dispatched(self):
+        self.post(pygame.VIDEORESIZE, size=(400, 300), w=400, h=300)
+        self.post(pygame.VIDEORESIZE, size=(500, 350), w=500, h=350)
+        EventHandler.update()
+
+        self.assertEqual([event.size for event in self.resizes.events], [(500, 350)])
+
+    def test_resizes_are_held_back_until_the_delay_passes(self):
+        EventHandler.resize_delay = 40
+
+        self.post(pygame.VIDEORESIZE, size=(400, 300), w=400, h=300)
+        EventHandler.update()
+        self.post(pygame.VIDEORESIZE, size=(500, 350), w=500, h=350)
+        EventHandler.update()
+
+        self.assertEqual(self.resizes.events, [])
+
+        time.sleep(0.06)
+        EventHandler.update()
+
+        self.assertEqual([event.size for event in self.resizes.events], [(500, 350)])
+
+
+class SchedulerTests(EventHandlerTestCase):
+    """Deadlines are seconds from now, run at explicit times well clear of them"""
+
+    def setUp(self):
+        super().setUp()
+        self.scheduler = Scheduler()
+        self.start = EventHandler.now()
+        self.calls = []
+
+    def test_timers_run_in_deadline_order(self):
+        self.scheduler.call_later(2.0, self.calls.append, "late")
+        self.scheduler.call_later(1.0, self.calls.append, "early")
+
+        self.assertEqual(self.scheduler.run(self.start + 0.5), 0)
+        self.assertEqual(self.scheduler.run(self.start + 3.0), 2)
+        self.assertEqual(self.calls, ["early", "late"])
+
+    def test_due_timers_run_once(self):
+        self.scheduler.call_later(1.0, self.calls.append, "once")
+
+        self.scheduler.run(self.start + 2.0)
+        self.scheduler.run(self.start + 3.0)
+
+        self.assertEqual(self.calls, ["once"])
+        self.assertIsNone(self.scheduler.next_deadline())
+
+    def test_equal_deadlines_keep_their_order(self):
+        for i in range(10):
+            self.scheduler._push(Timer(self.start + 1.0, None, self.calls.append, (i,)))
+
+        self.scheduler.run(self.start + 2.0)
+
+        self.assertEqual(self.calls, list(range(10)))
+
+    def test_repeating_timers_run_once_per_due_run(self):
+        self.scheduler.call_every(1.0, self.calls.append, "tick")
+
+        self.scheduler.run(self.start + 1.5)
+        self.scheduler.run(self.start + 10.0)  # Late: the missed ticks aren't run in a burst
+        self.scheduler.run(self.start + 10.5)
+        self.scheduler.run(self.start + 11.5)
+
+        self.assertEqual(self.calls, ["tick"] * 3)
+
+    def test_cancelled_timers_dont_run_or_bound_the_wait(self):
+        timer = self.scheduler.call_later(1.0, self.calls.append, "cancelled")
+        self.scheduler.call_later(2.0, self.calls.append, "kept")
+
+        timer.cancel()
+
+        self.assertGreater(self.scheduler.next_deadline(), self.start + 1.5)
+        self.scheduler.run(self.start + 3.0)
+        self.assertEqual(self.calls, ["kept"])
+
+    def test_timers_of_collected_owners_are_cancelled(self):
+        owner = Recorder()
+        timer = self.scheduler.call_every(1.0, owner.count)
+
+        del owner
+        gc.collect()
+        self.scheduler.run(self.start + 2.0)
+
+        self.assertFalse(timer.active)
+        self.assertIsNone(self.scheduler.next_deadline())
+
+
+if __name__ == "__main__":
+    unittest.main()
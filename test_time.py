@@ -0,0 +1,337 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import os.path
+import time
+import tempfile
+import unittest
+
+import pygame
+
+from PygUI.controller import DirtyRegions
+from PygUI.controller import RenderNode
+from PygUI.event import EventHandler
+from PygUI.time import Clock
+from PygUI.time import FrameHistory
+from PygUI.time import FrameOverlay
+from PygUI.time import FramePacing
+from PygUI.time import FrameTimings
+
+
+class TimeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.init()
+        self.display = pygame.display.set_mode((320, 240))
+        EventHandler.init()
+
+        DirtyRegions.enabled = True
+        DirtyRegions.take()
+
+    def tearDown(self):
+        DirtyRegions.enabled = False
+
+    @staticmethod
+    def timings(*milliseconds) -> FrameTimings:
+        """FrameTimings holding one frame of each duration"""
+        timings = FrameTimings(capacity=16)
+
+        for duration in milliseconds:
+            timings._current["logic"] = int(duration * 1e6)
+            timings.end_frame()
+
+        return timings
+
+    @staticmethod
+    def history(*milliseconds) -> FrameHistory:
+        """FrameHistory holding one loop of each duration. Loops of 33 ms or more are janks"""
+        history = FrameHistory(capacity=16)
+
+        for duration in milliseconds:
+            history.add(duration, duration >= 33)
+
+        return history
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class FrameTimingsTests(TimeTestCase):
+
+    def test_phases_of_a_frame_are_summed(self):
+        timings = FrameTimings()
+
+        for _ in range(2):
+            timings.begin_phase("render")
+            timings.end_phase("render")
+        timings.begin_phase("logic")
+        timings.end_phase("logic")
+        timings.end_frame()
+
+        self.assertEqual(timings.frames, 1)
+        self.assertEqual(sorted(timings.last()), ["logic", "render"])
+        self.assertEqual(list(timings.recent(1)), [timings.percentiles("render", (100,))[0] +
+                                                   timings.percentiles("logic", (100,))[0]])
+
+    def test_frames_without_phases_are_not_counted(self):
+        timings = FrameTimings()
+        timings.end_frame()
+
+        self.assertEqual(timings.frames, 0)
+        self.assertEqual(timings.percentiles(), [0, 0, 0])
+
+    def test_percentiles_are_nearest_rank(self):
+        timings = self.timings(*range(10, 0, -1))
+
+        self.assertEqual(timings.percentiles(None, (10, 14, 50, 100)), [1e6, 2e6, 5e6, 10e6])
+
+    def test_only_the_latest_frames_are_kept(self):
+        timings = self.timings(*([100] * 16 + [1] * 10))
+
+        self.assertEqual(timings.frames, 26)
+        self.assertEqual(list(timings.recent(12)), [100e6] * 2 + [1e6] * 10)
+        self.assertEqual(timings.percentiles(None, (50,)), [1e6])
+
+    def test_overruns_are_frames_over_budget(self):
+        timings = FrameTimings(capacity=16)
+        timings.budget = int(10e6)
+
+        for duration in (5, 15, 20, 10):
+            timings._current["logic"] = int(duration * 1e6)
+            timings.end_frame()
+
+        self.assertEqual(timings.overruns, 2)
+        self.assertEqual(timings.report()["frame"]["overruns"], 2)
+        self.assertEqual(timings.report()["logic"]["max"], 20.0)
+        self.assertIn("2 of 4 frames over budget", timings.summary())
+
+
+class FrameHistoryTests(TimeTestCase):
+
+    def test_statistics_of_no_loops_are_zero(self):
+        history = FrameHistory()
+
+        self.assertEqual(history.mean(), 0.0)
+        self.assertEqual(history.percentile(50), 0.0)
+
+    def test_percentiles_are_bin_upper_edges(self):
+        history = self.history(*(duration + 0.5 for duration in range(10, 0, -1)))
+
+        self.assertEqual([history.percentile(percent) for percent in (10, 50, 100)], [2.0, 6.0, 11.0])
+        self.assertEqual(history.mean(), 6.0)
+
+    def test_evicted_loops_leave_the_statistics(self):
+        history = self.history(*([100.0] * 16 + [1.0] * 10))
+
+        self.assertEqual(history.count, 16)
+        self.assertEqual(history.mean(), (6 * 100.0 + 10 * 1.0) / 16)
+        self.assertEqual(sum(history.histogram), 16)
+        self.assertEqual(history.percentile(50), 2.0)
+        self.assertEqual(history.percentile(100), 100.0)  # Past the last bin
+        self.assertEqual(list(history.recent(32)), [(100.0, True)] * 6 + [(1.0, False)] * 10)
+
+
+class FrameOverlayTests(TimeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.display.fill((10, 200, 30))
+        self.overlay = FrameOverlay((0, 0), (100, 40))
+        self.overlay.update(60, self.history(5, 10), 33.0)
+
+    def test_erase_restores_what_was_under(self):
+        self.overlay.render(self.display)
+        self.assertNotEqual(self.display.get_at((50, 5))[:3], (10, 200, 30))
+
+        self.overlay.erase(self.display)
+        self.assertEqual(self.display.get_at((50, 5))[:3], (10, 200, 30))
+
+    def test_repeated_frames_do_not_blend_over_themselves(self):
+        self.overlay.render(self.display)
+        first = self.display.get_at((50, 5))
+
+        for _ in range(5):
+            self.overlay.erase(self.display)
+            self.overlay.render(self.display)
+
+        self.assertEqual(self.display.get_at((50, 5)), first)
+
+    def test_new_numbers_are_reported_once(self):
+        self.overlay.render(self.display)
+        self.assertEqual(DirtyRegions.take(), [pygame.Rect(0, 0, 100, 40)])
+
+        self.overlay.erase(self.display)
+        self.overlay.render(self.display)
+        self.assertEqual(DirtyRegions.take(), [])
+
+    def test_unchanged_numbers_are_not_rasterized_again(self):
+        self.overlay.render(self.display)
+        self.overlay.update(60, self.history(5, 10), 33.0)
+
+        self.assertFalse(self.overlay.dirty)
+
+        self.overlay.update(59, self.history(5, 10), 33.0)
+        self.assertTrue(self.overlay.dirty)
+
+    def test_erase_skips_a_replaced_surface(self):
+        self.overlay.render(self.display)
+        other = pygame.Surface((320, 240))
+        other.fill((1, 2, 3))
+
+        self.overlay.erase(other)
+        self.assertEqual(other.get_at((50, 5))[:3], (1, 2, 3))
+
+
+class ClockTests(TimeTestCase):
+    """Clocks run on replayed deltas, so the steps don't depend on how fast the tests run"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        EventHandler.replay_source = None
+        self.directory.cleanup()
+        super().tearDown()
+
+    def replay(self, *deltas):
+        path = os.path.join(self.directory.name, "deltas.log")
+        EventHandler.record(path)
+
+        for delta in deltas:
+            EventHandler.recorder.delta = delta
+            EventHandler.update()
+
+        EventHandler.stop_recording()
+        EventHandler.replay(path)
+
+    @staticmethod
+    def loop(clock: Clock, loops: int) -> [(int, float)]:
+        """(steps, alpha) of every loop"""
+        frames = []
+
+        for _ in range(loops):
+            clock.synchronize_loop(60)
+            frames.append((clock.steps, clock.alpha))
+
+        return frames
+
+    def test_without_fixed_rate_delta_is_elapsed(self):
+        self.replay(12.5, 20.0)
+        clock = Clock()
+
+        self.assertEqual(self.loop(clock, 2), [(1, 1.0), (1, 1.0)])
+        self.assertEqual(clock.delta, 20.0)
+
+    def test_fixed_steps_carry_the_remainder(self):
+        self.replay(10.0, 25.0, 5.0)
+        clock = Clock()
+        clock.fixed_rate = 100
+
+        self.assertEqual(self.loop(clock, 3), [(1, 0.0), (2, 0.5), (1, 0.0)])
+        self.assertEqual(clock.delta, 10.0)
+
+    def test_catching_up_is_clamped(self):
+        self.replay(1000.0, 10.0)
+        clock = Clock()
+        clock.fixed_rate = 100
+        clock.max_steps = 4
+
+        self.assertEqual(self.loop(clock, 2), [(4, 0.0), (1, 0.0)])
+
+    def test_clocks_keep_their_own_alpha(self):
+        self.replay(15.0)
+        paced, free = Clock(), Clock()
+        paced.fixed_rate = 100
+
+        paced.synchronize_loop(60)
+
+        self.assertEqual(paced.alpha, 0.5)
+        self.assertEqual(free.alpha, 1.0)
+
+    def test_slow_loops_are_janks(self):
+        self.replay(16.0, 40.0, 16.0, 34.0)
+        clock = Clock()
+
+        self.loop(clock, 4)
+
+        self.assertEqual([elapsed for _, elapsed, _ in clock.janks], [40.0, 34.0])
+
+    def test_the_history_flags_the_janks(self):
+        self.replay(16.0, 40.0, 16.0)
+        clock = Clock()
+
+        self.loop(clock, 3)
+
+        self.assertEqual(list(clock.history.recent(3)), [(16.0, False), (40.0, True), (16.0, False)])
+        self.assertEqual(clock.history.mean(), 24.0)
+
+
+class FramePacingTests(TimeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pacing = FramePacing(idle_rate=10, background_rate=5, idle_after=0.5, decay=1.0)
+        self.quiet(10.0)
+
+    @staticmethod
+    def quiet(seconds: float):
+        """Nothing happened for seconds"""
+        EventHandler.active_at = RenderNode.invalidated_at = time.perf_counter() - seconds
+
+    def event(self, event_type: int):
+        pygame.event.post(pygame.event.Event(event_type, {}))
+        EventHandler.update()
+
+    def test_quiet_loops_run_at_the_idle_rate(self):
+        self.assertEqual(self.pacing.rate(60), 10)
+        self.assertEqual(self.pacing.state, FramePacing.IDLE)
+
+    def test_requested_frames_are_active(self):
+        EventHandler.request_frame()
+
+        self.assertEqual(self.pacing.rate(60), 60)
+        self.assertEqual(self.pacing.state, FramePacing.ACTIVE)
+
+    def test_invalidated_nodes_are_active(self):
+        RenderNode().invalidate()
+
+        self.assertEqual(self.pacing.rate(60), 60)
+
+    def test_the_rate_decays_after_activity(self):
+        self.quiet(1.0)
+
+        self.assertLess(self.pacing.rate(60), 60)
+        self.assertGreater(self.pacing.rate(60), 10)
+
+    def test_unfocused_windows_run_at_the_background_rate(self):
+        self.event(pygame.WINDOWFOCUSLOST)
+        EventHandler.request_frame()
+
+        self.assertEqual(self.pacing.rate(60), 5)
+        self.assertEqual(self.pacing.state, FramePacing.BACKGROUND)
+
+        self.event(pygame.WINDOWFOCUSGAINED)
+        self.assertEqual(self.pacing.rate(60), 60)
+
+    def test_minimized_windows_are_suspended(self):
+        self.event(pygame.WINDOWMINIMIZED)
+
+        self.assertEqual(self.pacing.rate(60), 0)
+        self.assertEqual(self.pacing.state, FramePacing.SUSPENDED)
+
+        self.event(pygame.WINDOWRESTORED)
+        self.quiet(10.0)
+        self.assertEqual(self.pacing.rate(60), 10)
+
+    def test_hidden_windows_are_suspended(self):
+        self.event(pygame.WINDOWHIDDEN)
+
+        self.assertEqual(self.pacing.rate(60), 0)
+
+        self.event(pygame.WINDOWSHOWN)
+        self.assertEqual(self.pacing.rate(60), 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
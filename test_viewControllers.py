@@ -0,0 +1,137 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import unittest
+
+import pygame
+
+from PygUI.UI.accesories import UIButton
+from PygUI.UI.accesories import UITabBarItem
+from PygUI.UI.viewControllers import UITabBarViewController
+from PygUI.UI.viewControllers import UIViewController
+from PygUI.controller import RenderNode
+from PygUI.event import EventHandler
+
+
+class Page(UIViewController):
+
+    def __init__(self, surface: pygame.Surface):
+        UIViewController.__init__(self, surface)
+        self.button = UIButton(size=(10, 10, 40, 20))
+        self.adopt(self.button)
+
+    def render(self):
+        self.surface.fill((255, 255, 255))
+        self.button.render(self.surface)
+
+    def update(self, x, y, delta: float):
+        self.button.update(x, y)
+
+
+class ViewControllersTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.init()
+        self.display = pygame.display.set_mode((400, 300))
+        EventHandler.init()
+        pygame.event.clear()
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class RenderTreeTests(ViewControllersTestCase):
+
+    def test_assigning_attributes_doesnt_invalidate(self):
+        page = Page(self.display)
+        label = UIButton()
+        page.refresh()
+        invalidated_at = RenderNode.invalidated_at
+
+        page.label = label
+        page.background = (0, 0, 0)
+
+        self.assertFalse(page.dirty)
+        self.assertEqual(RenderNode.invalidated_at, invalidated_at)
+
+    def test_adopted_widgets_invalidate_their_view_controller(self):
+        page = Page(self.display)
+        page.refresh()
+
+        page.button.text = "changed"
+
+        self.assertTrue(page.dirty)
+
+    def test_tab_bars_adopt_their_bar_and_current_view_controller(self):
+        tabs = UITabBarViewController(self.display, [UITabBarItem("page", Page), UITabBarItem("other", Page)])
+
+        self.assertIs(tabs._tab_bar._parent(), tabs)
+        self.assertIs(tabs._view_controller._parent(), tabs)
+
+        tabs.instantiate_view_controller(1)
+        self.assertIs(tabs._view_controller._parent(), tabs)
+
+
+class Container(UIViewController):
+    """Holds one Page, 100 pixels in"""
+
+    def __init__(self, surface: pygame.Surface, subsurfaces: bool):
+        UIViewController.__init__(self, surface, subsurfaces)
+        self.page = Page(self.child_surface((100, 50, 200, 100)))
+        self.adopt(self.page)
+
+    def render(self):
+        self.page.refresh()
+        self.compose(self.page.surface, (100, 50))
+
+    def update(self, x, y, delta: float):
+        self.page.update(x + 100, y + 50, delta)
+
+
+class CompositionTests(ViewControllersTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.display.fill((0, 0, 0))
+
+    def test_children_render_straight_into_subsurfaces(self):
+        container = Container(self.display, True)
+
+        self.assertIs(container.page.surface.get_parent(), self.display)
+        self.assertEqual(container.page.surface.get_offset(), (100, 50))
+
+        container.page.refresh()
+        self.assertEqual(self.display.get_at((150, 100))[:3], (255, 255, 255))
+
+    def test_children_render_into_copies_otherwise(self):
+        container = Container(self.display, False)
+
+        self.assertIsNone(container.page.surface.get_parent())
+
+        container.page.refresh()
+        self.assertEqual(self.display.get_at((150, 100))[:3], (0, 0, 0))
+
+        container.refresh()
+        self.assertEqual(self.display.get_at((150, 100))[:3], (255, 255, 255))
+
+    def test_child_surfaces_are_clipped_to_the_parent(self):
+        container = Container(self.display, True)
+
+        self.assertEqual(container.child_surface((350, 250, 100, 100)).get_size(), (50, 50))
+        self.assertEqual(container.child_surface((0, 0, -10, 20)).get_width(), 0)
+
+    def test_tab_bars_cut_their_children_again_when_resized(self):
+        tabs = UITabBarViewController(self.display.subsurface(self.display.get_rect()), [UITabBarItem("page", Page)],
+                                      subsurfaces=True, height=40)
+
+        self.assertIs(tabs._view_controller.surface.get_parent(), tabs.surface)
+
+        tabs.update_dimensions([300, 200])
+
+        self.assertIs(tabs._tab_bar.surface.get_parent(), tabs.surface)
+        self.assertIs(tabs._view_controller.surface.get_parent(), tabs.surface)
+        self.assertEqual(tabs._view_controller.surface.get_size(), (300, 160))
+
+
+if __name__ == "__main__":
+    unittest.main()